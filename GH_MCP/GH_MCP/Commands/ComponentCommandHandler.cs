@@ -457,14 +457,37 @@ namespace GrasshopperMCP.Commands
                     }
                     else if (component is GH_NumberSlider slider)
                     {
-                        double doubleValue;
-                        if (double.TryParse(value, out doubleValue))
+                        // 可選的滑桿範圍和精度設置
+                        if (command.Parameters.ContainsKey("min"))
                         {
-                            slider.SetSliderValue((decimal)doubleValue);
+                            slider.Slider.Minimum = (decimal)command.GetParameter<double>("min");
                         }
-                        else
+                        if (command.Parameters.ContainsKey("max"))
+                        {
+                            slider.Slider.Maximum = (decimal)command.GetParameter<double>("max");
+                        }
+                        if (command.Parameters.ContainsKey("rounding"))
+                        {
+                            double rounding = command.GetParameter<double>("rounding");
+                            slider.Slider.Type = rounding >= 1 && rounding % 1 == 0
+                                ? Grasshopper.GUI.Base.GH_SliderAccuracy.Integer
+                                : Grasshopper.GUI.Base.GH_SliderAccuracy.Float;
+                            slider.Slider.DecimalPlaces = rounding > 0 && rounding < 1
+                                ? (int)Math.Ceiling(-Math.Log10(rounding))
+                                : 0;
+                        }
+                        
+                        if (!string.IsNullOrEmpty(value))
                         {
-                            throw new ArgumentException("Invalid slider value format");
+                            double doubleValue;
+                            if (double.TryParse(value, out doubleValue))
+                            {
+                                slider.SetSliderValue((decimal)doubleValue);
+                            }
+                            else
+                            {
+                                throw new ArgumentException("Invalid slider value format");
+                            }
                         }
                     }
                     else if (component is IGH_Component ghComponent)
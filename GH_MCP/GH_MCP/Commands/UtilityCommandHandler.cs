@@ -4,6 +4,8 @@ using System.IO;
 using System.Threading;
 using GrasshopperMCP.Models;
 using Grasshopper.Kernel;
+using Grasshopper.Kernel.Types;
+using Rhino.Geometry;
 using Rhino;
 using Rhino.Runtime;
 
@@ -160,13 +162,23 @@ namespace GrasshopperMCP.Commands
         }
 
         /// <summary>
-        /// Get preview geometry from a component
+        /// Get preview geometry from a component, one page at a time.
+        /// Items are numbered across the selected outputs in output, branch and item order;
+        /// a page ends after "limit" items or once its text exceeds "maxChars" characters.
+        /// With "encoding": "binary" points, polylines, point clouds and meshes are sent as
+        /// base64 little-endian float64/int32 arrays, and all-point branches as one array.
         /// </summary>
         public static object GetGeometry(Command command)
         {
             string idStr = command.GetParameter<string>("id");
             if (string.IsNullOrEmpty(idStr))
                 throw new ArgumentException("Component ID is required");
+            string outputFilter = command.GetParameter<string>("output");
+            string branchFilter = command.GetParameter<string>("branch");
+            int offset = command.Parameters.ContainsKey("offset") ? Math.Max(0, command.GetParameter<int>("offset")) : 0;
+            int limit = command.Parameters.ContainsKey("limit") ? command.GetParameter<int>("limit") : int.MaxValue;
+            long maxChars = command.Parameters.ContainsKey("maxChars") ? command.GetParameter<long>("maxChars") : long.MaxValue;
+            bool binary = command.GetParameter<string>("encoding") == "binary";
             object result = null;
             Exception exception = null;
             RhinoApp.InvokeOnUiThread(new Action(() =>
@@ -182,17 +194,84 @@ namespace GrasshopperMCP.Commands
                     if (obj == null)
                         throw new ArgumentException("Component not found");
                     var outputs = new List<object>();
-                    foreach (var param in obj.Params.Output)
+                    int total = 0, count = 0;
+                    long chars = 0;
+                    int? nextOffset = null;
+                    for (int i = 0; i < obj.Params.Output.Count; i++)
                     {
-                        var data = new List<string>();
-                        foreach (var d in param.VolatileData.AllData(true))
+                        var param = obj.Params.Output[i];
+                        if (!string.IsNullOrEmpty(outputFilter) && outputFilter != param.Name &&
+                            outputFilter != param.NickName && outputFilter != i.ToString())
+                            continue;
+                        var branches = new List<object>();
+                        int itemCount = 0;
+                        var structure = param.VolatileData;
+                        foreach (var path in structure.Paths)
                         {
-                            var val = d.ScriptVariable();
-                            data.Add(val != null ? val.ToString() : d.ToString());
+                            string pathText = path.ToString();
+                            if (!string.IsNullOrEmpty(branchFilter) && branchFilter != pathText)
+                                continue;
+                            var branch = structure.get_Branch(path);
+                            if (total + branch.Count <= offset || nextOffset != null)
+                            {
+                                // Branch lies entirely outside the page: only count it
+                                total += branch.Count;
+                                itemCount += branch.Count;
+                                continue;
+                            }
+                            var data = new List<object>();
+                            bool allPoints = binary;
+                            int skip = Math.Max(0, offset - total);
+                            int start = skip;
+                            for (int j = skip; j < branch.Count; j++)
+                            {
+                                if (count >= limit || (count > 0 && chars >= maxChars))
+                                {
+                                    nextOffset = total + j;
+                                    break;
+                                }
+                                var goo = branch[j] as IGH_Goo;
+                                var val = goo?.ScriptVariable();
+                                count++;
+                                if (binary && val is Point3d)
+                                {
+                                    // Encoded once the whole branch slice is known
+                                    data.Add(val);
+                                    chars += 32;
+                                    continue;
+                                }
+                                allPoints = false;
+                                int length;
+                                object encoded = binary ? EncodeGeometry(val, out length) : null;
+                                if (encoded == null)
+                                {
+                                    string text = val != null ? val.ToString() : branch[j]?.ToString() ?? "";
+                                    encoded = text;
+                                    length = text.Length;
+                                }
+                                data.Add(encoded);
+                                chars += length;
+                            }
+                            total += branch.Count;
+                            itemCount += branch.Count;
+                            if (data.Count == 0)
+                                continue;
+                            if (allPoints)
+                            {
+                                var points = data.ConvertAll(p => (Point3d)p);
+                                branches.Add(new { path = pathText, start, count = points.Count, points = EncodePoints(points) });
+                                continue;
+                            }
+                            for (int k = 0; k < data.Count; k++)
+                            {
+                                if (data[k] is Point3d point)
+                                    data[k] = new { type = "point", arrays = new { vertices = EncodePoints(new List<Point3d> { point }) } };
+                            }
+                            branches.Add(new { path = pathText, start, data });
                         }
-                        outputs.Add(new { name = param.Name, data });
+                        outputs.Add(new { name = param.Name, index = i, itemCount, branches });
                     }
-                    result = new { id = idStr, outputs };
+                    result = new { id = idStr, outputs, offset, count, total, nextOffset };
                 }
                 catch (Exception ex)
                 {
@@ -207,6 +286,83 @@ namespace GrasshopperMCP.Commands
             return result;
         }
 
+        private static object EncodeArray(Array values, int rows, int columns, string dtype)
+        {
+            var bytes = new byte[Buffer.ByteLength(values)];
+            Buffer.BlockCopy(values, 0, bytes, 0, bytes.Length);
+            if (!BitConverter.IsLittleEndian)
+            {
+                int size = dtype == "<f8" ? 8 : 4;
+                for (int i = 0; i < bytes.Length; i += size)
+                    Array.Reverse(bytes, i, size);
+            }
+            return new { dtype, shape = new[] { rows, columns }, data = Convert.ToBase64String(bytes) };
+        }
+
+        private static object EncodePoints(IList<Point3d> points)
+        {
+            var values = new double[points.Count * 3];
+            for (int i = 0; i < points.Count; i++)
+            {
+                values[i * 3] = points[i].X;
+                values[i * 3 + 1] = points[i].Y;
+                values[i * 3 + 2] = points[i].Z;
+            }
+            return EncodeArray(values, points.Count, 3, "<f8");
+        }
+
+        /// <summary>
+        /// Binary form of a geometry value, or null when it has no numeric representation
+        /// </summary>
+        private static object EncodeGeometry(object value, out int length)
+        {
+            List<Point3d> vertices = null;
+            string type = "polyline";
+            switch (value)
+            {
+                case Line line:
+                    vertices = new List<Point3d> { line.From, line.To };
+                    break;
+                case Polyline polyline:
+                    vertices = new List<Point3d>(polyline);
+                    break;
+                case Curve curve when curve.TryGetPolyline(out Polyline curvePolyline):
+                    vertices = new List<Point3d>(curvePolyline);
+                    break;
+                case PointCloud cloud:
+                    vertices = new List<Point3d>(cloud.GetPoints());
+                    type = "pointcloud";
+                    break;
+                case Mesh mesh:
+                    vertices = new List<Point3d>(mesh.Vertices.Count);
+                    for (int i = 0; i < mesh.Vertices.Count; i++)
+                        vertices.Add(mesh.Vertices[i]);
+                    var faces = new int[mesh.Faces.Count * 4];
+                    for (int i = 0; i < mesh.Faces.Count; i++)
+                    {
+                        var face = mesh.Faces[i];
+                        faces[i * 4] = face.A;
+                        faces[i * 4 + 1] = face.B;
+                        faces[i * 4 + 2] = face.C;
+                        faces[i * 4 + 3] = face.D;
+                    }
+                    // Base64 size of the vertex and face arrays plus the JSON around them
+                    length = 128 + (vertices.Count * 24 + faces.Length * 4) * 4 / 3;
+                    return new
+                    {
+                        type = "mesh",
+                        arrays = new { vertices = EncodePoints(vertices), faces = EncodeArray(faces, mesh.Faces.Count, 4, "<i4") }
+                    };
+            }
+            if (vertices == null)
+            {
+                length = 0;
+                return null;
+            }
+            length = 96 + vertices.Count * 24 * 4 / 3;
+            return new { type, arrays = new { vertices = EncodePoints(vertices) } };
+        }
+
         /// <summary>
         /// Run a Python script inside Rhino
         /// </summary>
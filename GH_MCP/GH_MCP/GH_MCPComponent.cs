@@ -1,5 +1,6 @@
 using System;
 using System.Collections.Generic;
+using System.Linq;
 using System.Drawing;
 using System.Net;
 using System.Net.Sockets;
@@ -11,7 +12,9 @@ using GrasshopperMCP.Models;
 using Grasshopper.Kernel;
 using Rhino;
 using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
 using System.IO;
+using System.IO.Compression;
 
 namespace GrasshopperMCP
 {
@@ -23,6 +26,10 @@ namespace GrasshopperMCP
         private static TcpListener listener;
         private static bool isRunning = false;
         private static int grasshopperPort = 8080;
+        private const string LengthPrefixedFraming = "length-prefixed";
+        private const string ZlibCompression = "zlib";
+        // 壓縮幀的長度頭最高位為 1，其餘 31 位為長度
+        private const int CompressedFlag = unchecked((int)0x80000000);
         
         /// <summary>
         /// 初始化 GrasshopperMCPComponent 類的新實例
@@ -174,41 +181,234 @@ namespace GrasshopperMCP
             using (var reader = new StreamReader(stream, Encoding.UTF8))
             using (var writer = new StreamWriter(stream, Encoding.UTF8) { AutoFlush = true })
             {
-                try
+                // 同一連接上可依序處理多個命令，直到客戶端關閉連接。
+                // 連接開始時以換行分隔；客戶端可通過 hello 命令協商改用長度前綴分幀，並可協商 zlib 壓縮
+                bool framed = false;
+                int compressionThreshold = -1;
+                while (isRunning)
                 {
-                    // 讀取命令
-                    string commandJson = await reader.ReadLineAsync();
-                    if (string.IsNullOrEmpty(commandJson))
+                    string commandJson;
+                    try
+                    {
+                        // 讀取命令
+                        commandJson = framed ? await ReadFrameAsync(stream, compressionThreshold >= 0) : await reader.ReadLineAsync();
+                    }
+                    catch (IOException)
                     {
                         return;
                     }
-                    
-                    // 更新最後接收的命令
-                    LastCommand = commandJson;
-                    
-                    // 解析命令
-                    Command command = JsonConvert.DeserializeObject<Command>(commandJson);
-                    RhinoApp.WriteLine($"GrasshopperMCPBridge: Received command: {command.Type}");
-                    
-                    // 執行命令
-                    Response response = GrasshopperCommandRegistry.ExecuteCommand(command);
-                    
-                    // 發送響應
-                    string responseJson = JsonConvert.SerializeObject(response);
-                    await writer.WriteLineAsync(responseJson);
-                    
-                    RhinoApp.WriteLine($"GrasshopperMCPBridge: Command {command.Type} executed with result: {(response.Success ? "Success" : "Error")}");
+
+                    if (commandJson == null)
+                    {
+                        return;
+                    }
+                    if (commandJson.Trim().Length == 0)
+                    {
+                        continue;
+                    }
+
+                    if (!framed && TryNegotiateFraming(commandJson, out string helloReply, out compressionThreshold))
+                    {
+                        // 客戶端在收到回覆前不會再發送數據，因此 reader 中沒有未讀取的緩衝字節
+                        await writer.WriteLineAsync(helloReply);
+                        framed = true;
+                        continue;
+                    }
+
+                    try
+                    {
+                        // 更新最後接收的命令
+                        LastCommand = commandJson;
+                        
+                        // 解析命令
+                        Command command = JsonConvert.DeserializeObject<Command>(commandJson);
+                        RhinoApp.WriteLine($"GrasshopperMCPBridge: Received command: {command.Type}");
+                        
+                        // 執行命令
+                        Response response = GrasshopperCommandRegistry.ExecuteCommand(command);
+                        
+                        // 發送響應
+                        string responseJson = JsonConvert.SerializeObject(response);
+                        await WriteMessageAsync(stream, writer, framed, compressionThreshold, responseJson);
+                        
+                        RhinoApp.WriteLine($"GrasshopperMCPBridge: Command {command.Type} executed with result: {(response.Success ? "Success" : "Error")}");
+                    }
+                    catch (IOException)
+                    {
+                        return;
+                    }
+                    catch (Exception ex)
+                    {
+                        RhinoApp.WriteLine($"GrasshopperMCPBridge error handling client: {ex.Message}");
+                        
+                        // 發送錯誤響應
+                        Response errorResponse = Response.CreateError($"Server error: {ex.Message}");
+                        string errorResponseJson = JsonConvert.SerializeObject(errorResponse);
+                        await WriteMessageAsync(stream, writer, framed, compressionThreshold, errorResponseJson);
+                    }
                 }
-                catch (Exception ex)
+            }
+        }
+
+        /// <summary>
+        /// 處理分幀協商命令 {"method": "hello", "params": {"framing": [...], "compression": [...], "compressionThreshold": n}}
+        /// </summary>
+        /// <param name="commandJson">收到的命令</param>
+        /// <param name="reply">同意使用長度前綴分幀時的回覆</param>
+        /// <param name="compressionThreshold">同意使用 zlib 壓縮時，達到這個字節數的消息才壓縮；不壓縮時為 -1</param>
+        /// <returns>是否切換到長度前綴分幀</returns>
+        private static bool TryNegotiateFraming(string commandJson, out string reply, out int compressionThreshold)
+        {
+            reply = null;
+            compressionThreshold = -1;
+            JObject hello;
+            try
+            {
+                hello = JObject.Parse(commandJson);
+            }
+            catch (JsonException)
+            {
+                return false;
+            }
+            if ((string)hello["method"] != "hello" || !(hello["params"]?["framing"] is JArray framings))
+            {
+                return false;
+            }
+            foreach (var framing in framings)
+            {
+                if ((string)framing == LengthPrefixedFraming)
                 {
-                    RhinoApp.WriteLine($"GrasshopperMCPBridge error handling client: {ex.Message}");
-                    
-                    // 發送錯誤響應
-                    Response errorResponse = Response.CreateError($"Server error: {ex.Message}");
-                    string errorResponseJson = JsonConvert.SerializeObject(errorResponse);
-                    await writer.WriteLineAsync(errorResponseJson);
+                    var result = new JObject { ["framing"] = LengthPrefixedFraming };
+                    if (hello["params"]["compression"] is JArray codecs && codecs.Any(codec => (string)codec == ZlibCompression))
+                    {
+                        result["compression"] = ZlibCompression;
+                        compressionThreshold = (int?)hello["params"]["compressionThreshold"] ?? 64 * 1024;
+                    }
+                    reply = JsonConvert.SerializeObject(new JObject
+                    {
+                        ["jsonrpc"] = "2.0",
+                        ["id"] = hello["id"],
+                        ["result"] = result
+                    });
+                    return true;
                 }
             }
+            return false;
+        }
+
+        /// <summary>
+        /// 讀取一個長度前綴幀（4 字節大端長度 + UTF-8 JSON，已協商壓縮時可能是 zlib 壓縮的），連接關閉時返回 null
+        /// </summary>
+        private static async Task<string> ReadFrameAsync(Stream stream, bool compression)
+        {
+            var header = new byte[4];
+            if (!await ReadExactlyAsync(stream, header, header.Length))
+            {
+                return null;
+            }
+            int length = (header[0] << 24) | (header[1] << 16) | (header[2] << 8) | header[3];
+            bool compressed = (length & CompressedFlag) != 0;
+            length &= ~CompressedFlag;
+            if (compressed && !compression)
+            {
+                throw new IOException("Compressed frame without negotiated compression");
+            }
+            var payload = new byte[length];
+            if (!await ReadExactlyAsync(stream, payload, length))
+            {
+                return null;
+            }
+            return Encoding.UTF8.GetString(compressed ? ZlibDecompress(payload) : payload);
+        }
+
+        /// <summary>
+        /// 以 zlib 格式（RFC 1950）壓縮：2 字節頭、deflate 數據、Adler-32 校驗
+        /// </summary>
+        private static byte[] ZlibCompress(byte[] data, int count)
+        {
+            using (var output = new MemoryStream())
+            {
+                output.WriteByte(0x78);
+                output.WriteByte(0x01);
+                using (var deflate = new DeflateStream(output, CompressionLevel.Fastest, true))
+                {
+                    deflate.Write(data, 0, count);
+                }
+                uint a = 1, b = 0;
+                for (int i = 0; i < count; i++)
+                {
+                    a = (a + data[i]) % 65521;
+                    b = (b + a) % 65521;
+                }
+                uint adler = (b << 16) | a;
+                output.WriteByte((byte)(adler >> 24));
+                output.WriteByte((byte)(adler >> 16));
+                output.WriteByte((byte)(adler >> 8));
+                output.WriteByte((byte)adler);
+                return output.ToArray();
+            }
+        }
+
+        /// <summary>
+        /// 解壓 zlib 格式的數據（跳過 2 字節頭，deflate 數據結束後的校驗不再讀取）
+        /// </summary>
+        private static byte[] ZlibDecompress(byte[] data)
+        {
+            using (var input = new MemoryStream(data, 2, data.Length - 2))
+            using (var deflate = new DeflateStream(input, CompressionMode.Decompress))
+            using (var output = new MemoryStream())
+            {
+                deflate.CopyTo(output);
+                return output.ToArray();
+            }
+        }
+
+        private static async Task<bool> ReadExactlyAsync(Stream stream, byte[] buffer, int count)
+        {
+            int read = 0;
+            while (read < count)
+            {
+                int n = await stream.ReadAsync(buffer, read, count - read);
+                if (n == 0)
+                {
+                    return false;
+                }
+                read += n;
+            }
+            return true;
+        }
+
+        /// <summary>
+        /// 按當前分幀方式發送一條消息；已協商壓縮時，達到閾值的消息以 zlib 壓縮
+        /// </summary>
+        private static async Task WriteMessageAsync(Stream stream, StreamWriter writer, bool framed, int compressionThreshold, string json)
+        {
+            if (!framed)
+            {
+                await writer.WriteLineAsync(json);
+                return;
+            }
+            int length = Encoding.UTF8.GetByteCount(json);
+            byte[] frame;
+            int header = length;
+            if (compressionThreshold >= 0 && length >= compressionThreshold)
+            {
+                byte[] compressed = ZlibCompress(Encoding.UTF8.GetBytes(json), length);
+                frame = new byte[4 + compressed.Length];
+                Buffer.BlockCopy(compressed, 0, frame, 4, compressed.Length);
+                header = compressed.Length | CompressedFlag;
+            }
+            else
+            {
+                frame = new byte[4 + length];
+                Encoding.UTF8.GetBytes(json, 0, json.Length, frame, 4);
+            }
+            // 長度頭和內容寫入同一個緩衝區，一次發送
+            frame[0] = (byte)(header >> 24);
+            frame[1] = (byte)(header >> 16);
+            frame[2] = (byte)(header >> 8);
+            frame[3] = (byte)header;
+            await stream.WriteAsync(frame, 0, frame.Length);
         }
     }
 }
@@ -0,0 +1,61 @@
+"""
+Measure wire messages and latency of get_all_components on slider-heavy canvases.
+
+Runs the enriched get_all_components tool against a fake listener with and
+without JSON-RPC batch support.
+
+Usage:
+    python benchmarks/bench_batch.py [--sliders N ...]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+
+
+def make_listener(sliders: int, supports_batch: bool) -> FakeGrasshopperListener:
+    listener = FakeGrasshopperListener(supports_batch=supports_batch)
+    components = [{"id": f"s{i}", "type": "Number Slider", "x": i, "y": 0} for i in range(sliders)]
+    listener.register("get_all_components", lambda params: components)
+    listener.register("get_connections", lambda params: [])
+    listener.register(
+        "get_component_info",
+        lambda params: {"id": params["componentId"], "type": "Number Slider", "min": 0, "max": 1, "value": 0.5},
+    )
+    return listener
+
+
+def run(sliders: int, supports_batch: bool):
+    with make_listener(sliders, supports_batch) as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        bridge._canvas_cache.invalidate()
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(bridge.get_all_components())
+        elapsed = time.perf_counter() - start
+        return listener.messages_received, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sliders", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'sliders':>8} {'mode':>10} {'messages':>9} {'ms':>9}")
+    for sliders in args.sliders:
+        for supports_batch, mode in ((True, "batch"), (False, "pipelined")):
+            messages, elapsed = run(sliders, supports_batch)
+            print(f"{sliders:>8} {mode:>10} {messages:>9} {elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare building a graph with per-call tools against build_definition.
+
+Builds a chain of Number Slider -> Addition components, once with one
+add_component / set_component_value / connect_components call per element and
+once with a single build_definition call, against a fake listener that adds a
+fixed delay per wire message.
+
+Usage:
+    python benchmarks/bench_build_definition.py [--components N ...] [--latency MS]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+
+
+def make_spec(size: int):
+    components, connections = [], []
+    for i in range(size):
+        components.append({"alias": f"s{i}", "type": "Number Slider", "x": 0, "y": i * 40, "value": 1})
+        components.append({"alias": f"a{i}", "type": "Addition", "x": 200, "y": i * 40})
+        connections.append({"source": f"s{i}", "target": f"a{i}"})
+        if i:
+            connections.append({"source": f"a{i - 1}", "target": f"a{i}"})
+    return components, connections
+
+
+async def build_per_call(components, connections):
+    ids = {}
+    for spec in components:
+        added = await bridge.add_component(spec["type"], spec["x"], spec["y"])
+        ids[spec["alias"]] = added["result"]["id"]
+        if spec.get("value") is not None:
+            await bridge.set_component_value(ids[spec["alias"]], str(spec["value"]))
+    for connection in connections:
+        await bridge.connect_components(ids[connection["source"]], ids[connection["target"]])
+
+
+async def build_batched(components, connections):
+    result = await bridge.build_definition(components, connections)
+    assert result["success"], result["errors"]
+
+
+def run(size: int, latency: float, builder):
+    components, connections = make_spec(size)
+    with FakeGrasshopperListener(concurrent=True, message_latency=latency) as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(builder(components, connections))
+        elapsed = time.perf_counter() - start
+        return listener.messages_received, len(listener.canvas.connections), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--latency", type=float, default=2.0, help="Per-message listener latency in ms")
+    args = parser.parse_args()
+
+    print(f"{'chains':>7} {'mode':>16} {'messages':>9} {'connections':>12} {'ms':>9}")
+    for size in args.components:
+        for builder, mode in ((build_per_call, "per-call"), (build_batched, "build_definition")):
+            messages, connected, elapsed = run(size, args.latency / 1000, builder)
+            print(f"{size:>7} {mode:>16} {messages:>9} {connected:>12} {elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
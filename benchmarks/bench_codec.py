@@ -0,0 +1,94 @@
+"""
+Measure the cost of encoding and decoding listener messages.
+
+Typical replies of the listener (FakeCanvas) are encoded and decoded by every
+available serializer, without any socket, so only the serialization is
+measured:
+
+* canvas: get_all_components and get_connections of a --components canvas,
+* geometry: one get_geometry page of --items meshes as binary arrays, and of
+  --items points as text.
+
+Serializers:
+
+* before: ``json.dumps(...) + "\\n"`` to encode and
+  ``json.loads(line.decode("utf-8-sig").strip())`` to decode, as the
+  transports used to,
+* json: the json module straight from bytes (the fallback without orjson),
+* orjson: the default JSON serializer when orjson is installed,
+* msgpack: the negotiated MessagePack format, when msgpack is installed.
+
+Usage:
+    python benchmarks/bench_codec.py [--components N] [--items N] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp.fake_listener import FakeCanvas
+from grasshopper_mcp.serialization import FORMAT_MSGPACK, JSON, SERIALIZERS, STDLIB_JSON
+
+
+def make_payloads(components: int, items: int):
+    canvas = FakeCanvas()
+    canvas.populate(components, seed=1)
+    mesh = canvas.add_component({"type": "Extrude"})["id"]
+    canvas.fill_geometry(mesh, items, branch_size=items)
+    points = canvas.add_component({"type": "Construct Point"})["id"]
+    canvas.fill_geometry(points, items, branch_size=items)
+
+    def reply(result):
+        return {"jsonrpc": "2.0", "id": "1", "result": {"success": True, "result": result}}
+
+    return {
+        "canvas: components": reply(canvas.get_all_components({})),
+        "canvas: connections": reply(canvas.get_connections({})),
+        "meshes: binary": reply(canvas.get_geometry({"id": mesh, "encoding": "binary"})),
+        "points: text": reply(canvas.get_geometry({"id": points})),
+    }
+
+
+def serializers():
+    yield "before", lambda value: (json.dumps(value) + "\n").encode("utf-8"), lambda data: json.loads(data.decode("utf-8-sig").strip())
+    yield "json", STDLIB_JSON.dumps, STDLIB_JSON.loads
+    if JSON is not STDLIB_JSON:
+        yield JSON.backend, JSON.dumps, JSON.loads
+    if FORMAT_MSGPACK in SERIALIZERS:
+        yield "msgpack", SERIALIZERS[FORMAT_MSGPACK].dumps, SERIALIZERS[FORMAT_MSGPACK].loads
+
+
+def best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=2000, help="items of the geometry pages")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.components, args.items)
+    print(f"components={args.components} items={args.items}")
+    print(f"{'payload':>20} {'serializer':>10} {'KiB':>9} {'encode ms':>10} {'decode ms':>10}")
+    for name, payload in payloads.items():
+        for serializer, dumps, loads in serializers():
+            data = dumps(payload)
+            assert loads(data) == payload
+            encode = best(lambda: dumps(payload), args.repeat)
+            decode = best(lambda: loads(data), args.repeat)
+            print(f"{name:>20} {serializer:>10} {len(data) / 1024:9.1f} {encode * 1000:10.2f} {decode * 1000:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
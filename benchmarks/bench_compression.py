@@ -0,0 +1,94 @@
+"""
+Measure the size and latency trade-off of compressing large replies.
+
+A fake listener serves typical large payloads, computed once so that only
+their encoding, compression, transfer and decoding are measured:
+
+* canvas: get_all_components and get_connections of a --components canvas
+  (FakeCanvas.populate),
+* geometry: one get_geometry page of --items synthetic meshes as binary
+  arrays, and of --items points as text.
+
+Each payload is fetched with AsyncTransport on a length-prefixed connection
+without compression and with every available codec (zlib, and zstd when the
+zstandard package is installed), over the loopback interface and over links
+limited to --bandwidth Mbit/s. The listener compresses replies of at least
+--threshold bytes.
+
+Usage:
+    python benchmarks/bench_compression.py [--components N] [--items N] [--bandwidth MBIT ...]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp.fake_listener import FakeCanvas, FakeGrasshopperListener
+from grasshopper_mcp.transport import CODECS, COMPRESSION_NONE, COMPRESSION_THRESHOLD, AsyncTransport
+
+
+def make_payloads(components: int, items: int):
+    canvas = FakeCanvas()
+    canvas.populate(components, seed=1)
+    mesh = canvas.add_component({"type": "Extrude"})["id"]
+    canvas.fill_geometry(mesh, items, branch_size=items)
+    points = canvas.add_component({"type": "Construct Point"})["id"]
+    canvas.fill_geometry(points, items, branch_size=items)
+    return {
+        "canvas: components": canvas.get_all_components({}),
+        "canvas: connections": canvas.get_connections({}),
+        "meshes: binary": canvas.get_geometry({"id": mesh, "encoding": "binary"}),
+        "points: text": canvas.get_geometry({"id": points}),
+    }
+
+
+async def fetch(address, compression: str, threshold: int, method: str, calls: int):
+    received = []
+    transport = AsyncTransport(
+        *address, timeout=120, framing="length-prefixed", compression=compression,
+        compression_threshold=threshold, observer=lambda sent, size: received.append(size),
+    )
+    try:
+        request = {"jsonrpc": "2.0", "id": "0", "method": method, "params": {}}
+        # The first request opens the connection
+        await transport.request(request)
+        start = time.perf_counter()
+        for call in range(calls):
+            response = await transport.request(dict(request, id=str(call + 1)))
+            assert "result" in response, response
+        return received[-1], (time.perf_counter() - start) / calls
+    finally:
+        await transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=2000, help="mesh items of the geometry page")
+    parser.add_argument("--bandwidth", type=float, nargs="+", default=[1000, 100], help="link speeds in Mbit/s")
+    parser.add_argument("--threshold", type=int, default=COMPRESSION_THRESHOLD)
+    parser.add_argument("--calls", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.components, args.items)
+    modes = [COMPRESSION_NONE] + list(CODECS)
+    print(f"components={args.components} items={args.items} threshold={args.threshold}")
+    print(f"{'payload':>20} {'link':>10} {'codec':>6} {'KiB':>9} {'ratio':>6} {'ms':>9}")
+    for bandwidth in [None] + args.bandwidth:
+        link = "loopback" if bandwidth is None else f"{bandwidth:g} Mbit"
+        with FakeGrasshopperListener(bandwidth=bandwidth and bandwidth * 1e6 / 8) as listener:
+            for name, payload in payloads.items():
+                listener.register(name, lambda params, payload=payload: payload)
+                plain = None
+                for mode in modes:
+                    size, elapsed = asyncio.run(fetch(listener.address, mode, args.threshold, name, args.calls))
+                    plain = plain or size
+                    print(f"{name:>20} {link:>10} {mode:>6} {size / 1024:9.1f} {plain / size:6.2f} {elapsed * 1000:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure loopback throughput of large replies for each message framing.
+
+A fake listener answers a "blob" command with a string of the requested size.
+The reply is received with:
+
+* concat: the original loop (4 KB recv, bytes concatenation, endswith check);
+  only run up to --concat-limit MB because its copying grows quadratically
+* newline: PooledTransport with newline-delimited JSON
+* framed: PooledTransport with length-prefixed frames read by recv_into
+* async-framed: AsyncTransport with length-prefixed frames
+
+Usage:
+    python benchmarks/bench_framing.py [--sizes MB ...] [--concat-limit MB]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.transport import AsyncTransport, PooledTransport
+
+REQUEST = {"jsonrpc": "2.0", "id": "1", "method": "blob", "params": {}}
+
+
+def receive_concat(address):
+    client = socket.create_connection(address, timeout=60)
+    try:
+        client.sendall((json.dumps(REQUEST) + "\n").encode("utf-8"))
+        response_data = b""
+        while True:
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            response_data += chunk
+            if response_data.endswith(b"\n"):
+                break
+        return json.loads(response_data.decode("utf-8-sig"))
+    finally:
+        client.close()
+
+
+def receive_pooled(address, framing):
+    transport = PooledTransport(*address, timeout=60, framing=framing)
+    try:
+        return transport.request(REQUEST)
+    finally:
+        transport.close()
+
+
+def receive_async(address):
+    async def run():
+        transport = AsyncTransport(*address, timeout=60, framing="length-prefixed")
+        try:
+            return await transport.request(REQUEST)
+        finally:
+            await transport.close()
+    return asyncio.run(run())
+
+
+MODES = {
+    "concat": receive_concat,
+    "newline": lambda address: receive_pooled(address, "newline"),
+    "framed": lambda address: receive_pooled(address, "length-prefixed"),
+    "async-framed": receive_async,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="Payload sizes in MB")
+    parser.add_argument("--concat-limit", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'MB':>5} {'mode':>13} {'ms':>9} {'MB/s':>9}")
+    for size in args.sizes:
+        payload = "x" * (size * 1024 * 1024)
+        with FakeGrasshopperListener() as listener:
+            listener.register("blob", lambda params: payload)
+            for mode, receive in MODES.items():
+                if mode == "concat" and size > args.concat_limit:
+                    print(f"{size:>5} {mode:>13} {'-':>9} {'-':>9}")
+                    continue
+                start = time.perf_counter()
+                response = receive(listener.address)
+                elapsed = time.perf_counter() - start
+                assert len(response["result"]["result"]) == len(payload)
+                print(f"{size:>5} {mode:>13} {elapsed * 1000:>9.1f} {size / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
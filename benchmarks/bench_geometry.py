@@ -0,0 +1,81 @@
+"""
+Compare fetching geometry in one reply against streaming it page by page.
+
+A fake listener serves a component whose output holds N items of a fixed size
+(a stand-in for stringified meshes). The single-reply mode asks for every item
+at once, like get_geometry did before paging; the streaming mode walks
+iter_geometry. Peak memory is measured with tracemalloc and includes the
+in-process listener.
+
+Usage:
+    python benchmarks/bench_geometry.py [--items N ...] [--item-size BYTES]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+
+# Measure the listener round trips, not the memo of results (see bench_memo.py)
+bridge.SOLUTION_CACHE_PATH = None
+
+
+async def fetch_single(component_id):
+    start = time.perf_counter()
+    response = await bridge.send_to_grasshopper_async("get_geometry", {"id": component_id})
+    first = time.perf_counter() - start
+    return response["result"]["count"], first
+
+
+async def fetch_streaming(component_id):
+    start = time.perf_counter()
+    first = None
+    items = 0
+    async for page in bridge.iter_geometry(component_id):
+        if first is None:
+            first = time.perf_counter() - start
+        items += page["count"]
+    return items, first
+
+
+def run(items: int, item_size: int, fetch):
+    with FakeGrasshopperListener() as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        component = listener.canvas.add_component({"type": "Mesh"})
+        data = ["v" * item_size for _ in range(items)]
+        listener.canvas.geometry[component["id"]] = [{"name": "Mesh", "branches": [{"path": "{0}", "data": data}]}]
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            received, first = asyncio.run(fetch(component["id"]))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert received == items, received
+        return first, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--item-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'items':>7} {'mode':>10} {'first ms':>9} {'total ms':>9} {'peak MB':>8}")
+    for items in args.items:
+        for fetch, mode in ((fetch_single, "single"), (fetch_streaming, "streaming")):
+            first, elapsed, peak = run(items, args.item_size, fetch)
+            print(f"{items:>7} {mode:>10} {first * 1000:>9.1f} {elapsed * 1000:>9.1f} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
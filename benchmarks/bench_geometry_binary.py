@@ -0,0 +1,78 @@
+"""
+Compare text and binary geometry encodings for point clouds and meshes.
+
+A fake listener serves a component with either N point items or one mesh of N
+vertices. Each mode pages through the output with iter_geometry and summarizes it
+(counts, bounding box, centroid) with GeometrySummary, which parses text
+points or decodes binary arrays with NumPy.
+
+Usage:
+    python benchmarks/bench_geometry_binary.py [--points N ...]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.geometry import GeometrySummary
+
+# Measure the listener round trips, not the memo of results (see bench_memo.py)
+bridge.SOLUTION_CACHE_PATH = None
+
+
+def make_outputs(kind: str, points: int):
+    rng = random.Random(0)
+    vertices = [[rng.uniform(-100, 100) for _ in range(3)] for _ in range(points)]
+    if kind == "points":
+        items = [{"type": "point", "vertices": [v]} for v in vertices]
+    else:
+        items = [{"type": "mesh", "vertices": vertices, "faces": [[i, i + 1, i + 2, i + 2] for i in range(points - 2)]}]
+    return [{"name": kind, "branches": [{"path": "{0}", "data": items}]}]
+
+
+async def summarize(component_id, encoding):
+    summary = GeometrySummary()
+    payload = 0
+    async for page in bridge.iter_geometry(component_id, encoding=encoding):
+        payload += len(json.dumps(page))
+        summary.add_page(page)
+    return summary, payload
+
+
+def run(kind: str, points: int, encoding: str):
+    with FakeGrasshopperListener() as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        component = listener.canvas.add_component({"type": "Mesh"})
+        listener.canvas.geometry[component["id"]] = make_outputs(kind, points)
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            summary, payload = asyncio.run(summarize(component["id"], encoding))
+        return summary.vertex_count, payload, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    # Text mesh items carry no vertices, so only the binary summary sees them
+    print(f"{'kind':>7} {'points':>7} {'encoding':>9} {'vertices':>9} {'payload KB':>11} {'ms':>9}")
+    for kind in ("points", "mesh"):
+        for points in args.points:
+            for encoding in ("text", "binary"):
+                vertices, payload, elapsed = run(kind, points, encoding)
+                print(f"{kind:>7} {points:>7} {encoding:>9} {vertices:>9} {payload / 1000:>11.1f} {elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
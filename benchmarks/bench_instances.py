@@ -0,0 +1,93 @@
+"""
+Measure sharding work over several Grasshopper instances.
+
+Starts --instances fake listeners, each taking a fixed time to load a document,
+run the preview and compute geometry (stand-ins for Grasshopper solving the
+definition), and runs the same work with one instance and with all of them:
+
+* evaluate_documents over --documents evaluations of a saved document,
+* run_sweep over --samples slider values of one document.
+
+Usage:
+    python benchmarks/bench_instances.py [--instances N] [--documents N] [--samples N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeCanvas, FakeGrasshopperListener
+
+METHOD_LATENCY = {"load_document": 0.05, "execute_preview": 0.01, "get_geometry": 0.005}
+
+
+def make_document(directory: str, name: str, items: int):
+    canvas = FakeCanvas()
+    slider = canvas.add_component({"type": "Number Slider"})["id"]
+    output = canvas.add_component({"type": "Extrude"})["id"]
+    canvas.fill_geometry(output, items)
+    path = os.path.join(directory, name)
+    canvas.save_document({"path": path})
+    return path, slider, output
+
+
+async def evaluate(paths, outputs, instances: int) -> None:
+    response = await bridge.evaluate_documents(paths, outputs, instances=instances)
+    assert response["success"], response
+
+
+async def sweep(path, slider, output, samples: int, instances: int, directory: str) -> None:
+    spec = [{"id": slider, "min": 0, "max": 1, "steps": samples}]
+    started = await bridge.run_sweep(
+        spec, [output], path=os.path.join(directory, f"sweep-{instances}.npz"), document=path, instances=instances
+    )
+    assert started["success"], started
+    job = bridge._sweeps[started["result"]["id"]]
+    await job.wait()
+    assert job.status()["state"] == "completed" and not job.status()["failed"], job.status()
+
+
+def timed(coroutine) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        asyncio.run(coroutine)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=64)
+    args = parser.parse_args()
+
+    listeners = [FakeGrasshopperListener(method_latency=METHOD_LATENCY).start() for _ in range(args.instances)]
+    try:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listeners[0].address
+        bridge.GRASSHOPPER_INSTANCES = ",".join(f"{host}:{port}" for host, port in (l.address for l in listeners))
+        with tempfile.TemporaryDirectory() as directory:
+            path, slider, output = make_document(directory, "document.gh", 20)
+            # The same file every time, so that every evaluation has the same output id
+            paths = [path] * args.documents
+            print(f"instances={args.instances} documents={args.documents} samples={args.samples}")
+            for count in sorted({1, args.instances}):
+                elapsed = timed(evaluate(paths, [output], count))
+                print(f"evaluate_documents x{count}: {elapsed * 1000:9.1f} ms  {args.documents / elapsed:7.1f} documents/s")
+            for count in sorted({1, args.instances}):
+                elapsed = timed(sweep(path, slider, output, args.samples, count, directory))
+                print(f"run_sweep          x{count}: {elapsed * 1000:9.1f} ms  {args.samples / elapsed:7.1f} samples/s")
+    finally:
+        for listener in listeners:
+            listener.stop()
+
+
+if __name__ == "__main__":
+    main()
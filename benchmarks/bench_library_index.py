@@ -0,0 +1,75 @@
+"""
+Compare linear library scans with ComponentIndex lookups.
+
+Builds a synthetic component library and canvas and times the metadata
+enrichment that get_all_components performs for every component.
+
+Usage:
+    python benchmarks/bench_library_index.py [--library N] [--canvas N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp.knowledge import ComponentIndex
+
+
+def make_library(size: int):
+    categories = []
+    for c in range(20):
+        components = []
+        for i in range(c, size, 20):
+            components.append({
+                "name": f"Component {i}",
+                "fullName": f"Synthetic Component {i}",
+                "inputs": [{"name": "A", "type": "Number"}],
+                "outputs": [{"name": "R", "type": "Number"}],
+            })
+        categories.append({"name": f"Category {c}", "components": components})
+    return {"categories": categories}
+
+
+def linear_lookup(library, component_type):
+    for category in library["categories"]:
+        for lib_component in category["components"]:
+            if lib_component.get("name") == component_type or lib_component.get("fullName") == component_type:
+                return lib_component
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--library", type=int, default=5000)
+    parser.add_argument("--canvas", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    library = make_library(args.library)
+    canvas = [f"Component {rng.randrange(args.library)}" for _ in range(args.canvas)]
+
+    start = time.perf_counter()
+    linear = [linear_lookup(library, t) for t in canvas]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = ComponentIndex(library)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.lookup(t) for t in canvas]
+    index_time = time.perf_counter() - start
+
+    assert linear == indexed
+    print(f"library={args.library} canvas={args.canvas}")
+    print(f"linear scan:  {linear_time * 1000:10.2f} ms")
+    print(f"index build:  {build_time * 1000:10.2f} ms (once)")
+    print(f"index lookup: {index_time * 1000:10.2f} ms ({linear_time / index_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
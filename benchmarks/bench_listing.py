@@ -0,0 +1,89 @@
+"""
+Measure the size of canvas listings with projection, filters and pagination.
+
+Lists a synthetic canvas of --components components (FakeCanvas.populate)
+through get_all_components and grasshopper://status and prints the size of
+the JSON reply and the time per call. The canvas cache is warm, so the numbers
+are the bridge's own work and the payload handed to the client:
+
+* per component: library metadata repeated with every component, as listings
+  used to return it,
+* library per type: the default listing,
+* the same with fields, with a type filter and one page of --limit components,
+* the status summary, and one component and one type read from their own
+  resources (grasshopper://component/{id}, grasshopper://type/{name}).
+
+Usage:
+    python benchmarks/bench_listing.py [--components N] [--limit N] [--calls N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.listing import LIBRARY_FIELDS
+
+
+async def per_component():
+    # Listing with the library metadata repeated in every component
+    response = await bridge.get_all_components()
+    library = response.pop("library", {})
+    for component in response["result"]:
+        component.update(library.get(component.get("type"), {}))
+    return response
+
+
+def scenarios(limit: int, slider: str):
+    return [
+        ("per component", per_component),
+        ("library per type", lambda: bridge.get_all_components()),
+        ("fields id,type,x,y", lambda: bridge.get_all_components(fields=["id", "type", "x", "y"])),
+        ("types Number Slider", lambda: bridge.get_all_components(types=["Number Slider"], exclude=list(LIBRARY_FIELDS))),
+        (f"limit {limit}", lambda: bridge.get_all_components(limit=limit)),
+        ("status summary", lambda: bridge.get_grasshopper_status()),
+        ("status all", lambda: bridge.get_grasshopper_status_query("all")),
+        ("status fields id,type", lambda: bridge.get_grasshopper_status_query("fields=id,type")),
+        (f"status limit {limit}", lambda: bridge.get_grasshopper_status_query(f"limit={limit}")),
+        ("component resource", lambda: bridge.get_component_resource(slider)),
+        ("type resource", lambda: bridge.get_type_resource("Number%20Slider")),
+    ]
+
+
+async def measure(call, calls: int):
+    response = await call()
+    start = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    return len(json.dumps(response)), (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=10)
+    args = parser.parse_args()
+
+    with FakeGrasshopperListener() as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        ids = listener.canvas.populate(args.components, seed=1)
+        slider = next(component_id for component_id in ids if listener.canvas.components[component_id]["type"] == "Number Slider")
+        bridge._canvas_cache.invalidate()
+        print(f"components={args.components}")
+        for name, call in scenarios(args.limit, slider):
+            with contextlib.redirect_stderr(io.StringIO()):
+                size, elapsed = asyncio.run(measure(call, args.calls))
+            print(f"{name:>22}: {size / 1024:9.1f} KiB  {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
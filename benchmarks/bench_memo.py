@@ -0,0 +1,85 @@
+"""
+Measure the memo of results (SolutionCache).
+
+A fake listener serves a mesh component and takes --solve milliseconds for
+every get_geometry, standing in for Grasshopper solving the definition. Three
+modes read every page of the component:
+
+* off:  memo disabled, every page is fetched from the listener,
+* cold: memo enabled and empty, pages are fetched and stored,
+* warm: the same document state again, pages are served from the memo
+  after one listing of the document.
+
+The last lines run the same 16-sample sweep twice: the second run is served
+from the memo after one listing of the document.
+
+Usage:
+    python benchmarks/bench_memo.py [--items N] [--solve MS]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+
+
+async def read_pages(component_id: str) -> int:
+    items = 0
+    async for page in bridge.iter_geometry(component_id, encoding="binary"):
+        items += page["count"]
+    return items
+
+
+async def sweep(slider: str, output: str, path: str):
+    spec = [{"id": slider, "min": 0, "max": 1, "steps": 16}]
+    started = await bridge.run_sweep(spec, [output], path=path)
+    job = bridge._sweeps[started["result"]["id"]]
+    await job.wait()
+    return job.status()
+
+
+def timed(coroutine):
+    round_trips = bridge._metrics.round_trips
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        result = asyncio.run(coroutine)
+    return result, time.perf_counter() - start, bridge._metrics.round_trips - round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=2000, help="mesh items of the component")
+    parser.add_argument("--solve", type=float, default=20.0, help="listener time per get_geometry in ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with FakeGrasshopperListener(method_latency={"get_geometry": args.solve / 1000}) as listener:
+            bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+            slider = listener.canvas.add_component({"type": "Number Slider"})["id"]
+            output = listener.canvas.add_component({"type": "Extrude"})["id"]
+            listener.canvas.fill_geometry(output, args.items)
+
+            print(f"items={args.items} solve={args.solve} ms")
+            for mode in ("off", "cold", "warm"):
+                bridge.SOLUTION_CACHE_PATH = None if mode == "off" else os.path.join(directory, "solutions.sqlite3")
+                items, elapsed, round_trips = timed(read_pages(output))
+                assert items == args.items, items
+                print(f"get_geometry {mode:>4}: {elapsed * 1000:8.1f} ms  {round_trips:3d} round trips")
+            for run in ("cold", "warm"):
+                status, elapsed, round_trips = timed(sweep(slider, output, os.path.join(directory, f"sweep-{run}.npz")))
+                assert status["state"] == "completed", status
+                print(f"run_sweep    {run:>4}: {elapsed * 1000:8.1f} ms  {round_trips:3d} round trips  {status['recalled']} samples recalled")
+            bridge.SOLUTION_CACHE_PATH = None
+
+
+if __name__ == "__main__":
+    main()
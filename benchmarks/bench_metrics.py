@@ -0,0 +1,74 @@
+"""
+Measure the cost of payload logging and of the metrics instrumentation.
+
+A fake listener answers an "echo"-style command with a payload of a given
+size. Each request is sent through send_to_grasshopper_async with the bridge
+logger at DEBUG (every request and response formatted in full, as the bridge
+used to print them) and at INFO (the default: payloads are not formatted).
+Logs go to a null stream, so only the formatting cost is measured. The last
+line times Metrics.measure plus record_exchange on their own.
+
+Usage:
+    python benchmarks/bench_metrics.py [--requests N] [--payload BYTES ...]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.metrics import Metrics
+
+
+async def send_many(requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await bridge.send_to_grasshopper_async("payload")
+        assert response["success"], response
+    return time.perf_counter() - start
+
+
+def run(requests: int, payload: int, level: int) -> float:
+    with FakeGrasshopperListener() as listener:
+        listener.register("payload", lambda params: {"data": "x" * payload})
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        bridge.logger.setLevel(level)
+        return asyncio.run(send_many(requests))
+
+
+def instrumentation_cost(iterations: int) -> float:
+    metrics = Metrics()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.measure("tools", "tool"):
+            with metrics.measure("requests", "method"):
+                metrics.record_exchange(100, 1000)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--payload", type=int, nargs="+", default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    bridge.logger.addHandler(handler)
+    bridge.logger.propagate = False
+
+    print(f"{'payload':>8} {'DEBUG ms/req':>13} {'INFO ms/req':>12}")
+    for payload in args.payload:
+        debug = run(args.requests, payload, logging.DEBUG) / args.requests
+        info = run(args.requests, payload, logging.INFO) / args.requests
+        print(f"{payload:>8} {debug * 1000:>13.3f} {info * 1000:>12.3f}  ({debug / info:.1f}x)")
+    print(f"instrumentation: {instrumentation_cost(100000) * 1e6:.2f} us per tool call with one request")
+
+
+if __name__ == "__main__":
+    main()
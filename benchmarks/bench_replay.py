@@ -0,0 +1,123 @@
+"""
+Estimate how many agent sessions one listener can serve by replaying a trace.
+
+Records a synthetic agent session through the bridge (GRASSHOPPER_MCP_TRACE)
+against a fake listener whose commands take METHOD_LATENCY seconds: the agent
+lists the canvas, inspects components, builds and wires a few components, sets
+sliders and reads geometry, thinking --think milliseconds between tool calls.
+The trace is then replayed with 1 to --sessions concurrent sessions at --speed
+against a fresh fake that runs commands one at a time like the Rhino UI thread,
+with the recorded median time per command.
+
+Prints the recording, the recording overhead (the same session without
+tracing) and one line per session count, and the most sessions whose p95
+latency stays within --slo milliseconds.
+
+Usage:
+    python benchmarks/bench_replay.py [--sessions N] [--speed X] [--think MS] [--slo MS]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeCanvas, FakeGrasshopperListener
+from grasshopper_mcp.replay import recorded_latency, replay, stage_canvas
+from grasshopper_mcp.trace import read_trace
+
+METHOD_LATENCY = {
+    "get_all_components": 0.008,
+    "get_connections": 0.004,
+    "get_component_info": 0.002,
+    "add_component": 0.004,
+    "connect_components": 0.003,
+    "set_component_value": 0.015,
+    "get_geometry": 0.02,
+}
+
+
+async def agent_session(canvas_ids, think: float):
+    """A scripted agent: inspect, build, tweak and read back."""
+    await bridge.get_all_components(refresh=True)
+    await bridge.get_connections(refresh=True)
+    for component_id in canvas_ids[:5]:
+        await bridge.get_component_info(component_id)
+        await asyncio.sleep(think)
+    for round_number in range(3):
+        slider = (await bridge.add_component("Number Slider", 0, 100 * round_number))["result"]["id"]
+        point = (await bridge.add_component("Construct Point", 200, 100 * round_number))["result"]["id"]
+        await asyncio.sleep(think)
+        await bridge.connect_components(slider, point)
+        for value in (1, 2, 3):
+            await bridge.set_component_value(slider, str(value))
+            await asyncio.sleep(think)
+            await bridge.get_component_info(point)
+        await bridge.get_geometry(canvas_ids[0])
+        await asyncio.sleep(think)
+        await bridge.get_all_components(refresh=True)
+
+
+def record(path, think: float):
+    canvas = FakeCanvas()
+    ids = canvas.populate(200, seed=1)
+    geometry = canvas.add_component({"type": "Construct Point"})["id"]
+    canvas.fill_geometry(geometry, 100)
+    bridge.TRACE_PATH = path
+    with FakeGrasshopperListener(method_latency=METHOD_LATENCY, ui_thread=True, canvas=canvas) as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(agent_session([geometry] + ids, think))
+        elapsed = time.perf_counter() - start
+    bridge.TRACE_PATH = None
+    bridge._get_trace_recorder()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=16, help="largest number of concurrent sessions")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 1 is real time")
+    parser.add_argument("--think", type=float, default=50.0, help="ms the agent thinks between tool calls")
+    parser.add_argument("--slo", type=float, default=500.0, help="p95 latency budget in ms")
+    args = parser.parse_args()
+
+    bridge.SOLUTION_CACHE_PATH = None
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session.jsonl.gz")
+        traced = record(path, args.think / 1000)
+        untraced = record(None, args.think / 1000)
+        _, records = read_trace(path)
+        print(
+            f"recorded {len(records)} exchanges in {traced:.2f} s, {os.path.getsize(path) / 1024:.1f} KiB "
+            f"(untraced {untraced:.2f} s)"
+        )
+        latency = recorded_latency(records)
+        counts = [count for count in (1, 2, 4, 8, 16, 32, 64) if count <= args.sessions]
+        print(f"{'sessions':>8} {'per s':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        within = []
+        for count in counts:
+            canvas = FakeCanvas()
+            stage_canvas(canvas, records)
+            with FakeGrasshopperListener(method_latency=latency, ui_thread=True, canvas=canvas) as listener:
+                report = asyncio.run(replay(records, *listener.address, sessions=count, speed=args.speed))
+            latency_ms = report["latencyMs"]
+            print(
+                f"{count:8d} {report['perSecond']:8.1f} {report['errors']:6d} {latency_ms['p50']:8.1f} "
+                f"{latency_ms['p95']:8.1f} {latency_ms['p99']:8.1f} {latency_ms['max']:8.1f}"
+            )
+            if latency_ms["p95"] <= args.slo and not report["errors"]:
+                within.append(count)
+        print(f"sessions within p95 <= {args.slo:g} ms: {max(within) if within else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare a linear edit-distance scan with ComponentResolver lookups.
+
+Builds a synthetic library of multi-word component names and resolves exact
+names, misspelled names and partial names, once by scoring every name in the
+library and once through the trigram index. The linear scan is slow, so it
+only runs the first --linear queries of each scenario.
+
+Usage:
+    python benchmarks/bench_resolver.py [--library N] [--queries N] [--linear N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp.knowledge import normalize_name
+from grasshopper_mcp.resolver import ComponentResolver, similarity
+
+WORDS = (
+    "Number Slider Curve Surface Divide Offset Loft Point Vector Plane Mesh Brep Join Split Area Length "
+    "Evaluate Closest Project Rotate Move Scale Mirror Extrude Boundary Populate Voronoi Delaunay Graph "
+    "Mapper Domain Range Series Random List Item Tree Branch Flatten Graft Shift Cull Pattern Dispatch "
+    "Weave Sort Bounds Construct Deconstruct Circle Line Arc Polyline Rectangle Box Sphere Cylinder Cone"
+).split()
+
+
+def make_knowledge_base(size: int, rng: random.Random):
+    names = set()
+    while len(names) < size:
+        names.add(" ".join(rng.sample(WORDS, rng.choice((2, 2, 3)))))
+    components = [{"name": name} for name in sorted(names)]
+    categories = [{"name": f"Category {c}", "components": components[c::20]} for c in range(20)]
+    return {"componentLibrary": {"categories": categories}}
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    position = rng.randrange(1, len(chars) - 1)
+    if rng.random() < 0.5:
+        chars[position], chars[position + 1] = chars[position + 1], chars[position]
+    else:
+        del chars[position]
+    return "".join(chars)
+
+
+def linear_resolve(keys, name):
+    query = normalize_name(name)
+    return max(keys, key=lambda item: similarity(query, item[0]))[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--library", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--linear", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    knowledge_base = make_knowledge_base(args.library, rng)
+    names = [c["name"] for category in knowledge_base["componentLibrary"]["categories"] for c in category["components"]]
+    targets = [rng.choice(names) for _ in range(args.queries)]
+    scenarios = {
+        "exact": targets,
+        "misspelled": [misspell(name, rng) for name in targets],
+        "partial": [name[: max(4, len(name) * 2 // 3)] for name in targets],
+    }
+
+    start = time.perf_counter()
+    resolver = ComponentResolver(knowledge_base)
+    build_time = time.perf_counter() - start
+    keys = [(normalize_name(name), name) for name in names]
+
+    print(f"library={args.library} queries={args.queries}")
+    print(f"index build: {build_time * 1000:10.2f} ms (once)")
+    for scenario, queries in scenarios.items():
+        sample = queries[: args.linear]
+        start = time.perf_counter()
+        linear = [linear_resolve(keys, q) for q in sample]
+        linear_time = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        indexed = [resolver.rank(q, limit=1)[0]["name"] for q in queries]
+        index_time = (time.perf_counter() - start) / len(queries)
+
+        # Partial names are often ambiguous, so "target" is only meaningful for the others
+        agree = sum(a == b for a, b in zip(linear, indexed)) / len(sample)
+        hits = sum(found == target for found, target in zip(indexed, targets)) / len(queries)
+        print(
+            f"{scenario:>10}: linear {linear_time * 1000:8.3f} ms/query  "
+            f"indexed {index_time * 1000:6.3f} ms/query ({linear_time / index_time:.0f}x)  "
+            f"same as linear {agree:.0%}  found target {hits:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Measure interactive latency while bulk work runs on the listener.
+
+A fake listener answers one request at a time, like GH_MCP on the Rhino UI
+thread, and takes --solve milliseconds for every get_geometry. While a sweep of
+--samples samples and a paged read of --items points (get_geometry_summary)
+run, an agent calls get_component_info every --interval milliseconds. Two modes:
+
+* off: no limits and fixed batches of SWEEP_SAMPLES_PER_BATCH samples, so the
+  bulk requests queue up on the listener in front of the interactive ones,
+* on:  the default scheduler (SCHEDULER_LIMITS, SCHEDULER_SLICE_SECONDS).
+
+Prints the get_component_info latency percentiles, the time the bulk work took
+and the scheduler wait times of both classes.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--samples N] [--solve MS] [--items N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.scheduler import BULK, INTERACTIVE
+
+MODES = {
+    "off": ({INTERACTIVE: None, BULK: None}, None),
+    "on": (dict(bridge.SCHEDULER_LIMITS), bridge.SCHEDULER_SLICE_SECONDS),
+}
+
+
+async def agent(component_id: str, interval: float, done: asyncio.Event):
+    latencies = []
+    while not done.is_set():
+        start = time.perf_counter()
+        response = await bridge.get_component_info(component_id)
+        latencies.append(time.perf_counter() - start)
+        assert "result" in response, response
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def bulk(slider: str, output: str, points: str, samples: int, path: str):
+    spec = [{"id": slider, "min": 0, "max": 1, "steps": samples}]
+    started = await bridge.run_sweep(spec, [output], path=path)
+    job = bridge._sweeps[started["result"]["id"]]
+    summary = await bridge.get_geometry_summary(points)
+    assert summary["success"], summary
+    await job.wait()
+    assert job.status()["state"] == "completed", job.status()
+
+
+async def scenario(slider: str, output: str, points: str, args, path: str):
+    done = asyncio.Event()
+    probe = asyncio.ensure_future(agent(slider, args.interval / 1000, done))
+    start = time.perf_counter()
+    try:
+        await bulk(slider, output, points, args.samples, path)
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+    return await probe, elapsed
+
+
+def percentile(values, q: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=64, help="samples of the sweep")
+    parser.add_argument("--solve", type=float, default=20.0, help="listener time per get_geometry in ms")
+    parser.add_argument("--items", type=int, default=20000, help="point items read page by page")
+    parser.add_argument("--interval", type=float, default=50.0, help="ms between two interactive calls")
+    args = parser.parse_args()
+
+    bridge.SOLUTION_CACHE_PATH = None
+    print(f"samples={args.samples} solve={args.solve} ms items={args.items} interval={args.interval} ms")
+    print(f"{'mode':>4} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'bulk s':>7}  wait p95 ms (interactive / bulk)")
+    with tempfile.TemporaryDirectory() as directory:
+        with FakeGrasshopperListener(method_latency={"get_geometry": args.solve / 1000}) as listener:
+            bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+            slider = listener.canvas.add_component({"type": "Number Slider"})["id"]
+            output = listener.canvas.add_component({"type": "Extrude"})["id"]
+            points = listener.canvas.add_component({"type": "Construct Point"})["id"]
+            listener.canvas.fill_geometry(output, 10)
+            listener.canvas.fill_geometry(points, args.items)
+            for mode, (limits, slice_seconds) in MODES.items():
+                bridge.SCHEDULER_LIMITS, bridge.SCHEDULER_SLICE_SECONDS = limits, slice_seconds
+                bridge._metrics.reset()
+                with contextlib.redirect_stderr(io.StringIO()):
+                    latencies, elapsed = asyncio.run(scenario(slider, output, points, args, os.path.join(directory, f"{mode}.npz")))
+                queues = bridge._metrics.snapshot()["queues"].get(f"{bridge.GRASSHOPPER_HOST}:{bridge.GRASSHOPPER_PORT}", {})
+                waits = " / ".join(str(queues.get(name, {}).get("waitMs", {}).get("p95")) for name in (INTERACTIVE, BULK))
+                print(
+                    f"{mode:>4} {len(latencies):6d} {statistics.median(latencies) * 1000:8.1f} "
+                    f"{percentile(latencies, 0.95) * 1000:8.1f} {max(latencies) * 1000:8.1f} {elapsed:7.2f}  {waits}"
+                )
+    bridge.SCHEDULER_LIMITS, bridge.SCHEDULER_SLICE_SECONDS = MODES["on"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Measure time to the first tool response of a freshly started bridge.
+
+Starts ``bridge.main()`` in a subprocess speaking MCP over stdio, against a fake
+listener, and times initialize plus the first get_component_info call (which
+needs the component library index). The knowledge base is the shipped one
+extended with synthetic components, loaded three ways:
+
+* json: no snapshot directory, the JSON is parsed and indexed on first use
+* cold: empty snapshot directory, parsed and indexed, then the snapshot written
+* warm: the compiled snapshot from the previous run is loaded
+
+Usage:
+    python benchmarks/bench_startup.py [--components N] [--runs N]
+"""
+
+import argparse
+import copy
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+
+SERVER = """
+import sys
+sys.path.insert(0, {root!r})
+from grasshopper_mcp import bridge
+bridge.KNOWLEDGE_BASE_PATH = {kb!r}
+bridge.KNOWLEDGE_BASE_SNAPSHOT_DIR = {snapshot_dir!r}
+bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = {host!r}, {port!r}
+bridge.main()
+"""
+
+
+def make_knowledge_base(path: str, extra: int) -> None:
+    with open(bridge.KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    categories = data["componentLibrary"]["categories"]
+    templates = [component for category in categories for component in category["components"]]
+    synthetic = {"name": "Synthetic", "components": []}
+    for i in range(extra):
+        component = copy.deepcopy(templates[i % len(templates)])
+        component["name"] = f"{component['name']} {i}"
+        component.pop("aliases", None)
+        synthetic["components"].append(component)
+    categories.append(synthetic)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def call(process, message):
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+    if "id" not in message:
+        return None
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("bridge exited")
+        reply = json.loads(line)
+        if reply.get("id") == message["id"]:
+            return reply
+
+
+def run(kb: str, snapshot_dir, address, component_id):
+    code = SERVER.format(root=ROOT, kb=kb, snapshot_dir=snapshot_dir, host=address[0], port=address[1])
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        call(process, {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench", "version": "0"}},
+        })
+        initialized = time.perf_counter() - start
+        call(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        reply = call(process, {
+            "jsonrpc": "2.0", "id": 2, "method": "tools/call",
+            "params": {"name": "get_component_info", "arguments": {"component_id": component_id}},
+        })
+        first_tool = time.perf_counter() - start
+        assert "inputDetails" in reply["result"]["content"][0]["text"], reply
+        return initialized, first_tool
+    finally:
+        process.stdin.close()
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, default=20000, help="Synthetic components added to the library")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        kb = os.path.join(workdir, "kb.json")
+        make_knowledge_base(kb, args.components)
+        snapshot_dir = os.path.join(workdir, "snapshots")
+        print(f"knowledge base: {os.path.getsize(kb) / 1e6:.1f} MB")
+        print(f"{'mode':>5} {'initialize ms':>14} {'first tool ms':>14} {'difference ms':>14}")
+        with FakeGrasshopperListener() as listener:
+            component = listener.canvas.add_component({"type": "Number Slider"})
+            for mode in ("json", "cold", "warm"):
+                timings = []
+                for _ in range(args.runs):
+                    if mode == "cold":
+                        shutil.rmtree(snapshot_dir, ignore_errors=True)
+                    timings.append(run(kb, None if mode == "json" else snapshot_dir, listener.address, component["id"]))
+                initialized = statistics.median(t[0] for t in timings)
+                first_tool = statistics.median(t[1] for t in timings)
+                difference = statistics.median(t[1] - t[0] for t in timings)
+                print(f"{mode:>5} {initialized * 1000:>14.1f} {first_tool * 1000:>14.1f} {difference * 1000:>14.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
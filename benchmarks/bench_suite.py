@@ -0,0 +1,204 @@
+"""
+Benchmark the bridge tools against synthetic canvases of increasing size.
+
+Every scenario runs the real tool functions against a FakeGrasshopperListener
+serving a canvas made by FakeCanvas.populate (a quarter of the components are
+Number Sliders, one mesh component holds `size` geometry items). The bridge
+metrics provide the numbers: calls per second, p50/p95 latency, round trips and
+bytes received per call. Reads pass refresh=True (or clear the canvas cache),
+so they measure the listener round trips rather than cache hits.
+
+With --baseline the results are compared against a previous --json run and the
+script exits with status 1 when a scenario regressed:
+
+* round trips per call above the baseline (they do not depend on the machine),
+* bytes received per call more than 10% above the baseline,
+* p95 latency above the baseline times --tolerance plus --slack milliseconds.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes N ...] [--calls N] [--latency MS]
+        [--only SCENARIO ...] [--json PATH] [--baseline PATH] [--tolerance X]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeCanvas, FakeGrasshopperListener
+
+# Measure the listener round trips, not the memo of results (see bench_memo.py)
+bridge.SOLUTION_CACHE_PATH = None
+
+BYTES_TOLERANCE = 1.1
+
+
+class Canvas:
+    """Populated canvas plus the ids the scenarios pick from."""
+
+    def __init__(self, size: int):
+        self.fake = FakeCanvas()
+        self.ids = self.fake.populate(size, seed=size)
+        self.sliders = [i for i in self.ids if self.fake.components[i]["type"] == "Number Slider"]
+        self.mesh = self.fake.add_component({"type": "Extrude", "x": 0, "y": -200})["id"]
+        self.fake.fill_geometry(self.mesh, size, seed=size)
+        self.rng = random.Random(size)
+        self.version = 0
+
+
+async def get_all_components(canvas: Canvas):
+    return await bridge.get_all_components(refresh=True)
+
+
+async def get_connections(canvas: Canvas):
+    return await bridge.get_connections(refresh=True)
+
+
+async def get_component_info(canvas: Canvas):
+    return await bridge.get_component_info(canvas.rng.choice(canvas.sliders))
+
+
+async def set_component_value(canvas: Canvas):
+    return await bridge.set_component_value(canvas.rng.choice(canvas.sliders), str(canvas.rng.uniform(0, 10)))
+
+
+async def add_component(canvas: Canvas):
+    return await bridge.add_component("Addition", canvas.rng.uniform(0, 5000), canvas.rng.uniform(0, 5000))
+
+
+async def connect_components(canvas: Canvas):
+    target = canvas.rng.randrange(1, len(canvas.ids))
+    return await bridge.connect_components(canvas.ids[canvas.rng.randrange(target)], canvas.ids[target])
+
+
+async def get_geometry(canvas: Canvas):
+    total = len(canvas.ids)
+    offset = canvas.rng.randrange(0, total, bridge.GEOMETRY_PAGE_SIZE) if total > bridge.GEOMETRY_PAGE_SIZE else 0
+    return await bridge.get_geometry(canvas.mesh, offset=offset)
+
+
+async def status(canvas: Canvas):
+    # Resources are not instrumented like tools, so measure the call here
+    bridge._canvas_cache.invalidate()
+    with bridge._metrics.measure("tools", "status"):
+        return await bridge.get_grasshopper_status()
+
+
+async def get_canvas_delta(canvas: Canvas):
+    # Poll after every edit, as an agent following the document would
+    await set_component_value(canvas)
+    delta = await bridge.get_canvas_delta(canvas.version)
+    canvas.version = delta["result"]["version"]
+    return delta
+
+
+SCENARIOS = {
+    fn.__name__: fn
+    for fn in (
+        get_all_components,
+        get_connections,
+        get_component_info,
+        set_component_value,
+        add_component,
+        connect_components,
+        get_geometry,
+        status,
+        get_canvas_delta,
+    )
+}
+
+
+async def run_scenario(scenario, canvas: Canvas, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        result = await scenario(canvas)
+        assert result.get("success", True) and "Error" not in str(result.get("status", "")), result
+    return time.perf_counter() - start
+
+
+def run(size: int, names, calls: int, latency: float):
+    results = {}
+    for name in names:
+        # A fresh canvas per scenario, so that writes do not skew later reads
+        canvas = Canvas(size)
+        with FakeGrasshopperListener(concurrent=True, message_latency=latency, canvas=canvas.fake) as listener:
+            bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+            bridge._canvas_cache.invalidate()
+            bridge._metrics.reset()
+            with contextlib.redirect_stderr(io.StringIO()):
+                elapsed = asyncio.run(run_scenario(SCENARIOS[name], canvas, calls))
+            series = bridge._metrics.snapshot()["tools"][name]
+        results[name] = {
+            "callsPerSecond": round(calls / elapsed, 1),
+            "p50Ms": series["latencyMs"]["p50"],
+            "p95Ms": series["latencyMs"]["p95"],
+            "roundTripsPerCall": series["roundTripsPerCall"],
+            "bytesReceivedPerCall": round(series["bytesReceived"] / calls),
+        }
+    return results
+
+
+def regressions(results, baseline, tolerance: float, slack: float):
+    found = []
+    for size, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            label = f"size {size} {name}"
+            if current["roundTripsPerCall"] > previous["roundTripsPerCall"]:
+                found.append(f"{label}: {current['roundTripsPerCall']} round trips per call, baseline {previous['roundTripsPerCall']}")
+            if current["bytesReceivedPerCall"] > previous["bytesReceivedPerCall"] * BYTES_TOLERANCE:
+                found.append(f"{label}: {current['bytesReceivedPerCall']} bytes per call, baseline {previous['bytesReceivedPerCall']}")
+            if current["p95Ms"] > previous["p95Ms"] * tolerance + slack:
+                found.append(f"{label}: p95 {current['p95Ms']} ms, baseline {previous['p95Ms']} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="listener delay per message in ms")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--json", help="write the results to this file (usable as a baseline)")
+    parser.add_argument("--baseline", help="fail when results regressed against this file")
+    parser.add_argument("--tolerance", type=float, default=3.0, help="allowed p95 latency factor over the baseline")
+    parser.add_argument("--slack", type=float, default=5.0, help="allowed p95 latency in ms on top of the factor")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'size':>6} {'scenario':>20} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'trips':>6} {'KB/call':>8}")
+    for size in args.sizes:
+        results[str(size)] = run(size, args.only, args.calls, args.latency / 1000)
+        for name, r in results[str(size)].items():
+            print(
+                f"{size:>6} {name:>20} {r['callsPerSecond']:>9.1f} {r['p50Ms']:>8.2f} {r['p95Ms']:>8.2f} "
+                f"{r['roundTripsPerCall']:>6} {r['bytesReceivedPerCall'] / 1000:>8.1f}"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance, args.slack)
+        for message in found:
+            print(f"REGRESSION {message}")
+        if found:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
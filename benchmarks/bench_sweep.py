@@ -0,0 +1,89 @@
+"""
+Compare an agent-style sweep loop with run_sweep.
+
+The loop does what an agent does for every sample: set_component_value for
+each slider, execute_preview and get_geometry_summary for each output, one
+tool call after another. run_sweep sends the same work as pipelined batches and
+writes the results to an .npz file. The fake listener adds a fixed delay per
+wire message, standing in for the network and UI-thread dispatch.
+
+Usage:
+    python benchmarks/bench_sweep.py [--steps N] [--items N] [--latency MS]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+
+# Measure the listener round trips, not the memo of results (see bench_memo.py)
+bridge.SOLUTION_CACHE_PATH = None
+
+
+def make_canvas(listener, items: int):
+    sliders = [listener.canvas.add_component({"type": "Number Slider"})["id"] for _ in range(2)]
+    outputs = []
+    for component_type in ("Circle", "Extrude"):
+        component_id = listener.canvas.add_component({"type": component_type})["id"]
+        listener.canvas.fill_geometry(component_id, items)
+        outputs.append(component_id)
+    return sliders, outputs
+
+
+async def sweep_per_call(sliders, outputs, steps):
+    for a in range(steps):
+        for b in range(steps):
+            await bridge.set_component_value(sliders[0], str(a))
+            await bridge.set_component_value(sliders[1], str(b))
+            await bridge.execute_preview()
+            for output in outputs:
+                summary = await bridge.get_geometry_summary(output)
+                assert summary["success"], summary
+
+
+async def sweep_batched(sliders, outputs, steps):
+    spec = [{"id": slider, "min": 0, "max": steps - 1, "steps": steps} for slider in sliders]
+    with tempfile.TemporaryDirectory() as directory:
+        started = await bridge.run_sweep(spec, outputs, path=os.path.join(directory, "sweep.npz"))
+        job = bridge._sweeps[started["result"]["id"]]
+        await job.wait()
+        status = job.status()
+        assert status["state"] == "completed" and not status["failed"], status
+
+
+def run(builder, steps: int, items: int, latency: float):
+    with FakeGrasshopperListener(message_latency=latency) as listener:
+        bridge.GRASSHOPPER_HOST, bridge.GRASSHOPPER_PORT = listener.address
+        sliders, outputs = make_canvas(listener, items)
+        bridge._metrics.reset()
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(builder(sliders, outputs, steps))
+        return time.perf_counter() - start, bridge._metrics.round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=8, help="values per slider (two sliders)")
+    parser.add_argument("--items", type=int, default=50, help="geometry items per output")
+    parser.add_argument("--latency", type=float, default=5.0, help="listener delay per message in ms")
+    args = parser.parse_args()
+
+    samples = args.steps ** 2
+    print(f"samples={samples} items={args.items} latency={args.latency} ms")
+    for builder, mode in ((sweep_per_call, "per-call"), (sweep_batched, "run_sweep")):
+        elapsed, round_trips = run(builder, args.steps, args.items, args.latency / 1000)
+        print(f"{mode:>10}: {elapsed * 1000:9.1f} ms  {samples / elapsed:8.1f} samples/s  {round_trips:5d} round trips")
+
+
+if __name__ == "__main__":
+    main()
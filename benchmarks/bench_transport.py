@@ -0,0 +1,46 @@
+"""
+Compare one-shot and pooled transports against a local fake listener.
+
+Usage:
+    python benchmarks/bench_transport.py [--requests N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.transport import OneShotTransport, PooledTransport
+
+
+def run(transport, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        request = {"jsonrpc": "2.0", "id": str(uuid.uuid4()), "method": "echo", "params": {"i": i}}
+        response = transport.request(request)
+        assert response["id"] == request["id"], response
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with FakeGrasshopperListener() as listener:
+        host, port = listener.address
+        oneshot = run(OneShotTransport(host, port), args.requests)
+        pooled = run(PooledTransport(host, port), args.requests)
+
+    print(f"oneshot: {oneshot:10.0f} req/s")
+    print(f"pooled:  {pooled:10.0f} req/s  ({pooled / oneshot:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
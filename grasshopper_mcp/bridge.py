@@ -1,133 +1,637 @@
+import asyncio
+import collections
 import socket
-import json
+import logging
 import os
+import sqlite3
 import sys
-import traceback
-from typing import Dict, Any, Optional, List
+import time
+import urllib.parse
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
 import uuid
 
 # 使用 MCP 服務器
 from mcp.server.fastmcp import FastMCP
 
+from .cache import READ_METHODS, CanvasCache, SolutionState, is_success
+from .definition import AUTO_AB_TYPES, plan_definition
+from .geometry import ENCODINGS, GeometrySummary, is_paged, np, page_outputs, summarize_reply
+from .graph import ConnectionGraph
+from .instances import Instance, InstancePool, parse_endpoints
+from .knowledge import ComponentIndex, KnowledgeBaseStore
+from .listing import (
+    LIBRARY_FIELDS, filter_components, filter_connections, paginate, parse_names, parse_region, projector, wants, wire_key,
+)
+from .memo import SolutionCache, result_key
+from .metrics import Metrics
+from .resolver import ComponentResolver
+from .scheduler import BULK, INTERACTIVE, Scheduler, priority
+from .sweep import SweepJob, SweepResults, plan_samples, validate_sliders
+from .trace import TraceRecorder
+from .transport import AsyncTransport, IncompleteResponseError, create_transport
+
 # 設置 Grasshopper MCP 連接參數
 GRASSHOPPER_HOST = "localhost"
 GRASSHOPPER_PORT = 8080  # 默認端口，可以根據需要修改
+# 傳輸模式："pooled" 重用長連接，"oneshot" 每個請求建立新連接
+GRASSHOPPER_TRANSPORT = "pooled"
+# 消息分幀："auto" 在連接時協商長度前綴分幀並在不支持時回退，"newline" 或 "length-prefixed" 強制使用
+GRASSHOPPER_FRAMING = "auto"
+# 大消息的壓縮（只用於長度前綴分幀的連接）："none" 不壓縮，"auto" 協商可用的編解碼器（zstd 優先，其次 zlib），
+# "zlib" 或 "zstd" 指定編解碼器。本機回環連接上壓縮比直接傳輸慢，連接遠程實例或慢速網絡時才值得開啟
+GRASSHOPPER_COMPRESSION = os.environ.get("GRASSHOPPER_MCP_COMPRESSION", "none")
+# 達到這個字節數的消息才壓縮
+GRASSHOPPER_COMPRESSION_THRESHOLD = 64 * 1024
+# 消息格式（只用於長度前綴分幀的連接）："json"，"auto" 在安裝了 msgpack 時協商 MessagePack，"msgpack" 指定；
+# 監聽器不支持時使用 JSON。JSON 在安裝了 orjson 時由 orjson 編解碼
+GRASSHOPPER_SERIALIZATION = os.environ.get("GRASSHOPPER_MCP_SERIALIZATION", "json")
+# 可並行的工作（參數掃描、批量評估文檔）可以分配到多個 Grasshopper 實例，"host:port" 以逗號分隔；
+# 未設置時只使用上面的實例
+GRASSHOPPER_INSTANCES = os.environ.get("GRASSHOPPER_MCP_INSTANCES", "")
+# 實例健康檢查結果的有效期和健康檢查的超時（秒）
+INSTANCE_CHECK_INTERVAL = 5.0
+INSTANCE_CHECK_TIMEOUT = 2.0
+# 默認的單個請求超時（秒）
+GRASSHOPPER_TIMEOUT = 30.0
+# 執行時間較長的命令使用各自的超時（秒）
+METHOD_TIMEOUTS = {
+    "get_geometry": 120.0,
+    "run_gh_python": 300.0,
+    "execute_script": 120.0,
+    "run_macro": 120.0,
+    "load_document": 120.0,
+    "save_document": 60.0,
+}
+
+# get_geometry 每頁最多返回的數據項數和字符數
+GEOMETRY_PAGE_SIZE = 1000
+GEOMETRY_PAGE_CHARS = 1 << 20
+
+# 參數掃描：每個批次的樣本數、同時在途的批次數、每個輸出每個樣本最多讀取的幾何數據項數
+SWEEP_SAMPLES_PER_BATCH = 8
+SWEEP_PIPELINE_DEPTH = 2
+SWEEP_MAX_ITEMS = 100000
+# 一次參數掃描最多的樣本數（網格模式為各滑塊取值數的乘積）
+SWEEP_MAX_SAMPLES = 100000
+# 批量評估文檔時每個輸出最多讀取的幾何數據項數
+EVALUATE_MAX_ITEMS = 100000
+
+# 請求調度：監聽器在 Rhino UI 線程上逐個執行命令。交互式請求（默認）優先，批量工作（參數掃描、讀取全部幾何頁、
+# 腳本、批量評估文檔）按作業輪流排隊。每類同時在途的請求數上限，None 表示不限
+SCHEDULER_LIMITS: Dict[str, Optional[int]] = {INTERACTIVE: 16, BULK: 1}
+# 參數掃描每個批次在監聽器上的目標執行時間（秒），交互式請求最多等待一個這樣的批次；
+# None 表示每個批次固定 SWEEP_SAMPLES_PER_BATCH 個樣本
+SCHEDULER_SLICE_SECONDS: Optional[float] = 0.1
+
+# 客戶端畫布狀態緩存的有效期（秒），None 表示直到被失效為止，0 表示停用
+CANVAS_CACHE_TTL = 10.0
+# 只讀命令：相同方法和參數的並發請求合併為一次往返
+COALESCED_METHODS = READ_METHODS + ("get_component_info", "get_geometry", "get_available_patterns")
+
+# 變更日誌保留的變更數，更早的版本由 get_canvas_delta 返回完整狀態
+CANVAS_CHANGE_LOG_SIZE = 10000
+
+# 日誌級別；完整的請求和響應內容只在 DEBUG 級別記錄
+LOG_LEVEL = os.environ.get("GRASSHOPPER_MCP_LOG_LEVEL", "INFO")
+# 記錄發送到監聽器的每個請求、響應和耗時的跟蹤文件（gzip 壓縮的 JSON Lines），None 表示不記錄；
+# 用 python -m grasshopper_mcp.replay 以多個並發會話重放
+TRACE_PATH: Optional[str] = os.environ.get("GRASSHOPPER_MCP_TRACE") or None
+# 跟蹤文件是否包含響應內容，False 時只記錄請求和耗時
+TRACE_RESPONSES = os.environ.get("GRASSHOPPER_MCP_TRACE_RESPONSES", "1") != "0"
+
+logger = logging.getLogger("grasshopper_mcp")
+
+_metrics = Metrics()
+
+class _InstrumentedFastMCP(FastMCP):
+    """FastMCP server that records latency and error metrics for every tool."""
+
+    def tool(self, name: Optional[str] = None, **kwargs):
+        register = super().tool(name, **kwargs)
+        return lambda fn: register(_metrics.instrument(name or fn.__name__, fn))
 
 # 創建 MCP 服務器
-server = FastMCP("Grasshopper Bridge")
+# FastMCP 把日誌處理器安裝在 stderr 上（stdout 用於 MCP 通信）
+server = _InstrumentedFastMCP("Grasshopper Bridge", log_level=LOG_LEVEL.upper())
+
+_canvas_cache = CanvasCache(ttl=CANVAS_CACHE_TTL, log_size=CANVAS_CHANGE_LOG_SIZE)
 
 # Path to the shared component knowledge base JSON
 KNOWLEDGE_BASE_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "GH_MCP", "GH_MCP", "Resources", "ComponentKnowledgeBase.json")
 )
 
-_knowledge_base_cache: Optional[Dict[str, Any]] = None
+# 橋接器保存快取和結果文件的基礎目錄
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "grasshopper-mcp"
+)
+
+# 預編譯知識庫快照的目錄，None 表示每次啟動都解析 JSON
+KNOWLEDGE_BASE_SNAPSHOT_DIR: Optional[str] = CACHE_DIR
+# 檢查知識庫 JSON 是否被修改的最短間隔（秒）
+KNOWLEDGE_BASE_CHECK_INTERVAL = 2.0
+
+# 未指定路徑時掃描結果保存的目錄
+SWEEP_DIR = os.path.join(CACHE_DIR, "sweeps")
+
+# 按定義和輸入值記憶 get_geometry 結果的 SQLite 文件，None（默認）表示停用
+SOLUTION_CACHE_PATH: Optional[str] = os.environ.get("GRASSHOPPER_MCP_SOLUTION_CACHE") or None
+# 記憶結果的總大小上限（字節），超過時淘汰最久未使用的結果
+SOLUTION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# 監聽器不支持讀取組件列表時，這段時間（秒）內不再嘗試記憶
+SOLUTION_CACHE_RETRY_INTERVAL = 60.0
+
+_knowledge_store: Optional[KnowledgeBaseStore] = None
+_solution_cache: Optional[SolutionCache] = None
+_solution_cache_key = None
+_solution_cache_paused_until = 0.0
+_sweeps: Dict[str, SweepJob] = {}
+_knowledge_store_key = None
+
+def _get_knowledge_store() -> KnowledgeBaseStore:
+    """Return the shared knowledge base store, recreating it if the settings changed."""
+    global _knowledge_store, _knowledge_store_key
+    key = (KNOWLEDGE_BASE_PATH, KNOWLEDGE_BASE_SNAPSHOT_DIR, KNOWLEDGE_BASE_CHECK_INTERVAL)
+    if _knowledge_store is None or _knowledge_store_key != key:
+        _knowledge_store = KnowledgeBaseStore(
+            KNOWLEDGE_BASE_PATH, KNOWLEDGE_BASE_SNAPSHOT_DIR, check_interval=KNOWLEDGE_BASE_CHECK_INTERVAL
+        )
+        _knowledge_store_key = key
+    return _knowledge_store
+
+def _get_solution_cache() -> Optional[SolutionCache]:
+    """Return the memo of results, reopening it if the settings changed (None when disabled)."""
+    global _solution_cache, _solution_cache_key
+    key = (SOLUTION_CACHE_PATH, SOLUTION_CACHE_MAX_BYTES)
+    if _solution_cache_key != key:
+        if _solution_cache is not None:
+            _solution_cache.close()
+        _solution_cache = None
+        _solution_cache_key = key
+        if SOLUTION_CACHE_PATH is not None:
+            try:
+                _solution_cache = SolutionCache(SOLUTION_CACHE_PATH, SOLUTION_CACHE_MAX_BYTES)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Solution cache disabled, cannot open %s: %s", SOLUTION_CACHE_PATH, e)
+    return _solution_cache
+
+_trace_recorder: Optional[TraceRecorder] = None
+_trace_recorder_key = None
+
+def _get_trace_recorder() -> Optional[TraceRecorder]:
+    """Return the recorder of the requests, reopening it if the settings changed (None when disabled)."""
+    global _trace_recorder, _trace_recorder_key
+    key = (TRACE_PATH, TRACE_RESPONSES)
+    if _trace_recorder_key != key:
+        if _trace_recorder is not None:
+            _trace_recorder.close()
+        _trace_recorder = None
+        _trace_recorder_key = key
+        if TRACE_PATH is not None:
+            try:
+                _trace_recorder = TraceRecorder(TRACE_PATH, responses=TRACE_RESPONSES)
+            except OSError as e:
+                logger.warning("Tracing disabled, cannot open %s: %s", TRACE_PATH, e)
+    return _trace_recorder
+
+def _trace(
+    listener: str, requests: List[Dict[str, Any]], results: List[Dict[str, Any]], started: float, batch: bool = False
+) -> None:
+    """Record an exchange sent at ``started`` when tracing is enabled."""
+    recorder = _get_trace_recorder()
+    if recorder is not None:
+        recorder.record(
+            listener,
+            [(request["method"], request["params"]) for request in requests],
+            results,
+            started,
+            time.perf_counter() - started,
+            batch=batch,
+            ok=all(is_success(result) for result in results),
+        )
 
 def load_knowledge_base() -> Dict[str, Any]:
-    """Load the shared component knowledge base JSON."""
-    global _knowledge_base_cache
-    if _knowledge_base_cache is None:
-        try:
-            with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-                _knowledge_base_cache = json.load(f)
-        except Exception as e:
-            print(f"Error loading knowledge base: {e}", file=sys.stderr)
-            _knowledge_base_cache = {}
-    return _knowledge_base_cache
+    """Load the shared component knowledge base, reloading it when the JSON file changes."""
+    return _get_knowledge_store().get().data
 
-def send_to_grasshopper(method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Send a JSON-RPC request to the Grasshopper MCP server."""
-    if params is None:
-        params = {}
+def get_component_index() -> ComponentIndex:
+    """Get the name/category index over the component library."""
+    return _get_knowledge_store().get().index
 
-    request_id = str(uuid.uuid4())
-    request = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": method,
-        "params": params,
-    }
+def get_component_resolver() -> ComponentResolver:
+    """Get the fuzzy component-name resolver over the knowledge base."""
+    return _get_knowledge_store().get().resolver
 
-    client = None
-    try:
-        print(
-            f"Sending request to Grasshopper: {method} with params: {params}",
-            file=sys.stderr,
+_transport = None
+_transport_key = None
+_async_transport = None
+_async_transport_key = None
+
+def _get_transport():
+    """Return the shared transport, recreating it if the settings changed."""
+    global _transport, _transport_key
+    key = (
+        GRASSHOPPER_TRANSPORT, GRASSHOPPER_HOST, GRASSHOPPER_PORT, GRASSHOPPER_TIMEOUT, GRASSHOPPER_FRAMING,
+        GRASSHOPPER_COMPRESSION, GRASSHOPPER_COMPRESSION_THRESHOLD, GRASSHOPPER_SERIALIZATION,
+    )
+    if _transport is None or _transport_key != key:
+        if _transport is not None:
+            _transport.close()
+        if _transport_key is not None and _transport_key[1:3] != key[1:3]:
+            _canvas_cache.invalidate()
+        _transport = create_transport(
+            GRASSHOPPER_TRANSPORT,
+            GRASSHOPPER_HOST,
+            GRASSHOPPER_PORT,
+            timeout=GRASSHOPPER_TIMEOUT,
+            framing=GRASSHOPPER_FRAMING,
+            observer=_metrics.record_exchange,
+            coalesce=COALESCED_METHODS,
+            on_coalesce=_metrics.record_coalesced,
+            compression=GRASSHOPPER_COMPRESSION,
+            compression_threshold=GRASSHOPPER_COMPRESSION_THRESHOLD,
+            serialization=GRASSHOPPER_SERIALIZATION,
         )
+        _transport_key = key
+    return _transport
 
-        # Connect to Grasshopper MCP with a longer timeout
-        client = socket.create_connection(
-            (GRASSHOPPER_HOST, GRASSHOPPER_PORT), timeout=30
+def _get_async_transport() -> AsyncTransport:
+    """Return the shared asyncio transport used by the MCP tools."""
+    global _async_transport, _async_transport_key
+    key = (
+        GRASSHOPPER_HOST, GRASSHOPPER_PORT, GRASSHOPPER_TIMEOUT, GRASSHOPPER_FRAMING,
+        GRASSHOPPER_COMPRESSION, GRASSHOPPER_COMPRESSION_THRESHOLD, GRASSHOPPER_SERIALIZATION,
+    )
+    if _async_transport is None or _async_transport_key != key:
+        if _async_transport_key is not None and _async_transport_key[:2] != key[:2]:
+            # 連接到另一個 Grasshopper 實例時，緩存的畫布狀態不再有效
+            _canvas_cache.invalidate()
+        _async_transport = AsyncTransport(
+            GRASSHOPPER_HOST,
+            GRASSHOPPER_PORT,
+            timeout=GRASSHOPPER_TIMEOUT,
+            framing=GRASSHOPPER_FRAMING,
+            observer=_metrics.record_exchange,
+            coalesce=COALESCED_METHODS,
+            on_coalesce=_metrics.record_coalesced,
+            compression=GRASSHOPPER_COMPRESSION,
+            compression_threshold=GRASSHOPPER_COMPRESSION_THRESHOLD,
+            serialization=GRASSHOPPER_SERIALIZATION,
         )
-        client.settimeout(30)
+        _async_transport_key = key
+    return _async_transport
 
-        # Send the JSON-RPC request
-        request_json = json.dumps(request)
-        client.sendall((request_json + "\n").encode("utf-8"))
-        print(f"Request sent: {request_json}", file=sys.stderr)
+_schedulers: Dict[Tuple[str, int], Scheduler] = {}
+_schedulers_key = None
 
-        # Receive the response
-        response_data = b""
-        try:
-            while True:
-                chunk = client.recv(4096)
-                if not chunk:
-                    if not response_data:
-                        raise ConnectionError("Connection closed before response received")
-                    break
-                response_data += chunk
-                if response_data.endswith(b"\n"):
-                    break
-        except socket.timeout:
-            return {
-                "success": False,
-                "error": "Timed out waiting for response from Grasshopper",
-            }
+def _get_scheduler(host: str, port: int) -> Scheduler:
+    """Return the request scheduler of a listener, recreating them all if the limits changed."""
+    global _schedulers_key
+    key = tuple(SCHEDULER_LIMITS.items())
+    if _schedulers_key != key:
+        _schedulers.clear()
+        _schedulers_key = key
+    scheduler = _schedulers.get((host, port))
+    if scheduler is None:
+        scheduler = _schedulers[(host, port)] = Scheduler(
+            SCHEDULER_LIMITS, name=f"{host}:{port}", observer=_metrics.record_queue
+        )
+    return scheduler
+
+_instance_pool: Optional[InstancePool] = None
+_instance_pool_key = None
+
+def _get_instance_pool() -> InstancePool:
+    """Return the pool of listeners for parallel work, recreating it if the settings changed."""
+    global _instance_pool, _instance_pool_key
+    endpoints = parse_endpoints(GRASSHOPPER_INSTANCES, GRASSHOPPER_PORT) or [(GRASSHOPPER_HOST, GRASSHOPPER_PORT)]
+    key = (
+        tuple(endpoints), GRASSHOPPER_TIMEOUT, GRASSHOPPER_FRAMING, GRASSHOPPER_COMPRESSION,
+        GRASSHOPPER_COMPRESSION_THRESHOLD, GRASSHOPPER_SERIALIZATION, INSTANCE_CHECK_INTERVAL, INSTANCE_CHECK_TIMEOUT,
+    )
+    if _instance_pool is None or _instance_pool_key != key:
+        _instance_pool = InstancePool(
+            endpoints,
+            lambda host, port: AsyncTransport(
+                host,
+                port,
+                timeout=GRASSHOPPER_TIMEOUT,
+                framing=GRASSHOPPER_FRAMING,
+                observer=_metrics.record_exchange,
+                coalesce=COALESCED_METHODS,
+                on_coalesce=_metrics.record_coalesced,
+                compression=GRASSHOPPER_COMPRESSION,
+                compression_threshold=GRASSHOPPER_COMPRESSION_THRESHOLD,
+                serialization=GRASSHOPPER_SERIALIZATION,
+            ),
+            check_interval=INSTANCE_CHECK_INTERVAL,
+            check_timeout=INSTANCE_CHECK_TIMEOUT,
+        )
+        _instance_pool_key = key
+    return _instance_pool
+
+def _note_document(path: Optional[str]) -> None:
+    """Record the document the bridge's own listener has open, for sticky routing."""
+    if _instance_pool is not None:
+        instance = _instance_pool.find(GRASSHOPPER_HOST, GRASSHOPPER_PORT)
+        if instance is not None:
+            instance.document = path
+
+def _build_request(method: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": method,
+        "params": params if params is not None else {},
+    }
 
-        if not response_data.endswith(b"\n"):
+def _request_timeout(method: str, timeout: Optional[float]) -> float:
+    if timeout is not None:
+        return timeout
+    return METHOD_TIMEOUTS.get(method, GRASSHOPPER_TIMEOUT)
+
+def _unwrap_response(response: Any) -> Dict[str, Any]:
+    """Unwrap the JSON-RPC envelope if present."""
+    if isinstance(response, dict) and response.get("jsonrpc") == "2.0":
+        if "result" in response:
+            return response["result"]
+        elif "error" in response:
             return {
                 "success": False,
-                "error": "Incomplete response from Grasshopper",
+                "error": response.get("error"),
             }
+    return response
 
-        response_str = response_data.decode("utf-8-sig").strip()
-        print(f"Response received: {response_str}", file=sys.stderr)
-
-        response = json.loads(response_str)
-
-        # Unwrap JSON-RPC envelope if present
-        if isinstance(response, dict) and response.get("jsonrpc") == "2.0":
-            if "result" in response:
-                return response["result"]
-            elif "error" in response:
-                return {
-                    "success": False,
-                    "error": response.get("error"),
-                }
-        return response
+def _is_timeout(e: Exception) -> bool:
+    return isinstance(e, (socket.timeout, asyncio.TimeoutError))
 
-    except socket.timeout:
+def _error_response(e: Exception) -> Dict[str, Any]:
+    if _is_timeout(e):
         return {
             "success": False,
-            "error": "Timed out communicating with Grasshopper",
+            "error": "Timed out waiting for response from Grasshopper",
         }
-    except Exception as e:
-        print(f"Error communicating with Grasshopper: {str(e)}", file=sys.stderr)
-        traceback.print_exc(file=sys.stderr)
+    if isinstance(e, IncompleteResponseError):
         return {
             "success": False,
-            "error": f"Error communicating with Grasshopper: {str(e)}"
+            "error": "Incomplete response from Grasshopper",
         }
-    finally:
-        if client is not None:
+    logger.error("Error communicating with Grasshopper: %s", e, exc_info=e)
+    return {
+        "success": False,
+        "error": f"Error communicating with Grasshopper: {str(e)}"
+    }
+
+def send_to_grasshopper(method: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Send a JSON-RPC request to the Grasshopper MCP server and block for the reply."""
+    request = _build_request(method, params)
+    with _metrics.measure("requests", method) as call:
+        started = time.perf_counter()
+        try:
+            logger.debug("Sending request to Grasshopper: %s with params: %s", method, request["params"])
+            response = _get_transport().request(request, timeout=_request_timeout(method, timeout))
+            logger.debug("Response received: %s", response)
+            result = _unwrap_response(response)
+        except Exception as e:
+            call.fail(timeout=_is_timeout(e))
+            result = _error_response(e)
+        if not is_success(result):
+            call.fail()
+    _trace(f"{GRASSHOPPER_HOST}:{GRASSHOPPER_PORT}", [request], [result], started)
+    _canvas_cache.observe(method, request["params"], result)
+    return result
+
+async def send_to_grasshopper_async(method: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Send a JSON-RPC request over the shared asyncio connection.
+
+    Concurrent calls are in flight at the same time and each one waits only
+    for its own reply. The request is sent when the scheduler admits it, in
+    the priority class of the current context (interactive by default).
+    """
+    request = _build_request(method, params)
+    async with _get_scheduler(GRASSHOPPER_HOST, GRASSHOPPER_PORT).slot():
+        with _metrics.measure("requests", method) as call:
+            started = time.perf_counter()
             try:
-                client.close()
-            except Exception:
-                pass
+                logger.debug("Sending request to Grasshopper: %s with params: %s", method, request["params"])
+                response = await _get_async_transport().request(request, timeout=_request_timeout(method, timeout))
+                logger.debug("Response received: %s", response)
+                result = _unwrap_response(response)
+            except Exception as e:
+                call.fail(timeout=_is_timeout(e))
+                result = _error_response(e)
+            if not is_success(result):
+                call.fail()
+    _trace(f"{GRASSHOPPER_HOST}:{GRASSHOPPER_PORT}", [request], [result], started)
+    _canvas_cache.observe(method, request["params"], result)
+    return result
+
+def _batch_timeout(calls: List[Tuple[str, Optional[Dict[str, Any]]]], timeout: Optional[float]) -> float:
+    if timeout is not None:
+        return timeout
+    return max(_request_timeout(method, None) for method, _ in calls)
+
+def send_batch(calls: List[Tuple[str, Optional[Dict[str, Any]]]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Send several requests to Grasshopper as one JSON-RPC 2.0 batch
+
+    Args:
+        calls: (method, params) pairs
+        timeout: Timeout in seconds for the whole batch (optional)
+
+    Returns:
+        One result per call, in order. A failed entry is reported as
+        {"success": False, "error": ...} without affecting the others.
+    """
+    if not calls:
+        return []
+    requests = [_build_request(method, params) for method, params in calls]
+    with _metrics.measure("requests", "batch") as call:
+        started = time.perf_counter()
+        try:
+            logger.debug("Sending batch to Grasshopper: %s", [request["method"] for request in requests])
+            responses = _get_transport().request_batch(requests, timeout=_batch_timeout(calls, timeout))
+            logger.debug("Batch response received: %s", responses)
+            results = [_unwrap_response(response) for response in responses]
+        except Exception as e:
+            call.fail(timeout=_is_timeout(e))
+            results = [_error_response(e)] * len(calls)
+        if not all(is_success(result) for result in results):
+            call.fail()
+    _trace(f"{GRASSHOPPER_HOST}:{GRASSHOPPER_PORT}", requests, results, started, batch=True)
+    for request, result in zip(requests, results):
+        _canvas_cache.observe(request["method"], request["params"], result)
+    return results
+
+async def send_batch_async(calls: List[Tuple[str, Optional[Dict[str, Any]]]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Asynchronous counterpart of send_batch using the shared asyncio connection."""
+    return await _send_batch_async(calls, timeout, raise_errors=False)
+
+async def _send_sweep_batch(calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """send_batch_async raising connection errors and timeouts, so that a sweep fails instead of recording them."""
+    return await _send_batch_async(calls, None, raise_errors=True)
+
+async def _send_batch_async(
+    calls: List[Tuple[str, Optional[Dict[str, Any]]]], timeout: Optional[float], raise_errors: bool
+) -> List[Dict[str, Any]]:
+    if not calls:
+        return []
+    requests = [_build_request(method, params) for method, params in calls]
+    error: Optional[Exception] = None
+    async with _get_scheduler(GRASSHOPPER_HOST, GRASSHOPPER_PORT).slot():
+        with _metrics.measure("requests", "batch") as call:
+            started = time.perf_counter()
+            try:
+                logger.debug("Sending batch to Grasshopper: %s", [request["method"] for request in requests])
+                responses = await _get_async_transport().request_batch(requests, timeout=_batch_timeout(calls, timeout))
+                logger.debug("Batch response received: %s", responses)
+                results = [_unwrap_response(response) for response in responses]
+            except Exception as e:
+                call.fail(timeout=_is_timeout(e))
+                error = e
+                results = [_error_response(e)] * len(calls)
+            if not all(is_success(result) for result in results):
+                call.fail()
+    _trace(f"{GRASSHOPPER_HOST}:{GRASSHOPPER_PORT}", requests, results, started, batch=True)
+    for request, result in zip(requests, results):
+        _canvas_cache.observe(request["method"], request["params"], result)
+    if error is not None and raise_errors:
+        raise error
+    return results
+
+async def send_batch_to_instance(
+    instance: Instance, calls: List[Tuple[str, Optional[Dict[str, Any]]]], timeout: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Send a batch to one instance of the pool
+
+    Unlike send_batch_async, a connection error or a timeout is raised rather
+    than reported, so that the pool can hand the work to another instance.
+    """
+    if not calls:
+        return []
+    requests = [_build_request(method, params) for method, params in calls]
+    async with _get_scheduler(instance.host, instance.port).slot():
+        with _metrics.measure("requests", "batch") as call:
+            started = time.perf_counter()
+            try:
+                logger.debug("Sending batch to %s: %s", instance.address, [request["method"] for request in requests])
+                responses = await instance.transport.request_batch(requests, timeout=_batch_timeout(calls, timeout))
+            except Exception as e:
+                call.fail(timeout=_is_timeout(e))
+                raise
+            results = [_unwrap_response(response) for response in responses]
+            if not all(is_success(result) for result in results):
+                call.fail()
+    _trace(instance.address, requests, results, started, batch=True)
+    own_canvas = (instance.host, instance.port) == (GRASSHOPPER_HOST, GRASSHOPPER_PORT)
+    for request, result in zip(requests, results):
+        if own_canvas:
+            # 這個實例就是工具所編輯的畫布，保持畫布緩存同步
+            _canvas_cache.observe(request["method"], request["params"], result)
+        if request["method"] == "load_document":
+            instance.document = request["params"]["path"] if is_success(result) else None
+        elif request["method"] == "clear_document":
+            instance.document = None
+    return results
+
+async def _read_canvas(
+    methods: List[str],
+    extra_calls: List[Tuple[str, Optional[Dict[str, Any]]]] = (),
+    refresh: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read canvas state through the canvas cache
+
+    Cache misses for ``methods`` and all ``extra_calls`` are sent together in
+    one batch, so a fully cached read needs no round trip at all.
+
+    Args:
+        methods: Read commands to answer (see cache.READ_METHODS)
+        extra_calls: Uncached (method, params) calls to send in the same batch
+        refresh: Ignore cached responses and fetch fresh ones
+
+    Returns:
+        The responses for ``methods`` and for ``extra_calls``, each in order
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for method in methods:
+        cached = None if refresh else _canvas_cache.get(method)
+        if cached is None:
+            missing.append(method)
+        else:
+            results[method] = cached
+    responses = await send_batch_async([(method, None) for method in missing] + list(extra_calls))
+    for method, response in zip(missing, responses):
+        _canvas_cache.put(method, response)
+        results[method] = response
+    return [results[method] for method in methods], responses[len(missing):]
+
+async def _solution_state(fetch: bool = True) -> Optional[Tuple[SolutionCache, SolutionState, int]]:
+    """
+    The memo of results and the state of the document, listed for this request
+
+    The components and connections are fetched again rather than taken from
+    the canvas cache, whose mirror may predate edits made in Grasshopper.
+    Results of graphs tainted since the last call are dropped from the memo
+    first.
+
+    Args:
+        fetch: Use the listing in the canvas cache, for callers that just
+            fetched it themselves
+
+    Returns:
+        The memo, the state and the canvas cache's mutation count when the
+        state was listed (the state no longer holds once it changed), or None
+        when the memo is disabled or the state is unknown
+    """
+    global _solution_cache_paused_until
+    memo = _get_solution_cache()
+    if memo is None or time.monotonic() < _solution_cache_paused_until:
+        return None
+    if fetch:
+        responses, _ = await _read_canvas(["get_all_components", "get_connections"], refresh=True)
+        if not all(is_success(response) for response in responses):
+            _solution_cache_paused_until = time.monotonic() + SOLUTION_CACHE_RETRY_INTERVAL
+            return None
+    state = _canvas_cache.solution_state()
+    for graph in _canvas_cache.pop_tainted():
+        memo.invalidate(graph)
+    return None if state is None else (memo, state, _canvas_cache.mutations)
+
+def _memo_key(
+    solution: Optional[Tuple[SolutionCache, SolutionState, int]], method: str, params: Dict[str, Any]
+) -> Optional[Tuple[SolutionCache, str, str]]:
+    """Memo, graph hash and key for a result of ``method`` in a state from _solution_state, if it still holds."""
+    if solution is None:
+        return None
+    memo, state, mutations = solution
+    if _canvas_cache.mutations != mutations:
+        return None
+    graph, inputs = state.key()
+    return memo, graph, result_key(graph, inputs, method, params)
+
+# 組件名稱的模糊匹配至少要達到這個分數才會自動改寫組件類型
+COMPONENT_MATCH_THRESHOLD = 0.8
+
+def normalize_component_type(component_type: str) -> str:
+    """
+    Map alternative or misspelled component names to canonical Grasshopper names
+
+    Aliases come from the "componentAliases" section of the knowledge base.
+    Names that match nothing closely enough are passed through unchanged, so
+    the listener can still resolve types the knowledge base does not describe.
+    """
+    match = get_component_resolver().resolve(component_type, COMPONENT_MATCH_THRESHOLD)
+    if match is None or match["name"] == component_type:
+        return component_type
+    logger.info("Component type normalized from '%s' to '%s' (score %s)", component_type, match["name"], match["score"])
+    return match["name"]
 
 # 註冊 MCP 工具
 @server.tool("add_component")
-def add_component(component_type: str, x: float, y: float):
+async def add_component(component_type: str, x: float, y: float):
     """
     Add a component to the Grasshopper canvas
     
@@ -140,47 +644,7 @@ def add_component(component_type: str, x: float, y: float):
         Result of adding the component
     """
     # 處理常見的組件名稱混淆問題
-    component_mapping = {
-        # Number Slider 的各種可能輸入方式
-        "number slider": "Number Slider",
-        "numeric slider": "Number Slider",
-        "num slider": "Number Slider",
-        "slider": "Number Slider",  # 當只提到 slider 且上下文是數值時，預設為 Number Slider
-        
-        # 其他組件的標準化名稱
-        "md slider": "MD Slider",
-        "multidimensional slider": "MD Slider",
-        "multi-dimensional slider": "MD Slider",
-        "graph mapper": "Graph Mapper",
-        
-        # 數學運算組件
-        "add": "Addition",
-        "addition": "Addition",
-        "plus": "Addition",
-        "sum": "Addition",
-        "subtract": "Subtraction",
-        "subtraction": "Subtraction",
-        "minus": "Subtraction",
-        "difference": "Subtraction",
-        "multiply": "Multiplication",
-        "multiplication": "Multiplication",
-        "times": "Multiplication",
-        "product": "Multiplication",
-        "divide": "Division",
-        "division": "Division",
-        
-        # 輸出組件
-        "panel": "Panel",
-        "text panel": "Panel",
-        "output panel": "Panel",
-        "display": "Panel"
-    }
-    
-    # 檢查並修正組件類型
-    normalized_type = component_type.lower()
-    if normalized_type in component_mapping:
-        component_type = component_mapping[normalized_type]
-        print(f"Component type normalized from '{normalized_type}' to '{component_mapping[normalized_type]}'", file=sys.stderr)
+    component_type = normalize_component_type(component_type)
     
     params = {
         "type": component_type,
@@ -188,19 +652,19 @@ def add_component(component_type: str, x: float, y: float):
         "y": y
     }
 
-    return send_to_grasshopper("add_component", params)
+    return await send_to_grasshopper_async("add_component", params)
 
 @server.tool("delete_component")
-def delete_component(component_id: str):
+async def delete_component(component_id: str):
     """Delete a component from the Grasshopper canvas"""
     params = {
         "id": component_id
     }
 
-    return send_to_grasshopper("delete_component", params)
+    return await send_to_grasshopper_async("delete_component", params)
 
 @server.tool("move_component")
-def move_component(component_id: str, x: float, y: float):
+async def move_component(component_id: str, x: float, y: float):
     """Move an existing component to a new canvas location"""
     params = {
         "id": component_id,
@@ -208,15 +672,17 @@ def move_component(component_id: str, x: float, y: float):
         "y": y
     }
 
-    return send_to_grasshopper("move_component", params)
+    return await send_to_grasshopper_async("move_component", params)
 
 @server.tool("clear_document")
-def clear_document():
+async def clear_document():
     """Clear the Grasshopper document"""
-    return send_to_grasshopper("clear_document")
+    response = await send_to_grasshopper_async("clear_document")
+    _note_document(None)
+    return response
 
 @server.tool("save_document")
-def save_document(path: str):
+async def save_document(path: str):
     """
     Save the Grasshopper document
     
@@ -230,7 +696,7 @@ def save_document(path: str):
         "path": path
     }
 
-    response = send_to_grasshopper("save_document", params)
+    response = await send_to_grasshopper_async("save_document", params)
 
     if not response.get("success", False):
         error_msg = response.get("error") or response.get("message", "Unknown error")
@@ -239,7 +705,7 @@ def save_document(path: str):
     return response.get("result") or response.get("data") or response
 
 @server.tool("load_document")
-def load_document(path: str):
+async def load_document(path: str):
     """
     Load a Grasshopper document
     
@@ -253,21 +719,24 @@ def load_document(path: str):
         "path": path
     }
 
-    response = send_to_grasshopper("load_document", params)
+    response = await send_to_grasshopper_async("load_document", params)
 
     if not response.get("success", False):
+        _note_document(None)
         error_msg = response.get("error") or response.get("message", "Unknown error")
         raise RuntimeError(f"Failed to load document: {error_msg}")
+    _note_document(path)
 
     return response.get("result") or response.get("data") or response
 
 @server.tool("get_document_info")
-def get_document_info():
-    """Get information about the Grasshopper document"""
-    return send_to_grasshopper("get_document_info")
+async def get_document_info(refresh: bool = False):
+    """Get information about the Grasshopper document (refresh bypasses the canvas cache)"""
+    (doc_info,), _ = await _read_canvas(["get_document_info"], refresh=refresh)
+    return doc_info
 
 @server.tool("connect_components")
-def connect_components(source_id: str, target_id: str, source_param: str = None, target_param: str = None, source_param_index: int = None, target_param_index: int = None):
+async def connect_components(source_id: str, target_id: str, source_param: str = None, target_param: str = None, source_param_index: int = None, target_param_index: int = None):
     """
     Connect two components in the Grasshopper canvas
     
@@ -282,32 +751,24 @@ def connect_components(source_id: str, target_id: str, source_param: str = None,
     Returns:
         Result of connecting the components
     """
-    # 獲取目標組件的信息，檢查是否已有連接
-    target_info = send_to_grasshopper("get_component_info", {"componentId": target_id})
+    # 在同一個批次中獲取目標組件的信息和現有連接（連接優先使用緩存）
+    (connections,), (target_info,) = await _read_canvas(
+        ["get_connections"], [("get_component_info", {"componentId": target_id})]
+    )
     
     # 檢查組件類型，如果是需要多個輸入的組件（如 Addition, Subtraction 等），智能分配輸入
     if target_info and "result" in target_info and "type" in target_info["result"]:
         component_type = target_info["result"]["type"]
         
-        # 獲取現有連接
-        connections = send_to_grasshopper("get_connections")
-        existing_connections = []
-        
-        if connections and "result" in connections:
-            for conn in connections["result"]:
-                if conn.get("targetId") == target_id:
-                    existing_connections.append(conn)
+        # 建立連接索引，用於查詢目標組件的輸入端口
+        graph = ConnectionGraph.from_response(connections)
         
         # 對於特定需要多個輸入的組件，自動選擇正確的輸入端口
-        if component_type in ["Addition", "Subtraction", "Multiplication", "Division", "Math"]:
+        if component_type in AUTO_AB_TYPES:
             # 如果沒有指定目標參數，且已有連接到第一個輸入，則自動連接到第二個輸入
             if target_param is None and target_param_index is None:
                 # 檢查第一個輸入是否已被佔用
-                first_input_occupied = False
-                for conn in existing_connections:
-                    if conn.get("targetParam") == "A" or conn.get("targetParamIndex") == 0:
-                        first_input_occupied = True
-                        break
+                first_input_occupied = graph.is_input_connected(target_id, param="A", index=0)
                 
                 # 如果第一個輸入已被佔用，則連接到第二個輸入
                 if first_input_occupied:
@@ -330,10 +791,62 @@ def connect_components(source_id: str, target_id: str, source_param: str = None,
     elif target_param_index is not None:
         params["targetParamIndex"] = target_param_index
     
-    return send_to_grasshopper("connect_components", params)
+    return await send_to_grasshopper_async("connect_components", params)
+
+@server.tool("build_definition")
+async def build_definition(components: List[Dict[str, Any]], connections: List[Dict[str, Any]] = None, rollback_on_error: bool = True):
+    """
+    Build a whole graph of components and connections in one request
+    
+    Args:
+        components: Components to add. Each item has "alias" (local name used by
+            connections), "type", "x", "y", and optionally "value" and, for Number
+            Sliders, "slider": {"min", "max", "rounding"}
+        connections: Connections between aliases (or GUIDs of existing components).
+            Each item has "source", "target" and optionally "source_param",
+            "target_param", "source_param_index", "target_param_index"
+        rollback_on_error: Delete the components created so far if any step fails
+    
+    Returns:
+        Map of alias to component GUID, plus validation warnings and any errors
+    """
+    plan = plan_definition(components, connections, get_component_index(), normalize_component_type)
+    if not plan.valid:
+        return {"success": False, "errors": plan.errors, "warnings": plan.warnings}
+    
+    # 第一批：一次性添加所有組件
+    added = await send_batch_async(plan.add_calls)
+    ids: Dict[str, str] = {}
+    errors = []
+    for alias, response in zip(plan.aliases, added):
+        data = (response.get("result") or response.get("data")) if is_success(response) else None
+        if isinstance(data, dict) and data.get("id"):
+            ids[alias] = data["id"]
+        else:
+            errors.append(f"{alias}: failed to add component: {response.get('error') or response}")
+    
+    # 第二批：設置初始值和滑桿範圍，並建立所有連接
+    if not errors:
+        calls = plan.value_calls(ids) + plan.connect_calls(ids)
+        for (method, params), response in zip(calls, await send_batch_async(calls)):
+            if not is_success(response):
+                errors.append(f"{method} {params}: {response.get('error') or response}")
+    
+    if errors and rollback_on_error and ids:
+        await send_batch_async([("delete_component", {"id": component_id}) for component_id in ids.values()])
+        ids = {}
+    
+    return {
+        "success": not errors,
+        "components": ids,
+        "connections": len(plan.connections),
+        "errors": errors,
+        "warnings": plan.warnings,
+        "rolledBack": bool(errors and rollback_on_error),
+    }
 
 @server.tool("create_pattern")
-def create_pattern(description: str):
+async def create_pattern(description: str):
     """
     Create a pattern of components based on a high-level description
     
@@ -347,10 +860,10 @@ def create_pattern(description: str):
         "description": description
     }
     
-    return send_to_grasshopper("create_pattern", params)
+    return await send_to_grasshopper_async("create_pattern", params)
 
 @server.tool("get_available_patterns")
-def get_available_patterns(query: str):
+async def get_available_patterns(query: str):
     """
     Get a list of available patterns that match a query
     
@@ -364,10 +877,10 @@ def get_available_patterns(query: str):
         "query": query
     }
     
-    return send_to_grasshopper("get_available_patterns", params)
+    return await send_to_grasshopper_async("get_available_patterns", params)
 
 @server.tool("get_component_info")
-def get_component_info(component_id: str):
+async def get_component_info(component_id: str):
     """
     Get detailed information about a specific component
     
@@ -381,7 +894,8 @@ def get_component_info(component_id: str):
         "componentId": component_id
     }
     
-    result = send_to_grasshopper("get_component_info", params)
+    # 組件信息和連接信息在同一個批次中請求（連接優先使用緩存）
+    (connections,), (result,) = await _read_canvas(["get_connections"], [("get_component_info", params)])
     
     # 增強返回結果，添加更多參數信息
     if result and "result" in result:
@@ -391,23 +905,20 @@ def get_component_info(component_id: str):
         if "type" in component_data:
             component_type = component_data["type"]
             
-            # 查詢組件庫，獲取該類型組件的詳細參數信息
-            component_library = get_component_library()
-            if "components" in component_library:
-                for lib_component in component_library["components"]:
-                    if lib_component.get("name") == component_type or lib_component.get("fullName") == component_type:
-                        # 將組件庫中的參數信息合併到返回結果中
-                        if "settings" in lib_component:
-                            component_data["availableSettings"] = lib_component["settings"]
-                        if "inputs" in lib_component:
-                            component_data["inputDetails"] = lib_component["inputs"]
-                        if "outputs" in lib_component:
-                            component_data["outputDetails"] = lib_component["outputs"]
-                        if "usage_examples" in lib_component:
-                            component_data["usageExamples"] = lib_component["usage_examples"]
-                        if "common_issues" in lib_component:
-                            component_data["commonIssues"] = lib_component["common_issues"]
-                        break
+            # 查詢組件庫索引，獲取該類型組件的詳細參數信息
+            lib_component = get_component_index().lookup(component_type)
+            if lib_component is not None:
+                # 將組件庫中的參數信息合併到返回結果中
+                if "settings" in lib_component:
+                    component_data["availableSettings"] = lib_component["settings"]
+                if "inputs" in lib_component:
+                    component_data["inputDetails"] = lib_component["inputs"]
+                if "outputs" in lib_component:
+                    component_data["outputDetails"] = lib_component["outputs"]
+                if "usage_examples" in lib_component:
+                    component_data["usageExamples"] = lib_component["usage_examples"]
+                if "common_issues" in lib_component:
+                    component_data["commonIssues"] = lib_component["common_issues"]
             
             # 特殊處理某些組件類型
             if component_type == "Number Slider":
@@ -422,13 +933,9 @@ def get_component_info(component_id: str):
                     }
             
             # 添加組件的連接信息
-            connections = send_to_grasshopper("get_connections")
             if connections and "result" in connections:
                 # 查找與該組件相關的所有連接
-                related_connections = []
-                for conn in connections["result"]:
-                    if conn.get("sourceId") == component_id or conn.get("targetId") == component_id:
-                        related_connections.append(conn)
+                related_connections = ConnectionGraph.from_response(connections).related(component_id)
                 
                 if related_connections:
                     component_data["connections"] = related_connections
@@ -436,7 +943,7 @@ def get_component_info(component_id: str):
     return result
 
 @server.tool("set_component_value")
-def set_component_value(component_id: str, value: str):
+async def set_component_value(component_id: str, value: str):
     """
     Set the value of a Grasshopper component.
 
@@ -455,99 +962,257 @@ def set_component_value(component_id: str, value: str):
         "value": value
     }
 
-    return send_to_grasshopper("set_component_value", params)
+    return await send_to_grasshopper_async("set_component_value", params)
 
 @server.tool("get_all_components")
-def get_all_components():
+async def get_all_components(
+    refresh: bool = False,
+    fields: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    region: Optional[List[float]] = None,
+    connectivity: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
     """
     Get a list of all components in the current document
     
+    Library metadata (available settings, input and output details) is returned
+    once per component type in "library" instead of with every component.
+    
+    Args:
+        refresh: Bypass the canvas cache and fetch fresh data from Grasshopper
+        fields: Only return these keys of each component (e.g. ["id", "type", "currentSettings.value"])
+        exclude: Leave out these keys (e.g. ["connections"], or "availableSettings" to skip the library)
+        types: Only components of these types
+        region: Only components inside the canvas rectangle [x0, y0, x1, y1]
+        connectivity: Only "connected", "isolated", "sources" (no inputs wired) or "sinks" (no outputs wired) components
+        cursor: nextCursor of the previous page
+        limit: Maximum number of components in the page (default: all)
+    
     Returns:
-        List of all components in the document with their IDs, types, and positions
+        List of the matching components with their IDs, types, and positions, the
+        total number of matching components and nextCursor (None on the last page)
+    """
+    try:
+        fields, exclude, types = parse_names(fields), parse_names(exclude), parse_names(types)
+        region = parse_region(region)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    with_connections = connectivity or wants("connections", fields, exclude)
+    methods = ["get_all_components", "get_connections"] if with_connections else ["get_all_components"]
+    responses, _ = await _read_canvas(methods, refresh=refresh)
+    result = responses[0]
+    if not is_success(result) or not isinstance(result.get("result"), list):
+        return result
+    graph = ConnectionGraph.from_response(responses[1]) if with_connections else ConnectionGraph()
+    try:
+        components = filter_components(result["result"], graph, types, region, connectivity)
+        page, next_cursor = paginate(components, cursor, limit)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    library = await _enrich_components(page, graph, refresh, fields, exclude)
+    response = dict(result, result=list(map(projector(fields, exclude), page)))
+    response.update(total=len(components), nextCursor=next_cursor, version=_canvas_cache.version)
+    if library:
+        response["library"] = library
+    return response
+
+async def _enrich_components(
+    components: List[Dict[str, Any]],
+    graph: ConnectionGraph,
+    refresh: bool = False,
+    fields: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
     """
-    result = send_to_grasshopper("get_all_components")
+    Add connections and slider settings to components of a listing
     
-    # 增強返回結果，為每個組件添加更多參數信息
-    if result and "result" in result:
-        components = result["result"]
-        component_library = get_component_library()
-        
-        # 獲取所有連接信息
-        connections = send_to_grasshopper("get_connections")
-        connections_data = connections.get("result", []) if connections else []
-        
-        # 為每個組件添加詳細信息
-        for component in components:
-            if "id" in component and "type" in component:
-                component_id = component["id"]
-                component_type = component["type"]
-                
-                # 添加組件的詳細參數信息
-                if "components" in component_library:
-                    for lib_component in component_library["components"]:
-                        if lib_component.get("name") == component_type or lib_component.get("fullName") == component_type:
-                            # 將組件庫中的參數信息合併到組件數據中
-                            if "settings" in lib_component:
-                                component["availableSettings"] = lib_component["settings"]
-                            if "inputs" in lib_component:
-                                component["inputDetails"] = lib_component["inputs"]
-                            if "outputs" in lib_component:
-                                component["outputDetails"] = lib_component["outputs"]
-                            break
-                
-                # 添加組件的連接信息
-                related_connections = []
-                for conn in connections_data:
-                    if conn.get("sourceId") == component_id or conn.get("targetId") == component_id:
-                        related_connections.append(conn)
-                
-                if related_connections:
-                    component["connections"] = related_connections
-                
-                # 特殊處理某些組件類型
-                if component_type == "Number Slider":
-                    # 嘗試獲取滑桿的當前設置
-                    component_info = send_to_grasshopper("get_component_info", {"componentId": component_id})
-                    if component_info and "result" in component_info:
-                        info_data = component_info["result"]
-                        component["currentSettings"] = {
-                            "min": info_data.get("min", 0),
-                            "max": info_data.get("max", 10),
-                            "value": info_data.get("value", 5),
-                            "rounding": info_data.get("rounding", 0.1)
-                        }
+    Only the keys a projection with fields/exclude keeps are added. Slider
+    settings come from the canvas cache; the missing ones are fetched in a
+    single batch, so this costs at most one round trip regardless of the
+    canvas size.
     
-    return result
+    Returns:
+        Library metadata of the listed component types, keyed by type
+    """
+    library_fields = [name for name in LIBRARY_FIELDS if wants(name, fields, exclude)]
+    with_connections = wants("connections", fields, exclude)
+    with_settings = wants("currentSettings", fields, exclude)
+    component_index = get_component_index()
+    library: Dict[str, Dict[str, Any]] = {}
+    
+    # 為每個組件添加詳細信息，組件庫中的參數信息每種類型只返回一次
+    sliders = []
+    for component in components:
+        if "id" in component and "type" in component:
+            component_id = component["id"]
+            component_type = component["type"]
+            
+            if library_fields and component_type not in library:
+                lib_component = component_index.lookup(component_type)
+                if lib_component is not None:
+                    library[component_type] = {
+                        name: lib_component[key] for name, key in LIBRARY_FIELDS.items()
+                        if name in library_fields and key in lib_component
+                    }
+            
+            # 添加組件的連接信息
+            related_connections = graph.related(component_id) if with_connections else None
+            if related_connections:
+                component["connections"] = related_connections
+            
+            # 特殊處理某些組件類型
+            if with_settings and component_type == "Number Slider":
+                settings = None if refresh else _canvas_cache.get_settings(component_id)
+                if settings is None:
+                    sliders.append(component)
+                else:
+                    component["currentSettings"] = settings
+    
+    # 在一個批次中獲取緩存中沒有的滑桿的當前設置
+    slider_infos = await send_batch_async([
+        ("get_component_info", {"componentId": component["id"]})
+        for component in sliders
+    ])
+    for component, component_info in zip(sliders, slider_infos):
+        if component_info and "result" in component_info:
+            info_data = component_info["result"]
+            component["currentSettings"] = {
+                "min": info_data.get("min", 0),
+                "max": info_data.get("max", 10),
+                "value": info_data.get("value", 5),
+                "rounding": info_data.get("rounding", 0.1)
+            }
+            _canvas_cache.put_settings(component["id"], component["currentSettings"])
+    
+    return {component_type: entry for component_type, entry in library.items() if entry}
 
 @server.tool("get_connections")
-def get_connections():
+async def get_connections(
+    refresh: bool = False,
+    fields: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    region: Optional[List[float]] = None,
+    connectivity: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
     """
     Get a list of all connections between components in the current document
     
+    Args:
+        refresh: Bypass the canvas cache and fetch fresh data from Grasshopper
+        fields: Only return these keys of each connection (e.g. ["sourceId", "targetId"])
+        exclude: Leave out these keys
+        types, region, connectivity: Only connections with an end at a component
+            matching these filters (see get_all_components)
+        cursor: nextCursor of the previous page
+        limit: Maximum number of connections in the page (default: all)
+    
     Returns:
-        List of all connections between components
+        List of the matching connections, their total number and nextCursor
+        (None on the last page)
     """
-    return send_to_grasshopper("get_connections")
+    try:
+        fields, exclude, types = parse_names(fields), parse_names(exclude), parse_names(types)
+        region = parse_region(region)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    filtered = bool(types or region or connectivity)
+    methods = ["get_connections", "get_all_components"] if filtered else ["get_connections"]
+    responses, _ = await _read_canvas(methods, refresh=refresh)
+    connections = responses[0]
+    if not is_success(connections) or not isinstance(connections.get("result"), list):
+        return connections
+    edges = connections["result"]
+    try:
+        if filtered:
+            components = responses[1].get("result") if is_success(responses[1]) else None
+            if not isinstance(components, list):
+                return responses[1]
+            graph = ConnectionGraph(edges)
+            selected = filter_components(components, graph, types, region, connectivity)
+            edges = filter_connections(edges, {component.get("id") for component in selected})
+        page, next_cursor = paginate(edges, cursor, limit, key=wire_key)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    response = dict(connections, result=list(map(projector(fields, exclude), page)))
+    response.update(total=len(edges), nextCursor=next_cursor, version=_canvas_cache.version)
+    return response
 
-@server.tool("search_components")
-def search_components(query: str):
+@server.tool("get_canvas_delta")
+async def get_canvas_delta(since_version: int = 0, refresh: bool = False):
     """
-    Search for components by name or category
+    Get the changes to the document since a version, instead of the whole canvas
+    
+    Every change made through the bridge is recorded with a version number.
+    Changes made directly in Grasshopper are found by comparing a fresh listing
+    with the last known state, once the cached listing expires (or with refresh).
     
     Args:
-        query: Search query
+        since_version: Version returned by an earlier call or by grasshopper://status
+            (0 returns the full state)
+        refresh: Re-read the canvas from Grasshopper first to pick up outside edits
     
     Returns:
-        List of components matching the search query
+        The current version and the changes after since_version, each with an op
+        (add, remove, move, update, connect, disconnect); or, with "full": true,
+        all components and connections when the change log does not reach back
+        that far
     """
-    params = {
-        "query": query
+    responses, _ = await _read_canvas(["get_all_components", "get_connections"], refresh=refresh)
+    failed = next((r for r in responses if not is_success(r)), None)
+    if failed is not None:
+        return failed
+    return {"success": True, "result": _canvas_cache.delta(since_version)}
+
+@server.tool("refresh_canvas")
+async def refresh_canvas():
+    """
+    Drop the bridge's cached canvas state and fetch it again from Grasshopper
+    
+    Use this after the document was edited directly in Grasshopper. Results
+    remembered for the document (before and after the refresh) are forgotten,
+    since edits outside the bridge can change them without changing the key.
+    
+    Returns:
+        Component and connection counts of the refreshed state and cache statistics
+    """
+    _canvas_cache.taint()
+    _canvas_cache.invalidate()
+    (doc_info, components, connections), _ = await _read_canvas(list(READ_METHODS), refresh=True)
+    solution = await _solution_state(fetch=False)
+    return {
+        "success": all(is_success(r) for r in (doc_info, components, connections)),
+        "components": len(components.get("result") or []),
+        "connections": len(connections.get("result") or []),
+        "cache": _canvas_cache.stats(),
+        "solutions": solution[0].stats() if solution is not None else None,
     }
+
+@server.tool("search_components")
+async def search_components(query: str, limit: int = 10):
+    """
+    Search for components by name or category
     
-    return send_to_grasshopper("search_components", params)
+    The search runs against the local knowledge base and tolerates typos and
+    partial names; it does not contact Grasshopper.
+    
+    Args:
+        query: Component name, alias, partial name or category
+        limit: Maximum number of results
+    
+    Returns:
+        Matching components, best first, each with a score between 0 and 1
+    """
+    results = get_component_resolver().search(query, limit=max(1, limit))
+    return {"success": True, "result": results}
 
 @server.tool("get_component_parameters")
-def get_component_parameters(component_type: str):
+async def get_component_parameters(component_type: str):
     """
     Get a list of parameters for a specific component type
     
@@ -561,10 +1226,10 @@ def get_component_parameters(component_type: str):
         "componentType": component_type
     }
     
-    return send_to_grasshopper("get_component_parameters", params)
+    return await send_to_grasshopper_async("get_component_parameters", params)
 
 @server.tool("validate_connection")
-def validate_connection(source_id: str, target_id: str, source_param: str = None, target_param: str = None):
+async def validate_connection(source_id: str, target_id: str, source_param: str = None, target_param: str = None):
     """
     Validate if a connection between two components is possible
     
@@ -588,80 +1253,591 @@ def validate_connection(source_id: str, target_id: str, source_param: str = None
     if target_param is not None:
         params["targetParam"] = target_param
 
-    return send_to_grasshopper("validate_connection", params)
+    return await send_to_grasshopper_async("validate_connection", params)
 
 @server.tool("execute_preview")
-def execute_preview():
+async def execute_preview():
     """Force a new solution preview in Grasshopper"""
-    return send_to_grasshopper("execute_preview")
+    return await send_to_grasshopper_async("execute_preview")
 
 @server.tool("execute_script")
-def execute_script(script: str):
+async def execute_script(script: str):
     """Execute a Rhino command script"""
     params = {"script": script}
-    return send_to_grasshopper("execute_script", params)
+    with priority(BULK, "script"):
+        return await send_to_grasshopper_async("execute_script", params)
 
 @server.tool("create_macro")
-def create_macro(name: str, macro: str):
+async def create_macro(name: str, macro: str):
     """Store a named Rhino macro"""
     params = {"name": name, "macro": macro}
-    return send_to_grasshopper("create_macro", params)
+    return await send_to_grasshopper_async("create_macro", params)
 
 @server.tool("run_macro")
-def run_macro(name: str = None, macro: str = None):
+async def run_macro(name: str = None, macro: str = None):
     """Run a stored or inline Rhino macro"""
     params = {}
     if name is not None:
         params["name"] = name
     if macro is not None:
         params["macro"] = macro
-    return send_to_grasshopper("run_macro", params)
+    with priority(BULK, "script"):
+        return await send_to_grasshopper_async("run_macro", params)
 
 @server.tool("snapshot")
-def snapshot(name: str = None):
+async def snapshot(name: str = None):
     """Create a snapshot of the current document"""
     params = {}
     if name is not None:
         params["name"] = name
-    return send_to_grasshopper("snapshot", params)
+    return await send_to_grasshopper_async("snapshot", params)
 
 @server.tool("revert_snapshot")
-def revert_snapshot(name: str):
+async def revert_snapshot(name: str):
     """Revert to a previously created snapshot"""
     params = {"name": name}
-    return send_to_grasshopper("revert_snapshot", params)
+    return await send_to_grasshopper_async("revert_snapshot", params)
+
+async def _request_geometry_page(
+    component_id: str,
+    offset: int,
+    limit: Optional[int],
+    output: Optional[str],
+    branch: Optional[str],
+    timeout: Optional[float],
+    encoding: str = "text",
+    refresh: bool = False,
+    solution: Optional[Tuple[SolutionCache, SolutionState, int]] = None,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"id": component_id, "offset": offset, "maxChars": GEOMETRY_PAGE_CHARS}
+    if encoding != "text":
+        params["encoding"] = encoding
+    if limit is not None:
+        params["limit"] = limit
+    if output is not None:
+        params["output"] = output
+    if branch is not None:
+        params["branch"] = branch
+    memo = _memo_key(solution, "get_geometry", params)
+    if memo is not None and not refresh:
+        cached = memo[0].get(memo[2])
+        if cached is not None:
+            return cached
+    response = await send_to_grasshopper_async("get_geometry", params, timeout=timeout)
+    # 請求期間有命令改動了文檔時，結果不一定屬於列出的狀態
+    if memo is not None and _geometry_result(response) is not None and _canvas_cache.mutations == solution[2]:
+        memo[0].put(memo[2], memo[1], response)
+    return response
+
+def _geometry_result(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not is_success(response):
+        return None
+    result = response.get("result") or response.get("data")
+    return result if isinstance(result, dict) else None
+
+async def iter_geometry(
+    component_id: str,
+    output: str = None,
+    branch: str = None,
+    page_size: int = GEOMETRY_PAGE_SIZE,
+    timeout: float = None,
+    encoding: str = "text",
+    refresh: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream the output data of a component page by page
+
+    The next page is requested while the caller processes the current one.
+    Listeners that do not page ``get_geometry`` are asked once and their reply
+    is paged locally. Pages are served from the memo of results when the
+    document, listed once for the whole iteration, was in the same state
+    before, unless ``refresh``. Pages are
+    requested as bulk work, so interactive requests are sent between them.
+
+    Yields:
+        Geometry pages (see grasshopper_mcp.geometry), or a single error response
+    """
+    async def request(offset: int) -> Dict[str, Any]:
+        with priority(BULK, ("geometry", component_id)):
+            return await _request_geometry_page(
+                component_id, offset, page_size, output, branch, timeout, encoding, refresh, solution
+            )
+
+    def fetch(offset: int) -> asyncio.Future:
+        return asyncio.ensure_future(request(offset))
+
+    # 所有分頁共用一次列出的文檔狀態
+    with priority(BULK, ("geometry", component_id)):
+        solution = await _solution_state()
+    pending = fetch(0)
+    try:
+        response = await pending
+        result = _geometry_result(response)
+        if result is None:
+            yield response
+            return
+        if not is_paged(result):
+            # 舊版監聽器一次返回全部數據，在本地分頁
+            offset = 0
+            while offset is not None:
+                page = page_outputs(component_id, result.get("outputs"), offset, page_size, GEOMETRY_PAGE_CHARS, output, branch)
+                yield page
+                offset = page["nextOffset"]
+            return
+        while True:
+            next_offset = result.get("nextOffset")
+            pending = fetch(next_offset) if next_offset is not None else None
+            yield result
+            if pending is None:
+                return
+            response = await pending
+            result = _geometry_result(response)
+            if result is None:
+                yield response
+                return
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
 
 @server.tool("get_geometry")
-def get_geometry(component_id: str):
-    """Get preview geometry data for a component"""
-    params = {"id": component_id}
-    return send_to_grasshopper("get_geometry", params)
+async def get_geometry(
+    component_id: str,
+    offset: int = 0,
+    limit: int = GEOMETRY_PAGE_SIZE,
+    output: str = None,
+    branch: str = None,
+    encoding: str = "text",
+    timeout: float = None,
+    refresh: bool = False,
+):
+    """
+    Get one page of preview geometry data for a component
+    
+    When the memo of results is enabled (GRASSHOPPER_MCP_SOLUTION_CACHE),
+    pages are remembered on disk by the state of the document (components,
+    wires and input values), so the same page in the same state is served
+    without asking Grasshopper again. The state does not cover script
+    source, internalized or referenced Rhino geometry or random seeds: pass
+    refresh after changing those.
+    
+    Args:
+        component_id: ID of the component
+        offset: Index of the first item (use nextOffset from the previous page)
+        limit: Maximum number of items to return
+        output: Only return the output with this name or index (optional)
+        branch: Only return the data tree branch with this path, e.g. "{0;1}" (optional)
+        encoding: "text" for stringified values, "binary" for base64 float64/int32
+            arrays of points, polylines and meshes
+        timeout: Timeout in seconds (optional)
+        refresh: Ask Grasshopper even if the page is remembered
+    
+    Returns:
+        The page with its outputs and branches, the total item count and
+        nextOffset (None on the last page)
+    """
+    if encoding not in ENCODINGS:
+        return {"success": False, "error": f"Unknown encoding '{encoding}', expected one of {list(ENCODINGS)}"}
+    solution = await _solution_state()
+    response = await _request_geometry_page(component_id, offset, limit, output, branch, timeout, encoding, refresh, solution)
+    result = _geometry_result(response)
+    if result is None or is_paged(result):
+        return response
+    page = page_outputs(component_id, result.get("outputs"), offset, limit, GEOMETRY_PAGE_CHARS, output, branch)
+    return {"success": True, "result": page}
+
+@server.tool("get_geometry_summary")
+async def get_geometry_summary(component_id: str, output: str = None, branch: str = None, timeout: float = None, refresh: bool = False):
+    """
+    Summarize the preview geometry of a component without returning its data
+    
+    Args:
+        component_id: ID of the component
+        output: Only summarize the output with this name or index (optional)
+        branch: Only summarize the data tree branch with this path (optional)
+        timeout: Timeout in seconds for each page (optional)
+        refresh: Ask Grasshopper even for remembered pages
+    
+    Returns:
+        Item counts per geometry type, vertex and face counts, bounding box and
+        centroid of all vertices
+    """
+    if np is None:
+        return {"success": False, "error": "numpy is required for geometry summaries"}
+    summary = GeometrySummary()
+    async for page in iter_geometry(component_id, output, branch, timeout=timeout, encoding="binary", refresh=refresh):
+        if "outputs" not in page:
+            return page
+        summary.add_page(page)
+    return {"success": True, "result": dict(summary.to_dict(), id=component_id)}
+
+@server.tool("run_sweep")
+async def run_sweep(
+    sliders: List[Dict[str, Any]],
+    outputs: List[str],
+    mode: str = "grid",
+    samples: int = None,
+    seed: int = 0,
+    path: str = None,
+    resume: bool = False,
+    preview: bool = True,
+    document: str = None,
+    instances: int = None,
+):
+    """
+    Start a parametric sweep over Number Sliders in the background
+    
+    Every sample sets the sliders, runs the preview and records a geometry
+    summary of each output component. Samples are sent several per batch with
+    the next batches already in flight, and results are saved to an .npz file
+    while the sweep runs (one array per column: inputs, done, failed,
+    item_count, vertex_count, face_count, truncated, bbox_min, bbox_max, centroid).
+    Batches are scheduled as bulk work and sized to take about
+    SCHEDULER_SLICE_SECONDS each, so other tool calls are answered between them.
+    With ``instances`` the samples are shared out over that many Grasshopper
+    instances of GRASSHOPPER_INSTANCES, which all load ``document`` first
+    (instances that already have it open are preferred and not reloaded).
+    Otherwise samples whose geometry is remembered from an earlier sweep of the
+    same document are not evaluated again. Sweeps of more than
+    SWEEP_MAX_SAMPLES samples are rejected.
+    
+    Args:
+        sliders: Sliders to vary, each {"id", "min", "max", "steps"} or {"id", "values": [...]}
+        outputs: IDs of the components whose geometry is recorded
+        mode: "grid" (all combinations), "random" (uniform) or "lhs" (Latin hypercube)
+        samples: Number of samples for "random" and "lhs"
+        seed: Random seed for "random" and "lhs"
+        path: .npz file for the results (default: a new file in SWEEP_DIR)
+        resume: Continue the sweep saved in path with the samples not done yet
+        preview: Run execute_preview after setting the sliders of each sample
+        document: .gh file to load before sweeping (kept for resume)
+        instances: Number of Grasshopper instances to shard the sweep over
+    
+    Returns:
+        The sweep status, including its id for get_sweep_status and cancel_sweep
+    """
+    if np is None:
+        return {"success": False, "error": "numpy is required for sweeps"}
+    job_id = uuid.uuid4().hex[:12]
+    path = os.path.abspath(path or os.path.join(SWEEP_DIR, f"sweep-{job_id}.npz"))
+    if any(job.path == path and job.state == "running" for job in _sweeps.values()):
+        return {"success": False, "error": f"A sweep is already writing to {path}"}
+    if resume and os.path.exists(path):
+        try:
+            results = SweepResults.load(path)
+        except Exception as e:
+            return {"success": False, "error": f"Cannot resume from {path}: {e}"}
+    else:
+        errors = validate_sliders(sliders, mode, samples, SWEEP_MAX_SAMPLES)
+        if not outputs:
+            errors.append("At least one output component is required")
+        if errors:
+            return {"success": False, "errors": errors}
+        spec = {"sliders": sliders, "outputs": outputs, "mode": mode, "samples": samples, "seed": seed, "document": document}
+        results = SweepResults(spec, plan_samples(sliders, mode, samples, seed, SWEEP_MAX_SAMPLES))
+    document = document or results.spec.get("document")
+    addresses = [f"{GRASSHOPPER_HOST}:{GRASSHOPPER_PORT}"]
+    memo, state = None, None
+    if instances:
+        chosen = await _prepare_instances(instances, document)
+        if not chosen:
+            return {"success": False, "error": "No healthy Grasshopper instance could load the document" if document else "No healthy Grasshopper instance"}
+        senders = [_bulk_sender(_instance_sender(instance), ("sweep", job_id)) for instance in chosen]
+        addresses = [instance.address for instance in chosen]
+    else:
+        senders = _bulk_sender(_send_sweep_batch, ("sweep", job_id))
+        if document:
+            loaded = await send_to_grasshopper_async("load_document", {"path": document})
+            if not is_success(loaded):
+                return {"success": False, "error": f"Failed to load document: {loaded.get('error') or loaded.get('message', 'Unknown error')}"}
+            _note_document(document)
+        # 只在自己的畫布上記憶結果，它的狀態由畫布緩存跟蹤
+        memo, state, _ = await _solution_state() or (None, None, None)
+    changed = _canvas_cache.watch(results.slider_ids) if state is not None else None
+    job = SweepJob(
+        job_id,
+        results,
+        path,
+        senders,
+        samples_per_batch=SWEEP_SAMPLES_PER_BATCH,
+        pipeline_depth=SWEEP_PIPELINE_DEPTH,
+        max_items=SWEEP_MAX_ITEMS,
+        preview=preview,
+        memo=memo,
+        solution=state,
+        changed=changed,
+        slice_seconds=SCHEDULER_SLICE_SECONDS,
+    )
+    _sweeps[job_id] = job.start()
+    return {"success": True, "result": dict(job.status(), instances=addresses)}
+
+async def _prepare_instances(count: int, document: Optional[str]) -> List[Instance]:
+    """Pick up to ``count`` healthy instances and load ``document`` on those that do not have it open."""
+    pool = _get_instance_pool()
+    chosen = await pool.select(count, document)
+    if not document:
+        return chosen
+
+    async def load(instance: Instance) -> bool:
+        if instance.document == document:
+            return True
+        try:
+            (loaded,) = await send_batch_to_instance(instance, [("load_document", {"path": document})])
+        except Exception as e:
+            pool.mark_failed(instance, e)
+            return False
+        return is_success(loaded)
+
+    loaded = await asyncio.gather(*[load(instance) for instance in chosen])
+    return [instance for instance, ok in zip(chosen, loaded) if ok]
+
+def _instance_sender(instance: Instance):
+    """send_batch for a sweep shard; a failing instance is marked unhealthy before the error propagates."""
+    async def send(calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        try:
+            return await send_batch_to_instance(instance, calls)
+        except Exception as e:
+            _get_instance_pool().mark_failed(instance, e)
+            raise
+    return send
+
+def _bulk_sender(send, flow):
+    """A send_batch whose batches are scheduled as bulk work of ``flow``."""
+    async def send_bulk(calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        with priority(BULK, flow):
+            return await send(calls)
+    return send_bulk
+
+@server.tool("get_sweep_status")
+async def get_sweep_status(sweep_id: str = None):
+    """
+    Get the progress of a sweep, or of all sweeps of this session
+    
+    Args:
+        sweep_id: ID returned by run_sweep (optional)
+    
+    Returns:
+        State (running, completed, cancelled, failed), completed and total
+        samples, throughput, estimated time left and the results path
+    """
+    if sweep_id is None:
+        return {"success": True, "result": [job.status() for job in _sweeps.values()]}
+    job = _sweeps.get(sweep_id)
+    if job is None:
+        return {"success": False, "error": f"Unknown sweep '{sweep_id}'"}
+    return {"success": True, "result": job.status()}
+
+@server.tool("cancel_sweep")
+async def cancel_sweep(sweep_id: str):
+    """
+    Stop a running sweep; completed samples stay in its results file
+    
+    Args:
+        sweep_id: ID returned by run_sweep
+    
+    Returns:
+        The final status of the sweep; pass its path to run_sweep with resume=True to continue it
+    """
+    job = _sweeps.get(sweep_id)
+    if job is None:
+        return {"success": False, "error": f"Unknown sweep '{sweep_id}'"}
+    job.cancel()
+    await job.wait()
+    return {"success": True, "result": job.status()}
+
+@server.tool("get_instances")
+async def get_instances(refresh: bool = False):
+    """
+    List the Grasshopper instances used for parallel work (GRASSHOPPER_INSTANCES)
+    
+    Args:
+        refresh: Check every instance now instead of reusing recent health checks
+    
+    Returns:
+        Per instance: address, health, check latency, open document, work in
+        progress, completed work items and failures
+    """
+    pool = _get_instance_pool()
+    await pool.healthy(force=refresh)
+    return {"success": True, "result": pool.status()}
+
+@server.tool("evaluate_documents")
+async def evaluate_documents(paths: List[str], outputs: List[str] = None, preview: bool = True, instances: int = None):
+    """
+    Load and evaluate saved .gh documents in parallel over the Grasshopper instances
+    
+    Each document is loaded on the next free instance of GRASSHOPPER_INSTANCES,
+    its preview is run and the geometry of the given outputs is summarized.
+    Documents of an instance that stops answering are evaluated on the others.
+    
+    Args:
+        paths: .gh files to evaluate
+        outputs: IDs of the components whose geometry is summarized (optional)
+        preview: Run execute_preview after loading each document
+        instances: Use at most this many instances (default: all healthy ones)
+    
+    Returns:
+        One entry per document, in the order of paths: the instance that
+        evaluated it, the document info and a geometry summary per output
+    """
+    outputs = outputs or []
+    if outputs and np is None:
+        return {"success": False, "error": "numpy is required for geometry summaries"}
+
+    async def evaluate(instance: Instance, path: str) -> Dict[str, Any]:
+        calls = [("load_document", {"path": path})]
+        if preview:
+            calls.append(("execute_preview", {}))
+        calls.append(("get_document_info", {}))
+        calls.extend(
+            ("get_geometry", {"id": output_id, "offset": 0, "limit": EVALUATE_MAX_ITEMS, "encoding": "binary"})
+            for output_id in outputs
+        )
+        with priority(BULK, "evaluate"):
+            responses = await send_batch_to_instance(instance, calls)
+        entry: Dict[str, Any] = {"path": path, "instance": instance.address}
+        if not is_success(responses[0]):
+            # 文檔沒有加載，後面的結果屬於之前打開的文檔
+            return dict(entry, success=False, error=responses[0].get("error") or responses[0].get("message", "Failed to load document"))
+        info = responses[len(calls) - len(outputs) - 1]
+        entry["document"] = (info.get("result") or info.get("data")) if is_success(info) else None
+        entry["outputs"] = {}
+        errors = []
+        for output_id, response in zip(outputs, responses[len(calls) - len(outputs):]):
+            result = _geometry_result(response)
+            if result is None:
+                errors.append(f"{output_id}: {response.get('error') or 'invalid geometry reply'}")
+                continue
+            summary, truncated = summarize_reply(output_id, result, EVALUATE_MAX_ITEMS)
+            entry["outputs"][output_id] = dict(summary, truncated=truncated)
+        entry["success"] = not errors
+        if errors:
+            entry["errors"] = errors
+        return entry
+
+    results = await _get_instance_pool().map(paths, evaluate, instances=instances)
+    return {"success": all(is_success(result) for result in results), "result": results}
+
+@server.resource("grasshopper://geometry/{component_id}/{offset}")
+async def get_geometry_page(component_id: str, offset: str):
+    """Page of preview geometry data for a component starting at item ``offset``"""
+    return await get_geometry(component_id, offset=int(offset))
 
 @server.tool("run_gh_python")
-def run_gh_python(script: str):
-    """Execute Python script inside Rhino"""
+async def run_gh_python(script: str, timeout: float = None):
+    """Execute Python script inside Rhino (timeout in seconds is optional)"""
     params = {"script": script}
-    return send_to_grasshopper("run_gh_python", params)
+    with priority(BULK, "script"):
+        return await send_to_grasshopper_async("run_gh_python", params, timeout=timeout)
+
+# 狀態資源中給出的建議
+STATUS_RECOMMENDATIONS = [
+    "When needing a simple numeric input control, ALWAYS use 'Number Slider', not MD Slider",
+    "For vector inputs (like 3D points), use 'MD Slider' or 'Construct Point' with multiple Number Sliders",
+    "Use 'Panel' to display outputs and debug values",
+    "When connecting multiple sliders to Addition, first slider goes to input A, second to input B"
+]
 
 # 註冊 MCP 資源
 @server.resource("grasshopper://status")
-def get_grasshopper_status():
-    """Get Grasshopper status"""
+async def get_grasshopper_status():
+    """
+    Summary of the Grasshopper document
+
+    The document info, the number of components and connections, the number
+    of components per type and the canvas version. The counts come from the
+    canvas cache while its listings are fresh, else from the document info,
+    so the summary never fetches the full listings; the number of connections
+    is None when they are not cached. The details are in the listing at
+    grasshopper://status/{query} and, one at a time, in
+    grasshopper://component/{component_id},
+    grasshopper://component/{component_id}/geometry and grasshopper://type/{name}.
+    """
+    try:
+        (doc_info,), _ = await _read_canvas(["get_document_info"])
+        if not is_success(doc_info):
+            raise RuntimeError(doc_info.get("error"))
+        document = doc_info.get("result")
+        document = document if isinstance(document, dict) else {}
+        listed = document.get("components")
+        # 文檔信息中的組件列表只在列表資源中返回
+        document = {key: value for key, value in document.items() if key != "components"}
+        counts = _canvas_cache.counts()
+        if counts is not None and _canvas_cache.fresh("get_all_components") and _canvas_cache.fresh("get_connections"):
+            component_count, connection_count, types = counts
+        else:
+            listed = listed if isinstance(listed, list) else []
+            component_count = document.get("componentCount", len(listed))
+            connection_count = counts[1] if counts is not None and _canvas_cache.fresh("get_connections") else None
+            types = dict(collections.Counter(component.get("type", "") for component in listed).most_common())
+        summary = f"Current canvas has {component_count} components"
+        if connection_count is not None:
+            summary += f" and {connection_count} connections"
+        return {
+            "status": "Connected to Grasshopper",
+            "version": _canvas_cache.version,
+            "document": document,
+            "components": component_count,
+            "connections": connection_count,
+            "types": types,
+            "resources": [
+                "grasshopper://status/{query}",
+                "grasshopper://component/{component_id}",
+                "grasshopper://component/{component_id}/geometry",
+                "grasshopper://type/{name}",
+            ],
+            "recommendations": STATUS_RECOMMENDATIONS,
+            "canvas_summary": summary,
+        }
+    except Exception as e:
+        logger.exception("Error getting Grasshopper status: %s", e)
+        return {
+            "status": f"Error: {str(e)}",
+            "document": {},
+            "components": 0,
+            "connections": 0
+        }
+
+@server.resource("grasshopper://status/{query}")
+async def get_grasshopper_status_query(query: str):
+    """
+    Grasshopper status for part of the canvas
+
+    query is a URL query string with the get_all_components options: fields,
+    exclude, types and region (comma separated), connectivity, cursor and limit,
+    e.g. grasshopper://status/types=Number%20Slider&fields=id,settings&limit=50.
+    A query without options (grasshopper://status/all) lists the whole canvas.
+    """
+    options = {name: values[-1] for name, values in urllib.parse.parse_qs(query).items()}
+    return await _grasshopper_status(options)
+
+async def _grasshopper_status(options: Dict[str, str]) -> Dict[str, Any]:
     try:
-        # 獲取文檔信息
-        doc_info = send_to_grasshopper("get_document_info")
+        fields, exclude, types = (parse_names(options.get(name)) for name in ("fields", "exclude", "types"))
+        region = parse_region(options.get("region"))
+        connectivity = options.get("connectivity") or None
+        limit = int(options["limit"]) if options.get("limit") else None
         
-        # 獲取所有組件（使用增強版的 get_all_components）
-        components_result = get_all_components()
+        # 通過畫布緩存獲取文檔信息、所有組件和所有連接（未命中的在一個批次中請求），再補充組件詳情
+        (doc_info, components_result, connections), _ = await _read_canvas(list(READ_METHODS))
+        graph = ConnectionGraph.from_response(connections)
+        version = _canvas_cache.version
         components = components_result.get("result", []) if components_result else []
+        all_connections = connections.get("result", []) if connections else []
+        canvas_count = len(components)
+        components = filter_components(components, graph, types, region, connectivity)
+        total = len(components)
+        components, next_cursor = paginate(components, options.get("cursor"), limit)
+        if wants("settings", fields, exclude):
+            await _enrich_components(components, graph, fields=["currentSettings"])
         
-        # 獲取所有連接
-        connections = send_to_grasshopper("get_connections")
-        
-        # 添加常用組件的提示信息
+        # 添加畫布上出現的組件類型的提示信息（每種類型一次）
         component_hints = load_knowledge_base().get("componentHints", {})
+        if isinstance(component_hints, dict):
+            listed_types = {component.get("type") for component in components}
+            component_hints = {name: hint for name, hint in component_hints.items() if name in listed_types}
         
         # 為每個組件添加當前參數值的摘要
+        project_summary = projector(fields, exclude)
         component_summaries = []
         for component in components:
             summary = {
@@ -686,10 +1862,11 @@ def get_grasshopper_status():
                 }
             
             # 添加連接信息摘要
-            if "connections" in component:
+            component_id = component.get("id")
+            if component_id is not None and wants("connections", fields, exclude):
                 conn_summary = []
-                for conn in component["connections"]:
-                    if conn.get("sourceId") == component.get("id"):
+                for conn in graph.related(component_id):
+                    if conn.get("sourceId") == component_id:
                         conn_summary.append({
                             "type": "output",
                             "to": conn.get("targetId", ""),
@@ -707,25 +1884,35 @@ def get_grasshopper_status():
                 if conn_summary:
                     summary["connections"] = conn_summary
             
-            component_summaries.append(summary)
+            component_summaries.append(project_summary(summary))
+        
+        # 只列出部分組件時，只返回與這些組件相關的連接
+        if not wants("connections", fields, exclude):
+            listed_connections = []
+        elif options:
+            listed_connections = filter_connections(all_connections, {component.get("id") for component in components})
+        else:
+            listed_connections = all_connections
+        
+        document = doc_info.get("result", {})
+        if options and isinstance(document, dict) and "components" in document:
+            # 文檔信息中的組件列表與 components 重複，只列出部分組件時不返回
+            document = {key: value for key, value in document.items() if key != "components"}
         
         return {
             "status": "Connected to Grasshopper",
-            "document": doc_info.get("result", {}),
+            "version": version,
+            "document": document,
             "components": component_summaries,
-            "connections": connections.get("result", []),
+            "total": total,
+            "nextCursor": next_cursor,
+            "connections": listed_connections,
             "component_hints": component_hints,
-            "recommendations": [
-                "When needing a simple numeric input control, ALWAYS use 'Number Slider', not MD Slider",
-                "For vector inputs (like 3D points), use 'MD Slider' or 'Construct Point' with multiple Number Sliders",
-                "Use 'Panel' to display outputs and debug values",
-                "When connecting multiple sliders to Addition, first slider goes to input A, second to input B"
-            ],
-            "canvas_summary": f"Current canvas has {len(component_summaries)} components and {len(connections.get('result', []))} connections"
+            "recommendations": STATUS_RECOMMENDATIONS,
+            "canvas_summary": f"Current canvas has {canvas_count} components and {len(all_connections)} connections"
         }
     except Exception as e:
-        print(f"Error getting Grasshopper status: {str(e)}", file=sys.stderr)
-        traceback.print_exc(file=sys.stderr)
+        logger.exception("Error getting Grasshopper status: %s", e)
         return {
             "status": f"Error: {str(e)}",
             "document": {},
@@ -733,6 +1920,83 @@ def get_grasshopper_status():
             "connections": []
         }
 
+@server.resource("grasshopper://component/{component_id}")
+async def get_component_resource(component_id: str):
+    """
+    One component of the canvas
+
+    Its type, position, current settings and connections, with the library
+    details of its type. Read through the canvas cache, so a warm cache answers
+    without a round trip; only slider settings that are not cached are fetched.
+    """
+    component_id = urllib.parse.unquote(component_id)
+    if not (_canvas_cache.fresh("get_all_components") and _canvas_cache.fresh("get_connections")):
+        # 緩存過期時重新讀取列表，之後從緩存的組件和連接中取出這一個組件
+        for response in (await _read_canvas(["get_all_components", "get_connections"]))[0]:
+            if not is_success(response):
+                return response
+    component = _canvas_cache.component(component_id)
+    if component is None:
+        return {"success": False, "error": f"Component with ID {component_id} not found"}
+    library = await _enrich_components([component], ConnectionGraph(_canvas_cache.related(component_id)))
+    component_type = component.get("type", "")
+    component.update(library.get(component_type, {}))
+    return {
+        "success": True,
+        "result": component,
+        "version": _canvas_cache.version,
+        "resources": {
+            "geometry": f"grasshopper://component/{urllib.parse.quote(component_id, safe='')}/geometry",
+            "type": f"grasshopper://type/{urllib.parse.quote(component_type, safe='')}",
+        },
+    }
+
+@server.resource("grasshopper://component/{component_id}/geometry")
+async def get_component_geometry_resource(component_id: str):
+    """
+    Summary of the preview geometry of a component
+
+    Item counts per geometry type, vertex and face counts, bounding box and
+    centroid, computed when read (see get_geometry_summary) from pages the memo
+    of results may already hold. The data itself is paged at
+    grasshopper://geometry/{component_id}/{offset}.
+    """
+    component_id = urllib.parse.unquote(component_id)
+    summary = await get_geometry_summary(component_id)
+    if is_success(summary):
+        summary["pages"] = f"grasshopper://geometry/{urllib.parse.quote(component_id, safe='')}/0"
+    return summary
+
+@server.resource("grasshopper://type/{name}")
+async def get_type_resource(name: str):
+    """
+    One component type
+
+    Its library entry (settings, inputs, outputs, examples, common issues) and
+    hints from the knowledge base, and the ids of the components of this type on
+    the canvas. The URL-encoded name is resolved like add_component resolves
+    types, so aliases and close misspellings work.
+    """
+    name = urllib.parse.unquote(name)
+    component_type = normalize_component_type(name)
+    entry = get_component_index().lookup(component_type)
+    (listing,), _ = await _read_canvas(["get_all_components"])
+    if not is_success(listing):
+        return listing
+    ids = [
+        component.get("id") for component in listing.get("result") or []
+        if isinstance(component, dict) and component.get("type") == component_type
+    ]
+    if entry is None and not ids:
+        suggestions = [item["name"] for item in get_component_resolver().search(name, limit=5)]
+        return {"success": False, "error": f"Unknown component type: {name}", "suggestions": suggestions}
+    result = dict(entry or {}, name=component_type)
+    component_hints = load_knowledge_base().get("componentHints", {})
+    if isinstance(component_hints, dict) and component_type in component_hints:
+        result["hints"] = component_hints[component_type]
+    result["components"] = ids
+    return {"success": True, "result": result, "version": _canvas_cache.version}
+
 @server.resource("grasshopper://component_guide")
 def get_component_guide():
     """Get guide for Grasshopper components and connections"""
@@ -748,17 +2012,33 @@ def get_component_hints():
     """Get common hints for Grasshopper components"""
     return load_knowledge_base().get("componentHints", {})
 
+@server.resource("grasshopper://metrics")
+def get_metrics():
+    """Latency percentiles, round trips, payload sizes and error counts per tool and per request method,
+    and the depth and wait times of the scheduler queues per listener and priority class"""
+    return _metrics.snapshot()
+
+@server.resource("grasshopper://metrics/prometheus", mime_type="text/plain")
+def get_metrics_prometheus():
+    """The bridge metrics in the Prometheus text exposition format"""
+    return _metrics.prometheus()
+
 def main():
     """Main entry point for the Grasshopper MCP Bridge Server"""
+    logger.setLevel(LOG_LEVEL.upper())
     try:
         # 啟動 MCP 服務器
-        print("Starting Grasshopper MCP Bridge Server...", file=sys.stderr)
-        print("Please add this MCP server to Claude Desktop", file=sys.stderr)
+        logger.info("Starting Grasshopper MCP Bridge Server...")
+        logger.info("Please add this MCP server to Claude Desktop")
+        # 知識庫在後台載入，與客戶端握手同時進行
+        _get_knowledge_store().reload()
         server.run()
     except Exception as e:
-        print(f"Error starting MCP server: {str(e)}", file=sys.stderr)
-        traceback.print_exc(file=sys.stderr)
+        logger.exception("Error starting MCP server: %s", e)
         sys.exit(1)
+    finally:
+        if _trace_recorder is not None:
+            _trace_recorder.close()
 
 if __name__ == "__main__":
     main()
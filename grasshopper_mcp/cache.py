@@ -0,0 +1,544 @@
+"""
+Client-side cache of canvas state read from Grasshopper.
+
+The cache holds the raw responses of the read commands ``get_document_info``,
+``get_all_components`` and ``get_connections``. Responses expire after a TTL.
+Whenever the bridge sends a mutating command, the cache is patched in place
+(add, delete, move, value changes and connections) or the affected entries are
+invalidated.
+
+Besides the expiring responses, the cache keeps a mirror of the last known
+components and connections and a versioned change log. Every patch applied for
+a command of the bridge is recorded as a change; changes made outside the bridge
+show up when a fresh listing is diffed against the mirror. ``delta`` returns the
+changes after a given version, so clients can follow the document without
+re-reading it.
+
+The mirror also yields the key of the current solution (``solution_key``): a
+hash of the component graph and a hash of its input values, used by the bridge
+to memoize results. Commands whose effect does not show in the listing (scripts,
+macros, loading a document) taint the graphs they ran on.
+"""
+
+import collections
+import hashlib
+import json
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+READ_METHODS: Tuple[str, ...] = ("get_document_info", "get_all_components", "get_connections")
+
+# Entries invalidated by each mutating command that cannot be patched in place
+MUTATING_METHODS: Dict[str, Tuple[str, ...]] = {
+    "add_component": ("get_document_info", "get_all_components"),
+    "delete_component": READ_METHODS,
+    "move_component": ("get_all_components",),
+    "connect_components": ("get_connections",),
+    "set_component_value": ("get_all_components",),
+    "create_pattern": READ_METHODS,
+    "clear_document": READ_METHODS,
+    "load_document": READ_METHODS,
+    "revert_snapshot": READ_METHODS,
+    "run_macro": READ_METHODS,
+    "execute_script": READ_METHODS,
+    "run_gh_python": READ_METHODS,
+}
+
+
+# Commands that can change the solution without changing the component listing
+OPAQUE_METHODS: Tuple[str, ...] = (
+    "execute_script",
+    "run_gh_python",
+    "run_macro",
+    "load_document",
+    "revert_snapshot",
+    "create_pattern",
+    "clear_document",
+)
+
+# Fields of a component listing that are not document state
+_POSITION_FIELDS = ("x", "y")
+# Fields of a component listing that are inputs of the solution rather than its structure
+_INPUT_FIELDS = ("value", "min", "max", "rounding")
+
+
+def _canonical_input(value: Any) -> Any:
+    """Compare "2", 2 and 2.0 as the same slider value."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _digest(value: Any) -> str:
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+_HASH_MODULUS = 1 << 256
+
+
+def _input_hash(component_id: str, fields: Dict[str, Any]) -> int:
+    return int(_digest([component_id, fields]), 16)
+
+
+def connection_key(connection: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """Identity of a wire: its end components and parameters (names, else indices)."""
+    def param(side: str) -> Any:
+        name = connection.get(f"{side}Param")
+        return name if name is not None else connection.get(f"{side}ParamIndex")
+
+    return (connection.get("sourceId"), param("source"), connection.get("targetId"), param("target"))
+
+
+def is_success(response: Any) -> bool:
+    return isinstance(response, dict) and response.get("success", True) is not False
+
+
+def _copy_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a response deep enough that callers can annotate its items."""
+    copied = dict(response)
+    result = copied.get("result")
+    if isinstance(result, list):
+        copied["result"] = [dict(item) if isinstance(item, dict) else item for item in result]
+    elif isinstance(result, dict):
+        copied["result"] = dict(result)
+    return copied
+
+
+class SolutionState:
+    """Hashes identifying the solution of a document.
+
+    ``graph`` covers the components without their positions and input values,
+    and the wires. The inputs hash is the sum of one hash per component with
+    input values, so that ``key`` can replace the values of a few components
+    without hashing all the others again.
+    """
+
+    def __init__(self, version: int, components: Dict[Any, Dict[str, Any]], connections: Dict[Tuple[Hashable, ...], Any]):
+        self.version = version
+        self.graph = _digest([
+            sorted(
+                [str(component_id), {k: v for k, v in c.items() if k not in _POSITION_FIELDS + _INPUT_FIELDS}]
+                for component_id, c in components.items()
+            ),
+            sorted(json.dumps(key, default=str) for key in connections),
+        ])
+        self._inputs: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, int] = {}
+        for component_id, c in components.items():
+            fields = {k: _canonical_input(c[k]) for k in _INPUT_FIELDS if k in c}
+            if fields:
+                self._inputs[str(component_id)] = fields
+                self._hashes[str(component_id)] = _input_hash(str(component_id), fields)
+        self._total = sum(self._hashes.values()) % _HASH_MODULUS
+
+    def key(self, overrides: Optional[Dict[Any, Any]] = None) -> Tuple[str, str]:
+        """(graph hash, inputs hash), with the components in ``overrides`` set to the given values."""
+        total = self._total
+        for component_id, value in (overrides or {}).items():
+            component_id = str(component_id)
+            fields = dict(self._inputs.get(component_id, {}), value=_canonical_input(value))
+            total += _input_hash(component_id, fields) - self._hashes.get(component_id, 0)
+        return self.graph, f"{total % _HASH_MODULUS:064x}"
+
+
+class CanvasCache:
+    """TTL cache of canvas read responses with mutation-aware invalidation.
+
+    Args:
+        ttl: Seconds a cached response stays valid; None keeps it until it is
+            invalidated, 0 disables caching
+        log_size: Number of changes kept for ``delta``; older versions get the
+            full state instead
+    """
+
+    def __init__(self, ttl: Optional[float] = 10.0, log_size: int = 10000):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.patches = 0
+        # Commands that may have changed the document, patched or not
+        self.mutations = 0
+        # Last known document state, kept when the responses above expire
+        self._components: Optional[Dict[Any, Dict[str, Any]]] = None
+        self._connections: Optional[Dict[Tuple[Hashable, ...], Dict[str, Any]]] = None
+        # Current settings of sliders, read with get_component_info
+        self._settings: Dict[Any, Tuple[float, Dict[str, Any]]] = {}
+        self.version = 0
+        self._log: Deque[Dict[str, Any]] = collections.deque(maxlen=log_size)
+        # delta(since) can be answered from the log for any since >= _floor
+        self._floor = 0
+        self._solution: Optional[SolutionState] = None
+        self._tainted: Set[str] = set()
+        self._taint_next = False
+
+    def get(self, method: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for ``method`` if still fresh."""
+        entry = self._entries.get(method)
+        if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+            self.hits += 1
+            return _copy_response(entry[1])
+        self._entries.pop(method, None)
+        self.misses += 1
+        return None
+
+    def fresh(self, method: str) -> bool:
+        """Whether a response for ``method`` is cached and still valid (without counting a hit)."""
+        entry = self._entries.get(method)
+        return entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl)
+
+    def put(self, method: str, response: Dict[str, Any]) -> None:
+        if method not in READ_METHODS or not is_success(response):
+            return
+        result = response.get("result")
+        if method == "get_all_components" and isinstance(result, list):
+            self._sync_components(result)
+        elif method == "get_connections" and isinstance(result, list):
+            self._sync_connections(result)
+        if self.ttl != 0:
+            self._entries[method] = (time.monotonic(), _copy_response(response))
+
+    def invalidate(self, *methods: str) -> None:
+        """Drop cached responses for ``methods`` (all of them when none given)."""
+        for method in methods or READ_METHODS:
+            if self._entries.pop(method, None) is not None:
+                self.invalidations += 1
+        if not methods or "get_all_components" in methods:
+            self._settings.clear()
+
+    def observe(self, method: str, params: Optional[Dict[str, Any]], response: Any) -> None:
+        """Update the cache after ``method`` was sent to Grasshopper."""
+        affected = MUTATING_METHODS.get(method)
+        if affected is None:
+            return
+        self.mutations += 1
+        if method in OPAQUE_METHODS:
+            # Even a failed script may have run in part
+            self.taint()
+        params = params or {}
+        if is_success(response):
+            result = response.get("result")
+            result = result if isinstance(result, dict) else {}
+            if method == "delete_component" and self._patch_delete(params.get("id")):
+                return
+            if method == "move_component" and self._patch_move(params.get("id"), params.get("x"), params.get("y")):
+                return
+            if method == "add_component" and self._patch_add(result):
+                return
+            if method == "set_component_value" and self._patch_value(params.get("id"), result, params.get("value")):
+                return
+            if method == "connect_components" and self._patch_connect(dict(params, **{
+                key: result[key] for key in ("sourceParam", "targetParam") if result.get(key) is not None
+            })):
+                return
+        self.invalidate(*affected)
+
+    # Change log
+
+    def _record(self, op: str, **change: Any) -> None:
+        self.version += 1
+        if len(self._log) == self._log.maxlen:
+            self._floor = self._log[0]["version"]
+        self._log.append(dict(change, op=op, version=self.version))
+
+    def _start(self) -> None:
+        """First listing of a kind: earlier versions can only get the full state."""
+        self.version += 1
+        self._floor = self.version
+
+    def _sync_components(self, components: List[Dict[str, Any]]) -> None:
+        """Diff a fresh component listing against the mirror and log the changes."""
+        fresh = {c.get("id"): dict(c) for c in components if isinstance(c, dict)}
+        if self._components is None:
+            self._components = fresh
+            self._start()
+            return
+        for component_id, component in self._components.items():
+            if component_id not in fresh:
+                self._record("remove", id=component_id)
+                self._settings.pop(component_id, None)
+        for component_id, component in fresh.items():
+            known = self._components.get(component_id)
+            if known is None:
+                self._record("add", component=component)
+                continue
+            if any(known.get(f) != component.get(f) for f in _POSITION_FIELDS):
+                self._record("move", id=component_id, x=component.get("x"), y=component.get("y"))
+            fields = {
+                key: value for key, value in component.items()
+                if key not in _POSITION_FIELDS and known.get(key) != value
+            }
+            if fields:
+                self._record("update", id=component_id, fields=fields)
+        self._components = fresh
+
+    def _sync_connections(self, connections: List[Dict[str, Any]]) -> None:
+        fresh = {connection_key(c): dict(c) for c in connections if isinstance(c, dict)}
+        if self._connections is None:
+            self._connections = fresh
+            self._start()
+            return
+        for key, connection in self._connections.items():
+            if key not in fresh:
+                self._record("disconnect", connection=connection)
+        for key, connection in fresh.items():
+            if key not in self._connections:
+                self._record("connect", connection=connection)
+        self._connections = fresh
+
+    def delta(self, since: int) -> Dict[str, Any]:
+        """
+        Changes of the document after version ``since``
+
+        Returns ``{"version", "since", "changes"}``, where every change has an
+        ``op`` (add, remove, move, update, connect, disconnect) and its version.
+        When the log no longer reaches back to ``since`` (or ``since`` is from
+        another session), the full known state is returned instead, with
+        ``"full": True``.
+        """
+        if self._floor <= since <= self.version:
+            changes = [change for change in self._log if change["version"] > since]
+            return {"version": self.version, "since": since, "full": False, "changes": changes}
+        return {
+            "version": self.version,
+            "since": since,
+            "full": True,
+            "components": list((self._components or {}).values()),
+            "connections": list((self._connections or {}).values()),
+        }
+
+    # Single components
+
+    def component(self, component_id: Any) -> Optional[Dict[str, Any]]:
+        """A copy of a component from the last known listing, None when it is not listed.
+
+        Up to date while ``fresh("get_all_components")``; costs no copy of the listing.
+        """
+        known = self._components.get(component_id) if self._components is not None else None
+        return dict(known) if known is not None else None
+
+    def counts(self) -> Optional[Tuple[int, int, Dict[str, int]]]:
+        """Components, connections and components per type of the mirror, None when it is unknown."""
+        if self._components is None or self._connections is None:
+            return None
+        types = collections.Counter(component.get("type", "") for component in self._components.values())
+        return len(self._components), len(self._connections), dict(types.most_common())
+
+    def related(self, component_id: Any) -> List[Dict[str, Any]]:
+        """Copies of the last known connections with an end at ``component_id``."""
+        return [
+            dict(connection) for connection in (self._connections or {}).values()
+            if component_id in (connection.get("sourceId"), connection.get("targetId"))
+        ]
+
+    # Slider settings
+
+    def get_settings(self, component_id: Any) -> Optional[Dict[str, Any]]:
+        entry = self._settings.get(component_id)
+        if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+            return dict(entry[1])
+        self._settings.pop(component_id, None)
+        return None
+
+    def put_settings(self, component_id: Any, settings: Dict[str, Any]) -> None:
+        if self.ttl != 0:
+            self._settings[component_id] = (time.monotonic(), dict(settings))
+
+    def _cached_list(self, method: str) -> Optional[list]:
+        entry = self._entries.get(method)
+        if entry is None or not isinstance(entry[1].get("result"), list):
+            return None
+        return entry[1]["result"]
+
+    def _patch_delete(self, component_id: Any) -> bool:
+        if component_id is None:
+            return False
+        components = self._cached_list("get_all_components")
+        if components is not None:
+            components[:] = [c for c in components if c.get("id") != component_id]
+        connections = self._cached_list("get_connections")
+        if connections is not None:
+            connections[:] = [
+                c for c in connections
+                if c.get("sourceId") != component_id and c.get("targetId") != component_id
+            ]
+        if self._connections is not None:
+            for key, connection in list(self._connections.items()):
+                if component_id in (connection.get("sourceId"), connection.get("targetId")):
+                    del self._connections[key]
+                    self._record("disconnect", connection=connection)
+        if self._components is not None and self._components.pop(component_id, None) is not None:
+            self._record("remove", id=component_id)
+        self._settings.pop(component_id, None)
+        self._patch_document_info(lambda listed: [c for c in listed if c.get("id") != component_id])
+        self.patches += 1
+        return True
+
+    def _patch_move(self, component_id: Any, x: Any, y: Any) -> bool:
+        components = self._cached_list("get_all_components")
+        if component_id is None or components is None:
+            return False
+        for index, component in enumerate(components):
+            if component.get("id") == component_id:
+                components[index] = dict(component, x=x, y=y)
+                if self._components is not None and component_id in self._components:
+                    self._components[component_id] = dict(self._components[component_id], x=x, y=y)
+                    self._record("move", id=component_id, x=x, y=y)
+                self.patches += 1
+                return True
+        return False
+
+    def _patch_document_info(self, update) -> None:
+        """Apply ``update`` to the component list of the cached document info."""
+        entry = self._entries.get("get_document_info")
+        info = entry[1].get("result") if entry is not None else None
+        if not isinstance(info, dict) or not isinstance(info.get("components"), list):
+            self.invalidate("get_document_info")
+            return
+        info["components"] = update(info["components"])
+        info["componentCount"] = len(info["components"])
+
+    def _patch_add(self, component: Dict[str, Any]) -> bool:
+        components = self._cached_list("get_all_components")
+        if component.get("id") is None or components is None or self._components is None:
+            return False
+        components.append(dict(component))
+        self._components[component["id"]] = dict(component)
+        self._record("add", component=dict(component))
+        self._patch_document_info(lambda listed: listed + [
+            {key: component.get(key) for key in ("id", "type", "name")}
+        ])
+        self.patches += 1
+        return True
+
+    def _patch_value(self, component_id: Any, result: Dict[str, Any], value: Any) -> bool:
+        components = self._cached_list("get_all_components")
+        if component_id is None or components is None or self._components is None:
+            return False
+        value = result.get("value", value)
+        for index, component in enumerate(components):
+            if component.get("id") == component_id:
+                components[index] = dict(component, value=value)
+                self._components[component_id] = dict(self._components.get(component_id, component), value=value)
+                self._record("update", id=component_id, fields={"value": value})
+                settings = self.get_settings(component_id)
+                if settings is not None:
+                    self.put_settings(component_id, dict(settings, value=value))
+                self.patches += 1
+                return True
+        return False
+
+    def _patch_connect(self, connection: Dict[str, Any]) -> bool:
+        connections = self._cached_list("get_connections")
+        if connections is None or self._connections is None:
+            return False
+        if connection.get("sourceParam") is None or connection.get("targetParam") is None:
+            # Without the resolved parameters the wire and the one it replaces are unknown
+            return False
+        connection = {
+            key: connection[key]
+            for key in ("sourceId", "targetId", "sourceParam", "targetParam", "sourceParamIndex", "targetParamIndex")
+            if connection.get(key) is not None
+        }
+        # Like the listener, a new wire replaces the sources of its input
+        replaced = [
+            c for c in connections
+            if c.get("targetId") == connection["targetId"] and c.get("targetParam") == connection["targetParam"]
+        ]
+        connections[:] = [c for c in connections if c not in replaced]
+        connections.append(dict(connection))
+        for old in replaced:
+            if self._connections.pop(connection_key(old), None) is not None:
+                self._record("disconnect", connection=old)
+        self._connections[connection_key(connection)] = dict(connection)
+        self._record("connect", connection=dict(connection))
+        self.patches += 1
+        return True
+
+    # Solution keys
+
+    def solution_state(self) -> Optional["SolutionState"]:
+        """Hashes of the mirrored document, or None when it is unknown."""
+        if self._components is None or self._connections is None:
+            return None
+        if self._solution is None or self._solution.version != self.version:
+            self._solution = SolutionState(self.version, self._components, self._connections)
+        if self._taint_next:
+            self._tainted.add(self._solution.graph)
+            self._taint_next = False
+        return self._solution
+
+    def solution_key(self, overrides: Optional[Dict[Any, Any]] = None) -> Optional[Tuple[str, str]]:
+        """(graph hash, inputs hash) of the mirrored document (see SolutionState.key)."""
+        state = self.solution_state()
+        return None if state is None else state.key(overrides)
+
+    def watch(self, values_of: Iterable[Any] = ()) -> Callable[[], bool]:
+        """
+        A check of whether the document changed after now
+
+        Moves and changes to the value of the components in ``values_of`` do
+        not count. Once a command could not be patched into the mirror, or the
+        change log no longer reaches back to the last check, the document
+        counts as changed for good. Each check only reads the changes logged
+        since the previous one.
+        """
+        ignored = {str(component_id) for component_id in values_of}
+        unpatched = self.mutations - self.patches
+        seen = self.version
+        changed = False
+
+        def check() -> bool:
+            nonlocal seen, changed
+            if changed:
+                return True
+            if self.mutations - self.patches != unpatched or not self._floor <= seen <= self.version:
+                changed = True
+                return True
+            for change in reversed(self._log):
+                if change["version"] <= seen:
+                    break
+                if change["op"] == "move":
+                    continue
+                if change["op"] != "update" or str(change["id"]) not in ignored or set(change["fields"]) != {"value"}:
+                    changed = True
+                    return True
+            seen = self.version
+            return False
+
+        return check
+
+    def taint(self) -> None:
+        """Mark the results of the current graph, and of the graph at the next listing, as stale."""
+        state = self.solution_state()
+        if state is not None:
+            self._tainted.add(state.graph)
+        # The graph after a command is only known at the next listing
+        self._taint_next = True
+
+    def pop_tainted(self) -> Set[str]:
+        """Graph hashes whose memoized results must be dropped, cleared once returned."""
+        tainted, self._tainted = self._tainted, set()
+        return tainted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "cached": sorted(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "patches": self.patches,
+            "mutations": self.mutations,
+            "version": self.version,
+            "changes": len(self._log),
+        }
@@ -0,0 +1,225 @@
+"""
+Validation and planning for bulk definition builds.
+
+A definition spec describes a whole graph in one request::
+
+    {
+        "components": [
+            {"alias": "r", "type": "Number Slider", "x": 0, "y": 0,
+             "value": 2.5, "slider": {"min": 0, "max": 10, "rounding": 0.1}},
+            {"alias": "c", "type": "Circle", "x": 200, "y": 0}
+        ],
+        "connections": [
+            {"source": "r", "target": "c", "target_param": "Radius"}
+        ]
+    }
+
+Connection endpoints are component aliases from the same spec or the GUIDs of
+components already on the canvas.
+"""
+
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .knowledge import ComponentIndex
+
+# Component types whose first free input is chosen automatically (A, then B)
+AUTO_AB_TYPES = ("Addition", "Subtraction", "Multiplication", "Division", "Math")
+
+SLIDER_SETTINGS = ("min", "max", "rounding")
+
+Call = Tuple[str, Dict[str, Any]]
+
+
+def _is_guid(value: Any) -> bool:
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _port_names(ports: Optional[List[Dict[str, Any]]]) -> List[str]:
+    return [p.get("name") for p in ports or [] if p.get("name")]
+
+
+class DefinitionPlan:
+    """A validated definition spec turned into listener calls."""
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.aliases: List[str] = []
+        self.add_calls: List[Call] = []
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.connections: List[Dict[str, Any]] = []
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def value_calls(self, ids: Dict[str, str]) -> List[Call]:
+        """set_component_value calls for initial values and slider settings."""
+        calls = []
+        for alias in self.aliases:
+            spec = self.components[alias]
+            params: Dict[str, Any] = {}
+            for key in SLIDER_SETTINGS:
+                if key in (spec.get("slider") or {}):
+                    params[key] = spec["slider"][key]
+            if spec.get("value") is not None:
+                params["value"] = str(spec["value"])
+            if params:
+                params["id"] = ids[alias]
+                calls.append(("set_component_value", params))
+        return calls
+
+    def connect_calls(self, ids: Dict[str, str]) -> List[Call]:
+        """connect_components calls with aliases replaced by GUIDs."""
+        calls = []
+        for connection in self.connections:
+            params = {
+                "sourceId": ids.get(connection["source"], connection["source"]),
+                "targetId": ids.get(connection["target"], connection["target"]),
+            }
+            for spec_key, param_key in (
+                ("source_param", "sourceParam"),
+                ("source_param_index", "sourceParamIndex"),
+                ("target_param", "targetParam"),
+                ("target_param_index", "targetParamIndex"),
+            ):
+                if connection.get(spec_key) is not None:
+                    params[param_key] = connection[spec_key]
+            calls.append(("connect_components", params))
+        return calls
+
+
+def plan_definition(
+    components: List[Dict[str, Any]],
+    connections: Optional[List[Dict[str, Any]]],
+    index: ComponentIndex,
+    normalize_type: Callable[[str], str] = lambda name: name,
+) -> DefinitionPlan:
+    """
+    Validate a definition spec against the knowledge base
+
+    Structural problems (duplicate or unknown aliases, missing types, bad
+    positions, invalid slider ranges, parameter names that the knowledge base
+    says do not exist) are errors. Component types the knowledge base does not
+    describe are only warnings, since the listener may still know them.
+
+    Args:
+        components: Component specs with alias, type, x, y and optional value/slider
+        connections: Connection specs using aliases or existing component GUIDs
+        index: Component library index used for type and parameter checks
+        normalize_type: Maps user-facing type names to canonical names
+
+    Returns:
+        The plan with errors, warnings and the listener calls to make
+    """
+    plan = DefinitionPlan()
+    library_entries: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    for position, spec in enumerate(components or []):
+        label = f"components[{position}]"
+        if not isinstance(spec, dict):
+            plan.errors.append(f"{label}: expected an object")
+            continue
+        alias = spec.get("alias")
+        if not isinstance(alias, str) or not alias:
+            plan.errors.append(f"{label}: alias is required")
+            continue
+        if alias in plan.components:
+            plan.errors.append(f"{label}: duplicate alias '{alias}'")
+            continue
+        component_type = spec.get("type")
+        if not isinstance(component_type, str) or not component_type.strip():
+            plan.errors.append(f"{label} ({alias}): type is required")
+            continue
+        component_type = normalize_type(component_type)
+        x, y = spec.get("x", 0), spec.get("y", 0)
+        if not _is_number(x) or not _is_number(y):
+            plan.errors.append(f"{label} ({alias}): x and y must be numbers")
+            continue
+
+        lib_component = index.lookup(component_type)
+        if lib_component is None:
+            plan.warnings.append(f"{alias}: component type '{component_type}' is not in the knowledge base")
+
+        slider = spec.get("slider") or {}
+        if slider:
+            if component_type != "Number Slider":
+                plan.errors.append(f"{alias}: slider settings are only valid for Number Slider")
+            unknown = set(slider) - set(SLIDER_SETTINGS) - {"value"}
+            if unknown:
+                plan.errors.append(f"{alias}: unknown slider settings {sorted(unknown)}")
+            low, high = slider.get("min"), slider.get("max")
+            if low is not None and high is not None and _is_number(low) and _is_number(high) and low > high:
+                plan.errors.append(f"{alias}: slider min {low} is greater than max {high}")
+            value = spec.get("value", slider.get("value"))
+            if _is_number(value) and ((_is_number(low) and value < low) or (_is_number(high) and value > high)):
+                plan.errors.append(f"{alias}: slider value {value} is outside [{low}, {high}]")
+
+        entry = dict(spec, alias=alias, type=component_type, x=x, y=y)
+        if entry.get("value") is None and "value" in slider:
+            entry["value"] = slider["value"]
+        plan.components[alias] = entry
+        plan.aliases.append(alias)
+        plan.add_calls.append(("add_component", {"type": component_type, "x": x, "y": y}))
+        library_entries[alias] = lib_component
+
+    assigned_inputs: Dict[str, int] = {}
+    for position, spec in enumerate(connections or []):
+        label = f"connections[{position}]"
+        if not isinstance(spec, dict):
+            plan.errors.append(f"{label}: expected an object")
+            continue
+        source, target = spec.get("source"), spec.get("target")
+        endpoints_ok = True
+        for role, endpoint in (("source", source), ("target", target)):
+            if endpoint not in plan.components and not _is_guid(endpoint):
+                plan.errors.append(f"{label}: unknown {role} '{endpoint}'")
+                endpoints_ok = False
+        if not endpoints_ok:
+            continue
+
+        connection = dict(spec)
+        source_entry = library_entries.get(source)
+        target_entry = library_entries.get(target)
+        if source_entry is not None:
+            outputs = _port_names(source_entry.get("outputs"))
+            name = spec.get("source_param")
+            if name is not None and outputs and name not in outputs:
+                plan.errors.append(f"{label}: '{source}' has no output '{name}' (outputs: {outputs})")
+            index_value = spec.get("source_param_index")
+            if index_value is not None and outputs and not 0 <= index_value < len(outputs):
+                plan.errors.append(f"{label}: source_param_index {index_value} out of range for '{source}'")
+        if target_entry is not None:
+            inputs = _port_names(target_entry.get("inputs"))
+            name = spec.get("target_param")
+            if name is not None and inputs and name not in inputs:
+                plan.errors.append(f"{label}: '{target}' has no input '{name}' (inputs: {inputs})")
+            index_value = spec.get("target_param_index")
+            if index_value is not None and inputs and not 0 <= index_value < len(inputs):
+                plan.errors.append(f"{label}: target_param_index {index_value} out of range for '{target}'")
+
+        # Same automatic A/B selection as connect_components for new math components
+        target_type = plan.components.get(target, {}).get("type")
+        if (
+            target_type in AUTO_AB_TYPES
+            and connection.get("target_param") is None
+            and connection.get("target_param_index") is None
+        ):
+            used = assigned_inputs.get(target, 0)
+            connection["target_param"] = "A" if used == 0 else "B"
+            assigned_inputs[target] = used + 1
+
+        plan.connections.append(connection)
+
+    if not plan.components:
+        plan.errors.append("definition has no components")
+    return plan
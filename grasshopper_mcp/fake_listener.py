@@ -0,0 +1,786 @@
+"""
+In-process stand-in for the GH_MCP listener.
+
+Speaks newline-delimited JSON-RPC 2.0 over TCP, including batch arrays and the
+``hello`` negotiation of length-prefixed framing, compression and message
+format, so the bridge transport can be exercised and benchmarked without a
+running Rhino instance. ``FakeCanvas`` keeps
+an in-memory document serving the command set of ``GrasshopperCommandRegistry``
+with the listener's result shapes, and can be filled with synthetic graphs of any
+size for benchmarks.
+"""
+
+import contextlib
+import copy
+import json
+import math
+import os
+import random
+import re
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .geometry import encode_page, page_outputs
+from .serialization import FORMAT_JSON, JSON, SERIALIZERS
+from .transport import CODECS, COMPRESSION_THRESHOLD, FRAMING_LENGTH_PREFIXED
+
+_FRAME_HEADER = struct.Struct(">I")
+_COMPRESSED_FLAG = 0x80000000
+
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        listener: "FakeGrasshopperListener" = self.server.listener
+        listener.connections_accepted += 1
+        listener._active.add(self.connection)
+        try:
+            self._serve(listener)
+        finally:
+            listener._active.discard(self.connection)
+
+    def _read_message(self) -> Optional[bytes]:
+        if self.framed:
+            header = self.rfile.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return None
+            (length,) = _FRAME_HEADER.unpack(header)
+            compressed = bool(length & _COMPRESSED_FLAG)
+            length &= ~_COMPRESSED_FLAG
+            payload = self.rfile.read(length)
+            if len(payload) != length:
+                return None
+            if compressed:
+                payload = self.codec.decompress([payload])
+            return payload
+        line = self.rfile.readline()
+        return line or None
+
+    def _serve(self, listener: "FakeGrasshopperListener"):
+        write_lock = threading.Lock()
+        self.framed = False
+        self.codec = None
+        self.serializer = JSON
+        self.compression_threshold = COMPRESSION_THRESHOLD
+        while True:
+            try:
+                data = self._read_message()
+            except OSError:
+                return
+            if data is None:
+                return
+            if not data or data.isspace():
+                continue
+            request = self.serializer.loads(data)
+            if self._negotiate(listener, request, write_lock):
+                continue
+            listener.messages_received += 1
+            if listener.concurrent:
+                threading.Thread(
+                    target=self._reply, args=(listener, request, write_lock), daemon=True
+                ).start()
+                continue
+            if not self._reply(listener, request, write_lock) or not listener.keep_alive:
+                return
+
+    def _negotiate(self, listener: "FakeGrasshopperListener", request, write_lock) -> bool:
+        """Answer a framing hello; negotiation is not counted as a message."""
+        if self.framed or not isinstance(request, dict) or request.get("method") != "hello":
+            return False
+        if not listener.supports_framing:
+            # Like listeners without the hello command: an error reply, no switch
+            return False
+        params = request.get("params") or {}
+        offered = params.get("framing") or []
+        framing = FRAMING_LENGTH_PREFIXED if FRAMING_LENGTH_PREFIXED in offered else "newline"
+        result = {"framing": framing}
+        # The first codec the bridge offers that this listener supports
+        codec = next((name for name in params.get("compression") or [] if name in listener.compression), None)
+        if codec is not None and framing == FRAMING_LENGTH_PREFIXED:
+            result["compression"] = codec
+            self.compression_threshold = int(params.get("compressionThreshold", COMPRESSION_THRESHOLD))
+        # Likewise the first message format offered, JSON when none is supported
+        fmt = next((name for name in params.get("format") or [] if name in listener.formats), None)
+        if fmt is not None and fmt != FORMAT_JSON and framing == FRAMING_LENGTH_PREFIXED:
+            result["format"] = fmt
+        self._send({"jsonrpc": "2.0", "id": request.get("id"), "result": result}, write_lock)
+        self.framed = framing == FRAMING_LENGTH_PREFIXED
+        self.codec = CODECS[codec] if "compression" in result else None
+        self.serializer = SERIALIZERS[result["format"]] if "format" in result else JSON
+        return True
+
+    def _send(self, response, write_lock) -> bool:
+        payload = self.serializer.dumps(response)
+        if self.framed and self.codec is not None and len(payload) >= self.compression_threshold:
+            payload = self.codec.compress(payload)
+            data = _FRAME_HEADER.pack(len(payload) | _COMPRESSED_FLAG) + payload
+        elif self.framed:
+            data = _FRAME_HEADER.pack(len(payload)) + payload
+        else:
+            data = payload + b"\n"
+        listener: "FakeGrasshopperListener" = self.server.listener
+        try:
+            with write_lock:
+                if listener.bandwidth:
+                    # Time the bytes would take on a link of that bandwidth
+                    time.sleep(len(data) / listener.bandwidth)
+                self.wfile.write(data)
+                self.wfile.flush()
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def _reply(self, listener: "FakeGrasshopperListener", request, write_lock) -> bool:
+        if listener.message_latency:
+            time.sleep(listener.message_latency)
+        if isinstance(request, list):
+            response = listener.dispatch_batch(request)
+        else:
+            response = listener.dispatch(request)
+        return self._send(response, write_lock)
+
+
+# Input and output parameter names of the component types the fake canvas knows,
+# following the knowledge base. Other types are accepted without ports.
+COMPONENT_PORTS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "Number Slider": ((), ("N",)),
+    "Panel": (("Input",), ()),
+    "Point": (("X", "Y", "Z"), ("Pt",)),
+    "Construct Point": (("X", "Y", "Z"), ("Pt",)),
+    "XY Plane": (("Origin",), ("Plane",)),
+    "Circle": (("Plane", "Radius"), ("C",)),
+    "Line": (("Start", "End"), ("L",)),
+    "Extrude": (("Base", "Direction", "Height"), ("Brep",)),
+    "Math": (("A", "B"), ("Result",)),
+    "Addition": (("A", "B"), ("Result",)),
+    "Subtraction": (("A", "B"), ("Result",)),
+    "Multiplication": (("A", "B"), ("Result",)),
+    "Division": (("A", "B"), ("Result",)),
+}
+
+# Types placed by populate(), and the kind of geometry each one outputs
+_SYNTHETIC_TYPES = ("Construct Point", "Addition", "XY Plane", "Circle", "Line", "Extrude", "Panel")
+_SYNTHETIC_GEOMETRY = {"Construct Point": "point", "Circle": "polyline", "Line": "polyline", "Extrude": "mesh"}
+
+DEFAULT_KNOWLEDGE_BASE = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "GH_MCP", "GH_MCP", "Resources", "ComponentKnowledgeBase.json")
+)
+
+
+def _synthetic_item(kind: str, rng: random.Random) -> Dict[str, Any]:
+    x, y, z = (rng.uniform(-100, 100) for _ in range(3))
+    if kind == "point":
+        return {"type": "point", "vertices": [[x, y, z]]}
+    if kind == "polyline":
+        return {"type": "polyline", "vertices": [[x + i, y + (i % 3), z] for i in range(16)]}
+    vertices = [[x + i % 4, y + i // 4, z] for i in range(16)]
+    faces = [[r * 4 + c, r * 4 + c + 1, r * 4 + c + 5, r * 4 + c + 4] for r in range(3) for c in range(3)]
+    return {"type": "mesh", "vertices": vertices, "faces": faces}
+
+
+class FakeCanvas:
+    """In-memory Grasshopper document backing the fake listener's commands.
+
+    Implements the command set of ``GrasshopperCommandRegistry`` with the same
+    result shapes, plus the ``get_all_components`` and ``get_connections``
+    reads the bridge relies on. Geometry and script commands do not compute
+    anything: they validate their parameters and answer like the listener.
+
+    Args:
+        knowledge_base: Parsed knowledge base providing the patterns and intents
+            used by ``create_pattern``; the repository's one by default
+    """
+
+    def __init__(self, knowledge_base: Optional[Dict[str, Any]] = None):
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.connections: List[Dict[str, Any]] = []
+        # Output data served by get_geometry, keyed by component id
+        self.geometry: Dict[str, List[Dict[str, Any]]] = {}
+        # Scripts, macros and snapshots received by the utility commands
+        self.scripts: List[str] = []
+        self.macros: Dict[str, str] = {}
+        self.snapshots: Dict[str, Tuple[Any, ...]] = {}
+        self._knowledge_base = knowledge_base
+        self._lock = threading.Lock()
+
+    def handlers(self) -> Dict[str, Handler]:
+        return {
+            "create_point": self.create_point,
+            "create_curve": self.create_curve,
+            "create_circle": self.create_circle,
+            "get_document_info": self.get_document_info,
+            "get_all_components": self.get_all_components,
+            "get_connections": self.get_connections,
+            "get_component_info": self.get_component_info,
+            "add_component": self.add_component,
+            "delete_component": self.delete_component,
+            "move_component": self.move_component,
+            "set_component_value": self.set_component_value,
+            "connect_components": self.connect_components,
+            "clear_document": self.clear_document,
+            "save_document": self.save_document,
+            "load_document": self.load_document,
+            "create_pattern": self.create_pattern,
+            "get_available_patterns": self.get_available_patterns,
+            "execute_preview": self.execute_preview,
+            "execute_script": self.execute_script,
+            "create_macro": self.create_macro,
+            "run_macro": self.run_macro,
+            "snapshot": self.snapshot,
+            "revert_snapshot": self.revert_snapshot,
+            "get_geometry": self.get_geometry,
+            "run_gh_python": self.run_gh_python,
+        }
+
+    def _get(self, component_id: Any) -> Dict[str, Any]:
+        component = self.components.get(component_id)
+        if component is None:
+            raise ValueError(f"Component with ID {component_id} not found")
+        return component
+
+    # Synthetic canvases
+
+    def populate(
+        self,
+        components: int,
+        connections: Optional[int] = None,
+        slider_ratio: float = 0.25,
+        geometry_items: int = 0,
+        branch_size: int = 100,
+        seed: int = 0,
+    ) -> List[str]:
+        """
+        Add a synthetic graph to the canvas
+
+        Args:
+            components: Number of components to add
+            connections: Number of wires to draw (default: one per component).
+                Wires run from an earlier component to a later one; like the
+                listener, a wire into an occupied input replaces its source,
+                so the canvas may end up with fewer connections.
+            slider_ratio: Fraction of the components that are Number Sliders
+            geometry_items: Output items generated for every component that
+                produces geometry (points, circles, lines, meshes)
+            branch_size: Items per data tree branch of the generated outputs
+            seed: Random seed, so that the same arguments give the same canvas
+
+        Returns:
+            The ids of the added components in creation order
+        """
+        rng = random.Random(seed)
+        ids = []
+        for position in range(components):
+            if rng.random() < slider_ratio:
+                component_type = "Number Slider"
+            else:
+                component_type = rng.choice(_SYNTHETIC_TYPES)
+            component = self.add_component({"type": component_type, "x": (position % 50) * 200, "y": (position // 50) * 100})
+            ids.append(component["id"])
+            if geometry_items and component_type in _SYNTHETIC_GEOMETRY:
+                self.fill_geometry(component["id"], geometry_items, branch_size, rng.random())
+
+        wires = components if connections is None else connections
+        for _ in range(wires * 4):
+            if wires <= 0 or len(ids) < 2:
+                break
+            target_position = rng.randrange(1, len(ids))
+            source_id = ids[rng.randrange(target_position)]
+            target_id = ids[target_position]
+            source_outputs = COMPONENT_PORTS.get(self.components[source_id]["type"], ((), ()))[1]
+            target_inputs = COMPONENT_PORTS.get(self.components[target_id]["type"], ((), ()))[0]
+            if not source_outputs or not target_inputs:
+                continue
+            self.connect_components({
+                "sourceId": source_id,
+                "targetId": target_id,
+                "sourceParam": source_outputs[0],
+                "targetParam": rng.choice(target_inputs),
+            })
+            wires -= 1
+        return ids
+
+    def stage_component(self, component_id: str, component_type: str, x: float = 0, y: float = 0) -> Dict[str, Any]:
+        """Add a component under a given id, e.g. one a recorded trace refers to."""
+        component = self.add_component({"type": component_type, "x": x, "y": y})
+        with self._lock:
+            component = self.components.pop(component["id"])
+            component["id"] = component_id
+            self.components[component_id] = component
+        return dict(component)
+
+    def fill_geometry(self, component_id: str, items: int, branch_size: int = 100, seed: Any = 0) -> None:
+        """
+        Give a component synthetic output geometry for get_geometry
+
+        Points, polylines or meshes are generated depending on the component
+        type (meshes for unknown types), in the plain item format understood by
+        the binary encoding, split into ``{0;n}`` branches of ``branch_size``.
+        """
+        rng = random.Random(seed)
+        component_type = self._get(component_id)["type"]
+        kind = _SYNTHETIC_GEOMETRY.get(component_type, "mesh")
+        outputs = COMPONENT_PORTS.get(component_type, ((), ()))[1]
+        data = [_synthetic_item(kind, rng) for _ in range(items)]
+        branches = [
+            {"path": f"{{0;{number}}}", "data": data[start:start + branch_size]}
+            for number, start in enumerate(range(0, items, branch_size))
+        ]
+        self.geometry[component_id] = [{"name": outputs[0] if outputs else "Geometry", "index": 0, "branches": branches}]
+
+    # Geometry commands
+
+    def create_point(self, params):
+        return {"id": str(uuid.uuid4()), **{axis: float(params.get(axis, 0)) for axis in "xyz"}}
+
+    def create_curve(self, params):
+        points = params.get("points") or []
+        if len(points) < 2:
+            raise ValueError("At least 2 points are required to create a curve")
+        coordinates = [(p["x"], p["y"], p.get("z", 0.0)) for p in points]
+        length = sum(math.dist(a, b) for a, b in zip(coordinates, coordinates[1:]))
+        return {"id": str(uuid.uuid4()), "pointCount": len(points), "length": length}
+
+    def create_circle(self, params):
+        center, radius = params.get("center"), params.get("radius", 0)
+        if center is None:
+            raise ValueError("Center point is required")
+        if radius <= 0:
+            raise ValueError("Radius must be greater than 0")
+        return {
+            "id": str(uuid.uuid4()),
+            "center": {"x": center["x"], "y": center["y"], "z": center.get("z", 0.0)},
+            "radius": radius,
+            "circumference": 2 * math.pi * radius,
+        }
+
+    # Component commands
+
+    def get_document_info(self, params):
+        with self._lock:
+            components = [{"id": c["id"], "type": c["type"], "name": c["name"]} for c in self.components.values()]
+        return {"name": "Untitled", "path": None, "componentCount": len(components), "components": components}
+
+    def get_all_components(self, params):
+        with self._lock:
+            return [dict(c) for c in self.components.values()]
+
+    def get_connections(self, params):
+        with self._lock:
+            return [dict(c) for c in self.connections]
+
+    def get_component_info(self, params):
+        with self._lock:
+            component = self._get(params.get("componentId") or params.get("id"))
+            info = dict(component, description=f"{component['type']} (fake listener)")
+        ports = COMPONENT_PORTS.get(component["type"])
+        if ports is not None and component["type"] not in ("Number Slider", "Panel"):
+            for key, names in zip(("inputs", "outputs"), ports):
+                info[key] = [
+                    {"name": name, "nickname": name, "description": name, "type": "Param_GenericObject", "dataType": "Generic Data"}
+                    for name in names
+                ]
+        if component["type"] == "Number Slider":
+            info["minimum"], info["maximum"] = component["min"], component["max"]
+        return info
+
+    def add_component(self, params):
+        component_type = params.get("type")
+        if not component_type:
+            raise ValueError("Component type is required")
+        component = {
+            "id": str(uuid.uuid4()),
+            "type": component_type,
+            "name": component_type,
+            "x": params.get("x", 0),
+            "y": params.get("y", 0),
+        }
+        if component_type == "Number Slider":
+            component.update({"min": 0, "max": 10, "value": 5, "rounding": 0.1})
+        with self._lock:
+            self.components[component["id"]] = component
+        return dict(component)
+
+    def delete_component(self, params):
+        component_id = params.get("id")
+        with self._lock:
+            self._get(component_id)
+            del self.components[component_id]
+            self.geometry.pop(component_id, None)
+            self.connections = [
+                c for c in self.connections
+                if c["sourceId"] != component_id and c["targetId"] != component_id
+            ]
+        return {"success": True, "id": component_id}
+
+    def move_component(self, params):
+        with self._lock:
+            component = self._get(params.get("id"))
+            component["x"], component["y"] = params.get("x", 0), params.get("y", 0)
+            return {"id": component["id"], "x": component["x"], "y": component["y"]}
+
+    def set_component_value(self, params):
+        with self._lock:
+            component = self._get(params.get("id"))
+            for key in ("min", "max", "rounding"):
+                if key in params:
+                    component[key] = params[key]
+            if params.get("value") is not None:
+                value = params["value"]
+                if component["type"] == "Number Slider":
+                    value = float(value)
+                component["value"] = value
+            return {"id": component["id"], "type": component["type"], "value": component.get("value")}
+
+    @staticmethod
+    def _port(names: Tuple[str, ...], name: Any, index: Any) -> Any:
+        """Resolve a parameter like the listener: by name, then by index, then the first one."""
+        if name is not None:
+            if not names:
+                return name
+            for candidate in names:
+                if candidate.lower() == str(name).lower():
+                    return candidate
+            raise ValueError("Source or target parameter not found")
+        if index is not None and 0 <= index < len(names):
+            return names[index]
+        return names[0] if names else None
+
+    def connect_components(self, params):
+        with self._lock:
+            source = self._get(params.get("sourceId"))
+            target = self._get(params.get("targetId"))
+            outputs = COMPONENT_PORTS.get(source["type"], ((), ()))[1]
+            inputs = COMPONENT_PORTS.get(target["type"], ((), ()))[0]
+            source_param = self._port(outputs, params.get("sourceParam"), params.get("sourceParamIndex"))
+            target_param = self._port(inputs, params.get("targetParam"), params.get("targetParamIndex"))
+            connection = {
+                key: params[key]
+                for key in ("sourceId", "targetId", "sourceParamIndex", "targetParamIndex")
+                if key in params
+            }
+            if source_param is not None:
+                connection["sourceParam"] = source_param
+            if target_param is not None:
+                connection["targetParam"] = target_param
+                # Like the listener, a new wire replaces the sources of the input
+                self.connections = [
+                    c for c in self.connections
+                    if c["targetId"] != connection["targetId"] or c.get("targetParam") != target_param
+                ]
+            self.connections.append(connection)
+            return dict(connection, success=True, message="Connection created successfully")
+
+    def get_geometry(self, params):
+        component_id = params.get("id")
+        with self._lock:
+            self._get(component_id)
+            outputs = self.geometry.get(component_id, [])
+        page = page_outputs(
+            component_id,
+            outputs,
+            offset=params.get("offset", 0),
+            limit=params.get("limit"),
+            max_chars=params.get("maxChars"),
+            output=params.get("output"),
+            branch=params.get("branch"),
+        )
+        return encode_page(page, params.get("encoding", "text"))
+
+    # Document commands
+
+    def _state(self) -> Tuple[Any, ...]:
+        return copy.deepcopy((self.components, self.connections, self.geometry))
+
+    def _restore(self, state: Tuple[Any, ...]) -> None:
+        self.components, self.connections, self.geometry = copy.deepcopy(state)
+
+    def clear_document(self, params):
+        with self._lock:
+            self.components.clear()
+            self.connections.clear()
+            self.geometry.clear()
+        return {"success": True, "message": "Document cleared"}
+
+    def save_document(self, params):
+        path = params.get("path")
+        if not path:
+            raise ValueError("Save path is required")
+        with self._lock:
+            components, connections, geometry = self._state()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"components": components, "connections": connections, "geometry": geometry}, f)
+        return {"success": True, "message": "Document saved successfully", "path": path}
+
+    def load_document(self, params):
+        path = params.get("path")
+        if not path:
+            raise ValueError("Load path is required")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+        with self._lock:
+            self._restore((document["components"], document["connections"], document.get("geometry", {})))
+        return {"success": True, "message": "Document loaded successfully", "path": path}
+
+    # Intent commands
+
+    def _patterns(self) -> Dict[str, Any]:
+        if self._knowledge_base is None:
+            try:
+                with open(DEFAULT_KNOWLEDGE_BASE, encoding="utf-8-sig") as f:
+                    self._knowledge_base = json.load(f)
+            except OSError:
+                self._knowledge_base = {}
+        return self._knowledge_base
+
+    def _recognize_intent(self, description: str) -> Optional[str]:
+        """Pattern whose intent keywords occur most often in ``description``."""
+        words = [w for w in re.split(r"[\s,.;:!?()\[\]{}]+", description.lower()) if w]
+        best, best_score = None, 0
+        for intent in self._patterns().get("intents", []):
+            score = sum(1 for keyword in intent.get("keywords", []) if keyword in words)
+            if score > best_score:
+                best, best_score = intent.get("pattern"), score
+        return best
+
+    def create_pattern(self, params):
+        description = params.get("description")
+        if not description:
+            raise ValueError("Missing required parameter: description")
+        name = self._recognize_intent(description)
+        if name is None:
+            raise ValueError(f"Could not recognize intent from description: {description}")
+        pattern = next((p for p in self._patterns().get("patterns", []) if p.get("name") == name), None)
+        if pattern is None or not pattern.get("components"):
+            raise ValueError(f"Pattern '{name}' has no components defined")
+        ids = {}
+        for spec in pattern["components"]:
+            ids[spec.get("id")] = self.add_component({"type": spec["type"], "x": spec.get("x", 0), "y": spec.get("y", 0)})["id"]
+            if spec.get("settings"):
+                self.set_component_value(dict(spec["settings"], id=ids[spec.get("id")]))
+        for wire in pattern.get("connections", []):
+            if wire.get("source") in ids and wire.get("target") in ids:
+                try:
+                    self.connect_components({
+                        "sourceId": ids[wire["source"]],
+                        "targetId": ids[wire["target"]],
+                        "sourceParam": wire.get("sourceParam"),
+                        "targetParam": wire.get("targetParam"),
+                    })
+                except ValueError:
+                    # The listener logs failed pattern wires and carries on
+                    pass
+        return {"Pattern": name, "ComponentCount": len(pattern["components"]), "ConnectionCount": len(pattern.get("connections", []))}
+
+    def get_available_patterns(self, params):
+        query = params.get("query")
+        if query is None:
+            return []
+        name = self._recognize_intent(str(query))
+        return [name] if name else []
+
+    # Utility commands
+
+    def execute_preview(self, params):
+        return {"success": True}
+
+    def execute_script(self, params):
+        if not params.get("script"):
+            raise ValueError("Script text is required")
+        self.scripts.append(params["script"])
+        return {"success": True}
+
+    def run_gh_python(self, params):
+        if not params.get("script"):
+            raise ValueError("Python script is required")
+        self.scripts.append(params["script"])
+        return {"success": True}
+
+    def create_macro(self, params):
+        name, macro = params.get("name"), params.get("macro")
+        if not name or not macro:
+            raise ValueError("Name and macro are required")
+        self.macros[name] = macro
+        return {"success": True, "name": name}
+
+    def run_macro(self, params):
+        macro = self.macros.get(params.get("name")) or params.get("macro")
+        if not macro:
+            raise ValueError("Macro not found")
+        self.scripts.append(macro)
+        return {"success": True}
+
+    def snapshot(self, params):
+        name = params.get("name") or str(uuid.uuid4())
+        with self._lock:
+            self.snapshots[name] = self._state()
+        return {"success": True, "name": name}
+
+    def revert_snapshot(self, params):
+        name = params.get("name")
+        if not name or name not in self.snapshots:
+            raise ValueError("Snapshot not found")
+        with self._lock:
+            self._restore(self.snapshots[name])
+        return {"success": True, "name": name}
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeGrasshopperListener:
+    """Minimal GH_MCP stand-in running on a background thread.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        keep_alive: Serve several requests per connection; when False the
+            connection is closed after one reply, like older listeners
+        concurrent: Handle requests on one connection in parallel and reply in
+            completion order instead of request order
+        supports_batch: Accept JSON-RPC batch arrays; when False a batch is
+            rejected with a single error, like listeners without batch support
+        supports_framing: Accept the hello negotiation of length-prefixed
+            framing; when False hello is an unknown command
+        compression: Codecs accepted in the hello negotiation (default: every
+            codec available here); replies reaching the threshold the bridge
+            asked for are compressed
+        formats: Message formats accepted in the hello negotiation (default:
+            every format available here)
+        bandwidth: Bytes per second replies are sent at, simulating a network
+            link (None: as fast as the loopback interface)
+        latency: Seconds each command takes to execute
+        message_latency: Seconds added to every message received, simulating
+            network and UI-thread dispatch overhead
+        method_latency: Seconds per command name, replacing ``latency`` for
+            those commands (e.g. a slow ``get_geometry``)
+        ui_thread: Execute the commands of all connections one at a time, like
+            GH_MCP on the Rhino UI thread; when False only the requests of one
+            connection wait for each other
+        canvas: Document to serve, e.g. one filled with ``FakeCanvas.populate``
+
+    Requests in the listener's own ``{"type", "parameters"}`` form are also
+    accepted and answered with its ``{"success", "data", "error"}`` responses.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        keep_alive: bool = True,
+        concurrent: bool = False,
+        supports_batch: bool = True,
+        supports_framing: bool = True,
+        compression: Optional[Tuple[str, ...]] = None,
+        formats: Optional[Tuple[str, ...]] = None,
+        bandwidth: Optional[float] = None,
+        latency: float = 0.0,
+        message_latency: float = 0.0,
+        method_latency: Optional[Dict[str, float]] = None,
+        ui_thread: bool = False,
+        canvas: Optional[FakeCanvas] = None,
+    ):
+        self.keep_alive = keep_alive
+        self.latency = latency
+        self.method_latency = dict(method_latency or {})
+        self.message_latency = message_latency
+        self._ui_thread = threading.Lock() if ui_thread else contextlib.nullcontext()
+        self.concurrent = concurrent
+        self.supports_batch = supports_batch
+        self.supports_framing = supports_framing
+        self.compression = tuple(CODECS) if compression is None else tuple(compression)
+        self.formats = tuple(SERIALIZERS) if formats is None else tuple(formats)
+        self.bandwidth = bandwidth
+        self.messages_received = 0
+        self.handlers: Dict[str, Handler] = {}
+        self.requests_handled = 0
+        self.connections_accepted = 0
+        self._server = _Server((host, port), _RequestHandler)
+        self._server.listener = self
+        self._thread: Optional[threading.Thread] = None
+        self._active = set()
+        self.canvas = canvas if canvas is not None else FakeCanvas()
+        self.handlers.update(self.canvas.handlers())
+        self.register("echo", lambda params: params)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def register(self, method: str, handler: Handler) -> None:
+        """Register a handler returning the command data for ``method``."""
+        self.handlers[method] = handler
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests_handled += 1
+        if "method" not in request and "type" in request:
+            return self._dispatch_command(request)
+        request_id = request.get("id")
+        method = request.get("method")
+        handler = self.handlers.get(method)
+        if handler is None:
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": f"No handler registered for command type '{method}'",
+            }
+        try:
+            with self._ui_thread:
+                self._wait(method)
+                data = handler(request.get("params") or {})
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": str(e)}
+        return {"jsonrpc": "2.0", "id": request_id, "result": {"success": True, "result": data}}
+
+    def _dispatch_command(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a ``{"type", "parameters"}`` command like the listener's Response class."""
+        handler = self.handlers.get(command["type"])
+        if handler is None:
+            return {"success": False, "data": None, "error": f"No handler registered for command type '{command['type']}'"}
+        try:
+            with self._ui_thread:
+                self._wait(command["type"])
+                return {"success": True, "data": handler(command.get("parameters") or {}), "error": None}
+        except Exception as e:
+            return {"success": False, "data": None, "error": str(e)}
+
+    def _wait(self, method: str) -> None:
+        delay = self.method_latency.get(method, self.latency)
+        if delay:
+            time.sleep(delay)
+
+    def dispatch_batch(self, requests: List[Any]) -> Any:
+        if not self.supports_batch or not requests:
+            return {"jsonrpc": "2.0", "id": None, "error": "Invalid Request"}
+        # Entries without an id are notifications and get no reply.
+        return [self.dispatch(request) for request in requests if isinstance(request, dict) and "id" in request]
+
+    def start(self) -> "FakeGrasshopperListener":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        for conn in list(self._active):
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "FakeGrasshopperListener":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,347 @@
+"""
+Paging over the output data returned by ``get_geometry``.
+
+A geometry page lists the selected outputs of a component. Each output carries
+the branches of its data tree that fall inside the page::
+
+    {
+        "id": "...",
+        "outputs": [
+            {"name": "Circle", "index": 0, "itemCount": 1200,
+             "branches": [{"path": "{0;3}", "start": 40, "data": ["...", ...]}]}
+        ],
+        "offset": 0, "count": 500, "total": 1200, "nextOffset": 500
+    }
+
+Items are numbered across the selected outputs in output, branch and item
+order; ``offset`` and ``nextOffset`` refer to that numbering. A page ends after
+``limit`` items or once its items exceed ``max_chars`` characters (a page
+always holds at least one item), and ``nextOffset`` is None on the last page.
+
+Numeric geometry can also be requested as typed binary arrays (see "Binary
+encoding" below), which NumPy decodes without parsing text.
+"""
+
+import array
+import base64
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to decode binary geometry
+    np = None
+
+# Path used for outputs of listeners that do not report data tree paths
+DEFAULT_PATH = "{0}"
+
+
+def is_paged(result: Any) -> bool:
+    """Whether a get_geometry result came from a listener that pages itself."""
+    return isinstance(result, dict) and "total" in result
+
+
+def _branches(output: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if "branches" in output:
+        return output.get("branches") or []
+    # Older listeners return a flat "data" list per output
+    return [{"path": DEFAULT_PATH, "start": 0, "data": output.get("data") or []}]
+
+
+def _selects(output: Dict[str, Any], position: int, selected: Optional[str]) -> bool:
+    if selected is None:
+        return True
+    return selected in (output.get("name"), output.get("nickname"), str(output.get("index", position)))
+
+
+def page_outputs(
+    component_id: Any,
+    outputs: List[Dict[str, Any]],
+    offset: int = 0,
+    limit: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    output: Optional[str] = None,
+    branch: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Cut one page out of a complete set of component outputs
+
+    This is the paging the listener applies to ``get_geometry``; the bridge
+    uses it for listeners that always return every output in one reply.
+
+    Args:
+        component_id: Component the outputs belong to
+        outputs: Outputs with either "branches" or a flat "data" list
+        offset: Index of the first item to return
+        limit: Maximum number of items in the page
+        max_chars: Stop adding items once their text exceeds this many characters
+        output: Only include the output with this name, nickname or index
+        branch: Only include the branch with this path, e.g. "{0;1}"
+
+    Returns:
+        The page in the format described in the module docstring
+    """
+    offset = max(0, offset or 0)
+    total = count = chars = 0
+    next_offset = None
+    page_outputs_list = []
+    for position, entry in enumerate(outputs or []):
+        if not _selects(entry, position, output):
+            continue
+        item_count = 0
+        page_branches = []
+        for branch_entry in _branches(entry):
+            path = branch_entry.get("path", DEFAULT_PATH)
+            if branch is not None and path != branch:
+                continue
+            data = branch_entry.get("data") or []
+            first = branch_entry.get("start", 0)
+            if total + len(data) <= offset or next_offset is not None:
+                # Branch lies entirely outside the page: only count it
+                total += len(data)
+                item_count += len(data)
+                continue
+            taken: List[Any] = []
+            skip = max(0, offset - total)
+            start = first + skip
+            for item in data[skip:]:
+                if (limit is not None and count >= limit) or (max_chars is not None and count and chars >= max_chars):
+                    next_offset = total + skip + len(taken)
+                    break
+                taken.append(item)
+                count += 1
+                chars += len(item) if isinstance(item, str) else len(str(item))
+            total += len(data)
+            item_count += len(data)
+            if taken:
+                page_branches.append({"path": path, "start": start, "data": taken})
+        page_outputs_list.append({
+            "name": entry.get("name"),
+            "index": entry.get("index", position),
+            "itemCount": item_count,
+            "branches": page_branches,
+        })
+    return {
+        "id": component_id,
+        "outputs": page_outputs_list,
+        "offset": offset,
+        "count": count,
+        "total": total,
+        "nextOffset": next_offset,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Binary encoding
+#
+# With ``encoding="binary"`` numeric geometry is sent as typed little-endian
+# arrays instead of text. An array is ``{"dtype": "<f8", "shape": [n, 3],
+# "data": "<base64>"}``. Items that carry arrays look like
+# ``{"type": "mesh", "arrays": {"vertices": ..., "faces": ...}}`` (types
+# "point", "polyline", "pointcloud" and "mesh"; faces are quads with D == C for
+# triangles). A branch whose items in the page are all points is packed into
+# one array: ``{"path": ..., "start": ..., "count": n, "points": <array>}``.
+# Items without a numeric representation stay text.
+# ---------------------------------------------------------------------------
+
+ENCODINGS = ("text", "binary")
+
+_TYPECODES = {"<f8": "d", "<i4": "i"}
+
+_NUMBER = r"\s*(-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*"
+_POINT_TEXT = re.compile(r"^\{?" + _NUMBER + "," + _NUMBER + "," + _NUMBER + r"\}?$")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required to decode binary geometry (pip install grasshopper-mcp[geometry])")
+
+
+def encode_array(values: List[Any], dtype: str, shape: List[int]) -> Dict[str, Any]:
+    """Encode a flat list of numbers as a base64 array spec."""
+    buffer = array.array(_TYPECODES[dtype], values)
+    if sys.byteorder != "little":
+        buffer.byteswap()
+    return {"dtype": dtype, "shape": list(shape), "data": base64.b64encode(buffer.tobytes()).decode("ascii")}
+
+
+def decode_array(spec: Dict[str, Any]):
+    """Decode an array spec into a NumPy array viewing the decoded bytes."""
+    _require_numpy()
+    raw = base64.b64decode(spec["data"])
+    return np.frombuffer(raw, dtype=np.dtype(spec["dtype"])).reshape(spec["shape"])
+
+
+def _is_array(value: Any) -> bool:
+    return isinstance(value, dict) and "dtype" in value and "data" in value
+
+
+def decode_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a binary page with every array spec replaced by a NumPy array."""
+    _require_numpy()
+    outputs = []
+    for entry in page.get("outputs") or []:
+        branches = []
+        for branch_entry in entry.get("branches") or []:
+            branch_entry = dict(branch_entry)
+            if _is_array(branch_entry.get("points")):
+                branch_entry["points"] = decode_array(branch_entry["points"])
+            if "data" in branch_entry:
+                branch_entry["data"] = [
+                    dict(item, arrays={k: decode_array(v) for k, v in item["arrays"].items()})
+                    if isinstance(item, dict) and isinstance(item.get("arrays"), dict) else item
+                    for item in branch_entry["data"]
+                ]
+            branches.append(branch_entry)
+        outputs.append(dict(entry, branches=branches))
+    return dict(page, outputs=outputs)
+
+
+class GeometrySummary:
+    """Counts, bounding box and centroid accumulated over geometry pages.
+
+    Binary pages are decoded with NumPy and reduced with vectorized code. Text
+    items that look like points ("{1.0, 2.0, 3.0}") are parsed so that pages
+    from listeners without binary support can be summarized too.
+    """
+
+    def __init__(self):
+        _require_numpy()
+        self.items = 0
+        self.types: Dict[str, int] = {}
+        self.vertex_count = 0
+        self.face_count = 0
+        self._min = None
+        self._max = None
+        self._sum = None
+
+    def _count(self, kind: str, amount: int = 1) -> None:
+        self.items += amount
+        self.types[kind] = self.types.get(kind, 0) + amount
+
+    def add_vertices(self, vertices) -> None:
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        if not len(vertices):
+            return
+        # Reducing the rows of a (3, n) copy is much faster than the columns of (n, 3)
+        columns = np.ascontiguousarray(vertices.T)
+        low, high, total = columns.min(axis=1), columns.max(axis=1), columns.sum(axis=1)
+        if self._min is None:
+            self._min, self._max, self._sum = low, high, total
+        else:
+            self._min = np.minimum(self._min, low)
+            self._max = np.maximum(self._max, high)
+            self._sum = self._sum + total
+        self.vertex_count += len(vertices)
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        chunks = []
+        text_points = []
+        for entry in page.get("outputs") or []:
+            for branch_entry in entry.get("branches") or []:
+                points = branch_entry.get("points")
+                if points is not None:
+                    points = decode_array(points) if _is_array(points) else points
+                    chunks.append(points)
+                    self._count("point", len(points))
+                for item in branch_entry.get("data") or []:
+                    if isinstance(item, dict) and isinstance(item.get("arrays"), dict):
+                        vertices = item["arrays"].get("vertices")
+                        if vertices is not None:
+                            chunks.append(decode_array(vertices) if _is_array(vertices) else vertices)
+                        faces = item["arrays"].get("faces")
+                        if faces is not None:
+                            # Only the number of faces is needed: read it from the shape
+                            self.face_count += faces["shape"][0] if _is_array(faces) else len(faces)
+                        self._count(item.get("type", "unknown"))
+                    elif isinstance(item, str) and _POINT_TEXT.match(item):
+                        text_points.append([float(v) for v in _POINT_TEXT.match(item).groups()])
+                        self._count("point")
+                    else:
+                        self._count("text")
+        if text_points:
+            chunks.append(np.array(text_points, dtype=np.float64))
+        if chunks:
+            self.add_vertices(np.concatenate([np.asarray(c, dtype=np.float64).reshape(-1, 3) for c in chunks]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {
+            "itemCount": self.items,
+            "types": dict(self.types),
+            "vertexCount": self.vertex_count,
+            "faceCount": self.face_count,
+            "boundingBox": None,
+            "centroid": None,
+        }
+        if self._min is not None:
+            summary["boundingBox"] = {"min": self._min.tolist(), "max": self._max.tolist()}
+            summary["centroid"] = (self._sum / self.vertex_count).tolist()
+        return summary
+
+
+def summarize_reply(component_id: str, result: Dict[str, Any], limit: int) -> Tuple[Dict[str, Any], bool]:
+    """Summary of the first ``get_geometry`` page of a component, and whether items were left out."""
+    if not is_paged(result):
+        # Listeners without paging return every output in one reply
+        result = page_outputs(component_id, result.get("outputs"), 0, limit)
+    summary = GeometrySummary()
+    summary.add_page(result)
+    return summary.to_dict(), result.get("nextOffset") is not None
+
+
+# Listener-side encoding of the plain geometry items used by the fake listener:
+# {"type": "point" | "polyline" | "pointcloud", "vertices": [[x, y, z], ...]}
+# and {"type": "mesh", "vertices": [...], "faces": [[a, b, c, d], ...]}.
+
+def _flatten(rows: List[List[Any]]) -> List[Any]:
+    return [value for row in rows for value in row]
+
+
+def item_to_text(item: Any) -> str:
+    """Text form of an item, similar to what ScriptVariable().ToString() gives."""
+    if not isinstance(item, dict):
+        return str(item)
+    kind = item.get("type")
+    vertices = item.get("vertices") or []
+    if kind == "point" and vertices:
+        return "{" + ", ".join(repr(float(v)) for v in vertices[0]) + "}"
+    if kind == "mesh":
+        return f"Mesh ({len(vertices)} vertices, {len(item.get('faces') or [])} faces)"
+    return f"{str(kind).capitalize()} ({len(vertices)} points)"
+
+
+def item_to_binary(item: Any) -> Any:
+    """Binary form of an item, or its text form when it has no numeric data."""
+    if not isinstance(item, dict) or "vertices" not in item:
+        return item_to_text(item)
+    vertices = item["vertices"]
+    arrays = {"vertices": encode_array(_flatten(vertices), "<f8", [len(vertices), 3])}
+    if item.get("faces") is not None:
+        faces = item["faces"]
+        arrays["faces"] = encode_array(_flatten(faces), "<i4", [len(faces), 4])
+    return {"type": item.get("type"), "arrays": arrays}
+
+
+def encode_page(page: Dict[str, Any], encoding: str = "text") -> Dict[str, Any]:
+    """Convert the items of a page of plain geometry items to ``encoding``."""
+    outputs = []
+    for entry in page.get("outputs") or []:
+        branches = []
+        for branch_entry in entry.get("branches") or []:
+            data = branch_entry.get("data") or []
+            if encoding == "binary" and data and all(
+                isinstance(item, dict) and item.get("type") == "point" for item in data
+            ):
+                points = [item["vertices"][0] for item in data]
+                branches.append({
+                    "path": branch_entry.get("path"),
+                    "start": branch_entry.get("start"),
+                    "count": len(points),
+                    "points": encode_array(_flatten(points), "<f8", [len(points), 3]),
+                })
+                continue
+            convert = item_to_binary if encoding == "binary" else item_to_text
+            branches.append(dict(branch_entry, data=[convert(item) for item in data]))
+        outputs.append(dict(entry, branches=branches))
+    return dict(page, outputs=outputs)
@@ -0,0 +1,89 @@
+"""
+Adjacency index over the connection list returned by ``get_connections``.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Edge = Dict[str, Any]
+_PortKey = Tuple[Any, str, Any]
+
+
+class ConnectionGraph:
+    """Incoming and outgoing edges per component, built in one pass.
+
+    Edges are the connection dicts from ``get_connections`` (``sourceId``,
+    ``targetId``, ``sourceParam``, ``targetParam`` and optionally
+    ``sourceParamIndex`` / ``targetParamIndex``). Every lookup preserves the
+    order of the original connection list.
+    """
+
+    def __init__(self, connections: Optional[Iterable[Edge]] = None):
+        self.edges: List[Edge] = []
+        self._incoming: Dict[Any, List[Edge]] = {}
+        self._outgoing: Dict[Any, List[Edge]] = {}
+        self._related: Dict[Any, List[Edge]] = {}
+        self._input_ports: Dict[_PortKey, List[Edge]] = {}
+        self._output_ports: Dict[_PortKey, List[Edge]] = {}
+        for edge in connections or []:
+            self.add(edge)
+
+    @classmethod
+    def from_response(cls, response: Optional[Dict[str, Any]]) -> "ConnectionGraph":
+        """Build a graph from a ``get_connections`` response dict."""
+        if response and isinstance(response.get("result"), list):
+            return cls(response["result"])
+        return cls()
+
+    def add(self, edge: Edge) -> None:
+        source_id = edge.get("sourceId")
+        target_id = edge.get("targetId")
+        self.edges.append(edge)
+        self._outgoing.setdefault(source_id, []).append(edge)
+        self._incoming.setdefault(target_id, []).append(edge)
+        self._related.setdefault(source_id, []).append(edge)
+        if target_id != source_id:
+            self._related.setdefault(target_id, []).append(edge)
+        self._index_port(self._output_ports, source_id, edge.get("sourceParam"), edge.get("sourceParamIndex"), edge)
+        self._index_port(self._input_ports, target_id, edge.get("targetParam"), edge.get("targetParamIndex"), edge)
+
+    @staticmethod
+    def _index_port(ports: Dict[_PortKey, List[Edge]], component_id: Any, name: Any, index: Any, edge: Edge) -> None:
+        if name is not None:
+            ports.setdefault((component_id, "name", name), []).append(edge)
+        if index is not None:
+            ports.setdefault((component_id, "index", index), []).append(edge)
+
+    @staticmethod
+    def _port_lookup(ports: Dict[_PortKey, List[Edge]], component_id: Any, param: Any, index: Any) -> List[Edge]:
+        by_name = ports.get((component_id, "name", param), []) if param is not None else []
+        by_index = ports.get((component_id, "index", index), []) if index is not None else []
+        if not by_index:
+            return list(by_name)
+        seen = {id(edge) for edge in by_name}
+        return list(by_name) + [edge for edge in by_index if id(edge) not in seen]
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def incoming(self, component_id: Any) -> List[Edge]:
+        """Edges whose target is ``component_id``."""
+        return list(self._incoming.get(component_id, []))
+
+    def outgoing(self, component_id: Any) -> List[Edge]:
+        """Edges whose source is ``component_id``."""
+        return list(self._outgoing.get(component_id, []))
+
+    def related(self, component_id: Any) -> List[Edge]:
+        """Edges touching ``component_id`` in either direction."""
+        return list(self._related.get(component_id, []))
+
+    def inputs_at(self, component_id: Any, param: Any = None, index: Any = None) -> List[Edge]:
+        """Edges arriving at an input port matched by name or index."""
+        return self._port_lookup(self._input_ports, component_id, param, index)
+
+    def outputs_at(self, component_id: Any, param: Any = None, index: Any = None) -> List[Edge]:
+        """Edges leaving an output port matched by name or index."""
+        return self._port_lookup(self._output_ports, component_id, param, index)
+
+    def is_input_connected(self, component_id: Any, param: Any = None, index: Any = None) -> bool:
+        return bool(self.inputs_at(component_id, param, index))
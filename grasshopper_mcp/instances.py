@@ -0,0 +1,222 @@
+"""
+A pool of Grasshopper listeners for work that can run in parallel.
+
+The bridge edits one canvas, the listener at ``GRASSHOPPER_HOST`` and
+``GRASSHOPPER_PORT``. Work made of independent pieces (the samples of a sweep,
+a list of saved documents to evaluate) can instead be spread over several Rhino
+and Grasshopper instances, on this machine or on others, listed as endpoints::
+
+    GRASSHOPPER_MCP_INSTANCES="localhost:8080,localhost:8081,render-02:8080"
+
+Every instance gets its own asyncio connection. Before an instance is used it
+is checked with a cheap ``get_document_info`` request; an instance that does
+not answer is skipped and checked again after ``check_interval`` seconds.
+
+Routing follows the document an instance has loaded through the pool: work on
+a document goes to an instance that already has it open (sticky), and other
+work to the healthy instance with the fewest requests in flight (least loaded).
+``map`` shards a list of items over all healthy instances, each taking the next
+item as soon as it is free, and returns the results in item order. An item
+whose instance fails (connection error or timeout) is retried on the others.
+"""
+
+import asyncio
+import collections
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .transport import AsyncTransport
+
+Endpoint = Tuple[str, int]
+
+
+def parse_endpoints(spec: Union[str, Sequence[Any], None], default_port: int = 8080) -> List[Endpoint]:
+    """Parse "host:port,host:port" (or a list of such strings or of (host, port) pairs)."""
+    if not spec:
+        return []
+    if isinstance(spec, str):
+        spec = [part for part in spec.replace(";", ",").split(",") if part.strip()]
+    endpoints = []
+    for entry in spec:
+        if isinstance(entry, (tuple, list)):
+            host, port = entry
+        else:
+            host, _, port = str(entry).strip().rpartition(":")
+            if not host:
+                host, port = port, default_port
+        endpoint = (host, int(port))
+        if endpoint not in endpoints:
+            endpoints.append(endpoint)
+    return endpoints
+
+
+class Instance:
+    """One listener of the pool, with its connection and health."""
+
+    def __init__(self, host: str, port: int, transport: AsyncTransport):
+        self.host = host
+        self.port = port
+        self.transport = transport
+        self.healthy: Optional[bool] = None
+        self.checked: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.error: Optional[str] = None
+        # Document loaded through the pool, used for sticky routing
+        self.document: Optional[str] = None
+        self.active = 0
+        self.completed = 0
+        self.failures = 0
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @property
+    def load(self) -> int:
+        return self.active + self.transport.in_flight
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "healthy": self.healthy,
+            "latencyMs": None if self.latency is None else round(self.latency * 1000, 2),
+            "document": self.document,
+            "active": self.active,
+            "inFlight": self.transport.in_flight,
+            "completed": self.completed,
+            "failures": self.failures,
+            "error": self.error,
+        }
+
+
+class InstancePool:
+    """Health-checked listeners with least-loaded and sticky-per-document routing.
+
+    Args:
+        endpoints: (host, port) of every listener
+        transport_factory: Creates the connection to one (host, port)
+        check_interval: Seconds a health check result is trusted
+        check_timeout: Seconds a listener has to answer a health check
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        transport_factory: Callable[[str, int], AsyncTransport],
+        check_interval: float = 5.0,
+        check_timeout: float = 2.0,
+    ):
+        self.instances = [Instance(host, port, transport_factory(host, port)) for host, port in endpoints]
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def find(self, host: str, port: int) -> Optional[Instance]:
+        for instance in self.instances:
+            if (instance.host, instance.port) == (host, port):
+                return instance
+        return None
+
+    async def check(self, instance: Instance, force: bool = False) -> bool:
+        """Whether ``instance`` answers, reusing a recent result unless ``force``."""
+        now = time.monotonic()
+        if not force and instance.checked is not None and now - instance.checked < self.check_interval:
+            return bool(instance.healthy)
+        request = {"jsonrpc": "2.0", "id": f"health-{uuid.uuid4().hex}", "method": "get_document_info", "params": {}}
+        try:
+            await instance.transport.request(request, timeout=self.check_timeout)
+        except Exception as e:
+            self.mark_failed(instance, e)
+        else:
+            instance.healthy = True
+            instance.error = None
+            instance.latency = time.monotonic() - now
+            instance.checked = time.monotonic()
+        return bool(instance.healthy)
+
+    def mark_failed(self, instance: Instance, error: BaseException) -> None:
+        instance.healthy = False
+        instance.checked = time.monotonic()
+        instance.error = str(error) or type(error).__name__
+        instance.failures += 1
+        # A listener that went away may come back with another document
+        instance.document = None
+
+    async def healthy(self, force: bool = False) -> List[Instance]:
+        checks = await asyncio.gather(*[self.check(instance, force) for instance in self.instances])
+        return [instance for instance, ok in zip(self.instances, checks) if ok]
+
+    async def select(self, count: Optional[int] = None, document: Optional[str] = None) -> List[Instance]:
+        """Up to ``count`` healthy instances: those with ``document`` open first, then the least loaded."""
+        candidates = await self.healthy()
+        candidates.sort(key=lambda instance: (document is None or instance.document != document, instance.load))
+        return candidates if count is None else candidates[:count]
+
+    async def acquire(self, document: Optional[str] = None) -> Optional[Instance]:
+        """The instance to send one piece of work to, or None when none is healthy."""
+        chosen = await self.select(1, document)
+        return chosen[0] if chosen else None
+
+    async def map(
+        self,
+        items: Sequence[Any],
+        worker: Callable[[Instance, Any], Awaitable[Any]],
+        instances: Optional[int] = None,
+    ) -> List[Any]:
+        """Run ``worker(instance, item)`` for every item over the healthy instances.
+
+        Args:
+            items: Work items
+            worker: Coroutine doing one item on one instance; it raises only
+                when the instance failed, other errors belong in its result
+            instances: Use at most this many instances
+
+        Returns:
+            One result per item, in item order. Items that no instance could
+            run are reported as {"success": False, "error": ...}.
+        """
+        results: List[Any] = [None] * len(items)
+        queue = collections.deque(range(len(items)))
+        errors: Dict[int, str] = {}
+        attempts = collections.Counter()
+
+        async def run(instance: Instance) -> None:
+            while queue:
+                index = queue.popleft()
+                instance.active += 1
+                try:
+                    results[index] = await worker(instance, items[index])
+                except Exception as e:
+                    # The instance failed: leave the item to the others
+                    self.mark_failed(instance, e)
+                    errors[index] = f"{instance.address}: {instance.error}"
+                    attempts[index] += 1
+                    if attempts[index] < len(self.instances):
+                        queue.appendleft(index)
+                    else:
+                        results[index] = {"success": False, "error": f"Failed on every Grasshopper instance ({errors[index]})"}
+                    return
+                finally:
+                    instance.active -= 1
+                instance.completed += 1
+
+        while queue:
+            chosen = await self.select(instances)
+            if not chosen:
+                break
+            await asyncio.gather(*[run(instance) for instance in chosen])
+        for index in queue:
+            results[index] = {
+                "success": False,
+                "error": f"No healthy Grasshopper instance ({errors.get(index, 'none answered the health check')})",
+            }
+        return results
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [instance.status() for instance in self.instances]
+
+    async def close(self) -> None:
+        await asyncio.gather(*[instance.transport.close() for instance in self.instances])
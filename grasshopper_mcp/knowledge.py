@@ -0,0 +1,288 @@
+"""
+Lookup indexes over the component knowledge base, and a store that keeps the
+parsed knowledge base in step with its JSON source.
+"""
+
+import contextlib
+import gc
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("grasshopper_mcp")
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a component name for lookups.
+
+    Case, whitespace and punctuation are ignored, and the ``GH_`` prefix used by
+    Grasshopper class names is dropped, so "Number Slider", "number-slider" and
+    "GH_NumberSlider" all map to the same key.
+    """
+    key = name.strip().lower()
+    if key.startswith("gh_"):
+        key = key[3:]
+    return _NON_ALNUM.sub("", key)
+
+
+class ComponentIndex:
+    """Dictionary indexes over the ``componentLibrary`` section.
+
+    Components are keyed by normalized ``name``, ``fullName``, ``nickname`` and
+    ``aliases``. When two entries share a key the first one wins, which matches
+    the order a linear scan over the library would find them in.
+    """
+
+    def __init__(self, component_library: Dict[str, Any]):
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_category: Dict[str, List[Dict[str, Any]]] = {}
+        self._category_names: Dict[str, str] = {}
+        self._category_of: Dict[int, str] = {}
+        self.components: List[Dict[str, Any]] = []
+
+        for category in component_library.get("categories", []):
+            for component in category.get("components", []):
+                self._add(component, category.get("name") or component.get("category"))
+        # Flat layout used by older knowledge bases
+        for component in component_library.get("components", []):
+            self._add(component, component.get("category"))
+
+    def _add(self, component: Dict[str, Any], category: Optional[str]) -> None:
+        self.components.append(component)
+        for key in self._keys(component):
+            self._by_name.setdefault(key, component)
+        if category:
+            category_key = normalize_name(category)
+            self._category_names.setdefault(category_key, category)
+            self._by_category.setdefault(category_key, []).append(component)
+            self._category_of[id(component)] = self._category_names[category_key]
+
+    @staticmethod
+    def _keys(component: Dict[str, Any]) -> Iterable[str]:
+        names = [component.get("name"), component.get("fullName"), component.get("nickname")]
+        names.extend(component.get("aliases") or [])
+        for name in names:
+            if isinstance(name, str) and name.strip():
+                yield normalize_name(name)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # ``_category_of`` is keyed by object id, which does not survive pickling
+        state = dict(self.__dict__)
+        state["_category_of"] = [self._category_of.get(id(component)) for component in self.components]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        categories = state.pop("_category_of")
+        self.__dict__.update(state)
+        self._category_of = {
+            id(component): category
+            for component, category in zip(self.components, categories)
+            if category is not None
+        }
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    def lookup(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the library entry for a component type, or None."""
+        if not name:
+            return None
+        return self._by_name.get(normalize_name(name))
+
+    def category_of(self, component: Dict[str, Any]) -> Optional[str]:
+        """Return the category name a library entry was indexed under."""
+        return self._category_of.get(id(component))
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._category_names.values())
+
+    def by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Return all library entries in a category."""
+        return list(self._by_category.get(normalize_name(category), []))
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector while building many small objects.
+
+    Parsing a large knowledge base allocates hundreds of thousands of dicts and
+    lists, and the collections triggered by those allocations cost more than the
+    parsing itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+# Bump when the pickled layout of KnowledgeSnapshot, ComponentIndex or
+# ComponentResolver changes
+SNAPSHOT_FORMAT = 2
+
+
+class KnowledgeSnapshot:
+    """One parsed version of the knowledge base together with its indexes."""
+
+    def __init__(self, data: Dict[str, Any], source_mtime_ns: int = 0, source_size: int = -1, source_hash: str = ""):
+        from .resolver import ComponentResolver  # resolver builds on this module
+
+        self.data = data
+        self.index = ComponentIndex(data.get("componentLibrary", {}))
+        self.resolver = ComponentResolver(data, self.index)
+        self.source_mtime_ns = source_mtime_ns
+        self.source_size = source_size
+        self.source_hash = source_hash
+        self.loaded_from = "json"
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.source_mtime_ns == stat.st_mtime_ns and self.source_size == stat.st_size
+
+
+class KnowledgeBaseStore:
+    """Lazily loaded knowledge base that reloads when its JSON source changes.
+
+    The parsed JSON and its indexes are pickled to ``snapshot_dir``,
+    so later processes skip parsing and indexing. A snapshot (on disk or in
+    memory) is valid while the source file's mtime and size are unchanged; when
+    they change, the SHA-256 of the source decides whether it must be rebuilt.
+
+    Reloads run on a background thread and build a complete new snapshot
+    before swapping it in: callers keep getting the previous snapshot without
+    waiting, and only the very first load is waited for.
+
+    Args:
+        path: Knowledge base JSON file
+        snapshot_dir: Directory for compiled snapshots; None disables them
+        check_interval: Minimum seconds between checks of the source file
+    """
+
+    def __init__(self, path: str, snapshot_dir: Optional[str] = None, check_interval: float = 2.0):
+        self.path = os.path.abspath(path)
+        self.snapshot_dir = snapshot_dir
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._current: Optional[KnowledgeSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._pending: Optional[Future] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="knowledge-base")
+
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        if self.snapshot_dir is None:
+            return None
+        digest = hashlib.sha1(self.path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.snapshot_dir, f"knowledge-{digest}.pickle")
+
+    def get(self) -> KnowledgeSnapshot:
+        """Return the current snapshot, starting a check of the source in the background when one is due."""
+        current = self._current
+        if current is None:
+            return self.reload().result()
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload()
+        return current
+
+    def reload(self) -> "Future[KnowledgeSnapshot]":
+        """Check the source on the background thread, unless a check is running, and return it."""
+        with self._lock:
+            if self._pending is None:
+                self._pending = self._executor.submit(self._reload)
+            return self._pending
+
+    def _reload(self) -> KnowledgeSnapshot:
+        try:
+            current = self._refresh(self._current)
+            self._current = current
+            self._checked_at = time.monotonic()
+            return current
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _refresh(self, current: Optional[KnowledgeSnapshot]) -> KnowledgeSnapshot:
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if current is None:
+                logger.error("Error loading knowledge base: %s", e)
+                return KnowledgeSnapshot({})
+            return current
+        if current is not None and current.matches(stat):
+            return current
+        try:
+            # Fast path: a compiled snapshot whose recorded mtime and size match
+            snapshot = self._read_snapshot(stat, None)
+            if snapshot is None:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                source_hash = hashlib.sha256(raw).hexdigest()
+                if current is not None and current.source_hash == source_hash:
+                    # Touched but unchanged
+                    current.source_mtime_ns, current.source_size = stat.st_mtime_ns, stat.st_size
+                    return current
+                snapshot = self._read_snapshot(stat, source_hash)
+                if snapshot is None:
+                    with _gc_paused():
+                        snapshot = KnowledgeSnapshot(
+                            json.loads(raw.decode("utf-8-sig")), stat.st_mtime_ns, stat.st_size, source_hash
+                        )
+                # Record the new mtime so the next process takes the fast path
+                self._write_snapshot(snapshot)
+        except Exception as e:
+            # A half-written edit must not take the knowledge base away
+            logger.error("Error loading knowledge base: %s", e)
+            return current if current is not None else KnowledgeSnapshot({})
+        if current is not None:
+            self.reloads += 1
+        return snapshot
+
+    def _read_snapshot(self, stat: os.stat_result, source_hash: Optional[str]) -> Optional[KnowledgeSnapshot]:
+        snapshot_path = self.snapshot_path
+        if snapshot_path is None or not os.path.exists(snapshot_path):
+            return None
+        try:
+            with open(snapshot_path, "rb") as f, _gc_paused():
+                stored = pickle.load(f)
+        except Exception as e:
+            logger.warning("Ignoring unreadable knowledge base snapshot %s: %s", snapshot_path, e)
+            return None
+        if not isinstance(stored, dict) or stored.get("format") != SNAPSHOT_FORMAT:
+            return None
+        snapshot = stored["snapshot"]
+        if not snapshot.matches(stat) and (source_hash is None or snapshot.source_hash != source_hash):
+            return None
+        snapshot.source_mtime_ns, snapshot.source_size = stat.st_mtime_ns, stat.st_size
+        snapshot.loaded_from = "snapshot"
+        return snapshot
+
+    def _write_snapshot(self, snapshot: KnowledgeSnapshot) -> None:
+        snapshot_path = self.snapshot_path
+        if snapshot_path is None:
+            return
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump({"format": SNAPSHOT_FORMAT, "snapshot": snapshot}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, snapshot_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            logger.warning("Could not write knowledge base snapshot: %s", e)
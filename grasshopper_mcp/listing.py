@@ -0,0 +1,218 @@
+"""
+Projection, filtering and pagination of canvas listings.
+
+``get_all_components``, ``get_connections`` and ``grasshopper://status`` list
+the whole canvas by default. On large documents a caller can ask for part of
+it instead:
+
+* ``fields`` / ``exclude``: keep only, or drop, keys of every item. Dotted
+  names reach into nested dicts ("currentSettings.value"); "id" is always kept.
+* filters: component types, a rectangle of the canvas ("x0,y0,x1,y1") and
+  connectivity (``CONNECTIVITY``). Connections are kept when one of their ends
+  passes the component filters.
+* cursors: a page carries ``nextCursor``, an opaque string that resumes the
+  listing after the last item of the page. The cursor remembers that item, so
+  components added or removed before it do not make the next page skip or
+  repeat items.
+"""
+
+import base64
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .cache import connection_key
+from .graph import ConnectionGraph
+from .knowledge import normalize_name
+
+Region = Tuple[float, float, float, float]
+
+# Connectivity filters: any wire, no wire, no incoming wire, no outgoing wire
+CONNECTIVITY = ("connected", "isolated", "sources", "sinks")
+
+# Keys kept by every projection
+ALWAYS_KEPT = ("id",)
+
+# Component keys filled from the component library, and the library entry keys they come from.
+# Listings return them once per type ("library") instead of with every component.
+LIBRARY_FIELDS = {"availableSettings": "settings", "inputDetails": "inputs", "outputDetails": "outputs"}
+
+
+def parse_names(spec: Union[str, Sequence[str], None]) -> Optional[List[str]]:
+    """A comma separated string or a list of names as a list, None when empty."""
+    if spec is None:
+        return None
+    names = spec.split(",") if isinstance(spec, str) else list(spec)
+    names = [str(name).strip() for name in names if str(name).strip()]
+    return names or None
+
+
+def parse_region(spec: Union[str, Sequence[float], None]) -> Optional[Region]:
+    """A rectangle given as "x0,y0,x1,y1" or four numbers, as (min x, min y, max x, max y)."""
+    if spec is None or spec == "":
+        return None
+    values = spec.split(",") if isinstance(spec, str) else list(spec)
+    if len(values) != 4:
+        raise ValueError(f"region needs four numbers x0,y0,x1,y1, got {spec!r}")
+    x0, y0, x1, y1 = (float(value) for value in values)
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def wants(name: str, fields: Optional[Sequence[str]], exclude: Optional[Sequence[str]]) -> bool:
+    """Whether the top-level key ``name`` survives a projection."""
+    if exclude and name in exclude:
+        return False
+    if fields is None or name in ALWAYS_KEPT:
+        return True
+    return any(field == name or field.startswith(name + ".") for field in fields)
+
+
+def _lookup(item: Dict[str, Any], path: List[str]) -> Tuple[bool, Any]:
+    value: Any = item
+    for part in path:
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def projector(fields: Optional[Sequence[str]] = None, exclude: Optional[Sequence[str]] = None) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """A function returning a copy of an item with only ``fields`` and without ``exclude``.
+
+    The field names are parsed once, so that projecting every item of a large
+    listing costs little more than copying it.
+    """
+    keep = None if fields is None else [field.split(".") for field in dict.fromkeys(list(ALWAYS_KEPT) + list(fields))]
+    top_level = keep is not None and all(len(path) == 1 for path in keep)
+    drop = [field.split(".") for field in exclude or () if field not in ALWAYS_KEPT]
+
+    def project_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        if keep is None:
+            projected = dict(item)
+        elif top_level:
+            projected = {path[0]: item[path[0]] for path in keep if path[0] in item}
+        else:
+            projected = {}
+            for path in keep:
+                found, value = _lookup(item, path)
+                if not found:
+                    continue
+                target = projected
+                for part in path[:-1]:
+                    target = target.setdefault(part, {})
+                target[path[-1]] = value
+        for *parents, last in drop:
+            target = projected
+            for part in parents:
+                child = target.get(part)
+                if not isinstance(child, dict):
+                    break
+                # Nested dicts may be shared with the canvas cache: change copies
+                child = dict(child)
+                target[part] = child
+                target = child
+            else:
+                target.pop(last, None)
+        return projected
+
+    return project_item
+
+
+def project(item: Dict[str, Any], fields: Optional[Sequence[str]] = None, exclude: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """A copy of ``item`` with only ``fields`` and without ``exclude``."""
+    return projector(fields, exclude)(item)
+
+
+def _in_region(component: Dict[str, Any], region: Region) -> bool:
+    x, y = component.get("x"), component.get("y")
+    if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+        return False
+    return region[0] <= x <= region[2] and region[1] <= y <= region[3]
+
+
+def _connectivity(component_id: Any, graph: ConnectionGraph, connectivity: str) -> bool:
+    if connectivity == "connected":
+        return bool(graph.related(component_id))
+    if connectivity == "isolated":
+        return not graph.related(component_id)
+    if connectivity == "sources":
+        return not graph.incoming(component_id)
+    return not graph.outgoing(component_id)
+
+
+def filter_components(
+    components: Iterable[Dict[str, Any]],
+    graph: ConnectionGraph,
+    types: Optional[Sequence[str]] = None,
+    region: Optional[Region] = None,
+    connectivity: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """The components of the given types, inside ``region`` and with the given connectivity.
+
+    Types are compared like component names elsewhere (ignoring case and
+    punctuation), so "number slider" matches "Number Slider".
+    """
+    if connectivity is not None and connectivity not in CONNECTIVITY:
+        raise ValueError(f"connectivity must be one of {', '.join(CONNECTIVITY)}, got {connectivity!r}")
+    type_keys = {normalize_name(name) for name in types} if types else None
+    selected = []
+    for component in components:
+        if type_keys is not None and normalize_name(str(component.get("type", ""))) not in type_keys:
+            continue
+        if region is not None and not _in_region(component, region):
+            continue
+        if connectivity is not None and not _connectivity(component.get("id"), graph, connectivity):
+            continue
+        selected.append(component)
+    return selected
+
+
+def filter_connections(connections: Iterable[Dict[str, Any]], component_ids: Set[Any]) -> List[Dict[str, Any]]:
+    """The connections with at least one end in ``component_ids``."""
+    return [c for c in connections if c.get("sourceId") in component_ids or c.get("targetId") in component_ids]
+
+
+def component_key(component: Dict[str, Any]) -> Any:
+    return component.get("id")
+
+
+def wire_key(connection: Dict[str, Any]) -> Any:
+    return list(connection_key(connection))
+
+
+def encode_cursor(offset: int, last: Any) -> str:
+    text = json.dumps([offset, last], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Any]:
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        offset, last = json.loads(text)
+        return int(offset), last
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+def paginate(
+    items: List[Dict[str, Any]],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    key: Callable[[Dict[str, Any]], Any] = component_key,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """The page of ``items`` after ``cursor`` and the cursor of the next page (None on the last).
+
+    Raises:
+        ValueError: When the cursor is not one returned by this function
+    """
+    start = 0
+    if cursor:
+        offset, last = decode_cursor(cursor)
+        if 0 < offset <= len(items) and key(items[offset - 1]) == last:
+            start = offset
+        else:
+            # The listing changed before the cursor: resume after the remembered item
+            start = next((i + 1 for i, item in enumerate(items) if key(item) == last), min(offset, len(items)))
+    end = len(items) if limit is None else start + max(1, limit)
+    page = items[start:end]
+    next_cursor = encode_cursor(end, key(items[end - 1])) if end < len(items) else None
+    return page, next_cursor
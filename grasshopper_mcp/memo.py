@@ -0,0 +1,147 @@
+"""
+Disk-backed memo of Grasshopper results.
+
+Re-evaluating a definition in a state it was already in (same components and
+wires, same slider values) makes Grasshopper solve it again and the bridge
+transfer the same geometry again. ``SolutionCache`` keeps such results in a
+SQLite file, keyed by::
+
+    sha256(graph hash, inputs hash, method, params)
+
+where the graph and inputs hashes come from ``CanvasCache.solution_key``. A
+change of structure or values gives a different key, so entries never have to
+be rewritten: they stay valid for the state they were computed in. Entries also
+record their graph hash, so that every result of a graph can be dropped when a
+command may have changed it in ways the key does not show (see
+``OPAQUE_METHODS`` in ``grasshopper_mcp.cache``).
+
+The key only covers what the component listing shows. Script source,
+geometry internalized in parameters or referenced from Rhino and random seeds
+are not part of it, so a result computed from them is served again after they
+changed, until the caller asks for a refresh.
+
+Values are stored as zlib-compressed JSON. When the file grows beyond
+``max_bytes``, the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from .serialization import JSON
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    key TEXT PRIMARY KEY,
+    graph TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used);
+CREATE INDEX IF NOT EXISTS solutions_graph ON solutions (graph);
+"""
+
+# Fraction of max_bytes kept after an eviction, so that not every put evicts
+_EVICT_TO = 0.9
+
+
+def result_key(graph: str, inputs: str, method: str, params: Optional[Dict[str, Any]]) -> str:
+    text = json.dumps([graph, inputs, method, params or {}], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SolutionCache:
+    """LRU memo of results in a SQLite file.
+
+    Args:
+        path: SQLite file (created with its directory if needed)
+        max_bytes: Total size of the stored values before the least recently
+            used entries are evicted
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        (self.size,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE solutions SET used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return JSON.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, graph: str, value: Any) -> None:
+        blob = zlib.compress(JSON.dumps(value), 1)
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            row = self._db.execute("SELECT size FROM solutions WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO solutions (key, graph, value, size, used) VALUES (?, ?, ?, ?, ?)",
+                (key, graph, blob, len(blob), time.time()),
+            )
+            self.size += len(blob) - (row[0] if row else 0)
+            self.stores += 1
+            if self.size > self.max_bytes:
+                self._evict(int(self.max_bytes * _EVICT_TO))
+
+    def _evict(self, target: int) -> None:
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM solutions ORDER BY used"):
+            if self.size <= target:
+                break
+            victims.append((key,))
+            self.size -= size
+        self._db.executemany("DELETE FROM solutions WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def invalidate(self, graph: Optional[str] = None) -> int:
+        """Drop the entries of ``graph`` (every entry when None); returns how many."""
+        with self._lock:
+            if graph is None:
+                removed = self._db.execute("DELETE FROM solutions").rowcount
+            else:
+                removed = self._db.execute("DELETE FROM solutions WHERE graph = ?", (graph,)).rowcount
+            (self.size,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()
+            self.invalidations += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": self.size,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
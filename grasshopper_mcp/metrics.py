@@ -0,0 +1,343 @@
+"""
+Latency, payload-size and error metrics for bridge tools and listener requests.
+
+Two families of series are kept, both keyed by name:
+
+* ``tools``: one per MCP tool, measured from the moment the tool is called
+  until it returns.
+* ``requests``: one per JSON-RPC method sent to the listener (batches are
+  recorded under ``"batch"``).
+
+Every series counts calls, errors and timeouts, and records a latency histogram
+together with the round trips and bytes sent and received on the wire. The
+transports report each completed exchange through ``Metrics.record_exchange``;
+the exchange is attributed to every call in progress in the current context, so
+a tool is charged for all the round trips of the requests it makes.
+
+The request schedulers report their queues through ``Metrics.record_queue``:
+one ``QueueSeries`` per listener and priority class, with the requests waiting
+and in flight and a histogram of the time requests waited for their turn.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds of the latency buckets: 0.5 ms, doubling every two
+# buckets, up to about 9 minutes
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(0.0005 * 2 ** (i / 2) for i in range(41))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with interpolated quantiles."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        # One count per bound plus the +Inf bucket
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for position, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[position - 1] if position else 0.0
+                upper = self.bounds[position] if position < len(self.bounds) else self.max
+                value = lower + (upper - lower) * (rank - cumulative) / count
+                return min(max(value, self.min), self.max)
+            cumulative += count
+        return self.max
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        """(le, count) pairs in Prometheus bucket order, ending with +Inf."""
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            yield f"{bound:.6g}", total
+        yield "+Inf", self.count
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _latency_ms(histogram: Histogram) -> Dict[str, Optional[float]]:
+    latency = {"mean": _ms(histogram.sum / histogram.count) if histogram.count else None}
+    for q in QUANTILES:
+        latency[f"p{round(q * 100)}"] = _ms(histogram.quantile(q))
+    latency["max"] = _ms(histogram.max)
+    return latency
+
+
+class Series:
+    """Counters and latency histogram of one tool or request method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "latencyMs": _latency_ms(self.latency),
+            "roundTrips": self.round_trips,
+            "roundTripsPerCall": round(self.round_trips / self.calls, 3) if self.calls else None,
+            "bytesSent": self.bytes_sent,
+            "bytesReceived": self.bytes_received,
+        }
+
+
+class QueueSeries:
+    """Queue of one priority class of a listener's scheduler."""
+
+    def __init__(self):
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.wait = Histogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "inFlight": self.in_flight,
+            "admitted": self.admitted,
+            "waitMs": _latency_ms(self.wait),
+        }
+
+
+class Call:
+    """A tool call or request in progress."""
+
+    __slots__ = ("parent", "round_trips", "bytes_sent", "bytes_received", "failed", "timed_out")
+
+    def __init__(self, parent: Optional["Call"]):
+        self.parent = parent
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.failed = False
+        self.timed_out = False
+
+    def fail(self, timeout: bool = False) -> None:
+        """Mark the call failed; a timeout also counts against the calls enclosing it."""
+        self.failed = True
+        call = self
+        while timeout and call is not None:
+            call.timed_out = True
+            call = call.parent
+
+
+_current_call: contextvars.ContextVar = contextvars.ContextVar("grasshopper_mcp_call", default=None)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Registry of tool and request series shared by the bridge."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.tools: Dict[str, Series] = {}
+        self.requests: Dict[str, Series] = {}
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # Requests answered from an identical one in flight, and round trips saved
+        self.coalesced = 0
+        self.round_trips_saved = 0
+        # Scheduler queues by (listener, priority class)
+        self.queues: Dict[Tuple[str, str], QueueSeries] = {}
+        # Sync transports may be used from worker threads
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def measure(self, kind: str, name: str) -> Iterator[Call]:
+        """Time a tool call (``kind="tools"``) or request (``kind="requests"``)."""
+        call = Call(_current_call.get())
+        token = _current_call.set(call)
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call.failed = True
+            raise
+        finally:
+            _current_call.reset(token)
+            self._record(getattr(self, kind), name, time.perf_counter() - start, call)
+
+    def _record(self, series_by_name: Dict[str, Series], name: str, elapsed: float, call: Call) -> None:
+        with self._lock:
+            series = series_by_name.get(name)
+            if series is None:
+                series = series_by_name[name] = Series()
+            series.calls += 1
+            series.errors += call.failed
+            series.timeouts += call.timed_out
+            series.round_trips += call.round_trips
+            series.bytes_sent += call.bytes_sent
+            series.bytes_received += call.bytes_received
+            series.latency.observe(elapsed)
+
+    def record_exchange(self, sent: int, received: int) -> None:
+        """Transport observer: one completed round trip of ``sent``/``received`` bytes."""
+        with self._lock:
+            self.round_trips += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+        call = _current_call.get()
+        while call is not None:
+            call.round_trips += 1
+            call.bytes_sent += sent
+            call.bytes_received += received
+            call = call.parent
+
+    def record_coalesced(self, round_trip_saved: bool) -> None:
+        """Single-flight observer: a request shared the reply of an identical one."""
+        with self._lock:
+            self.coalesced += 1
+            self.round_trips_saved += round_trip_saved
+
+    def record_queue(self, listener: str, priority: str, queued: int, in_flight: int, waited: Optional[float]) -> None:
+        """Scheduler observer: the queue of a class changed, ``waited`` is set when a request was admitted."""
+        with self._lock:
+            series = self.queues.get((listener, priority))
+            if series is None:
+                series = self.queues[(listener, priority)] = QueueSeries()
+            series.queued = queued
+            series.in_flight = in_flight
+            if waited is not None:
+                series.admitted += 1
+                series.wait.observe(waited)
+
+    def instrument(self, name: str, fn: Callable) -> Callable:
+        """Wrap a tool function so that its calls are measured under ``name``.
+
+        A tool that returns ``{"success": False, ...}`` counts as an error.
+        """
+        def check(call: Call, result: Any) -> Any:
+            if isinstance(result, dict) and result.get("success", True) is False:
+                call.failed = True
+            return result
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with self.measure("tools", name) as call:
+                    return check(call, await fn(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.measure("tools", name) as call:
+                return check(call, fn(*args, **kwargs))
+        return wrapper
+
+    def reset(self) -> None:
+        with self._lock:
+            self.__init__()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            queues: Dict[str, Dict[str, Any]] = {}
+            for (listener, priority), series in sorted(self.queues.items()):
+                queues.setdefault(listener, {})[priority] = series.to_dict()
+            return {
+                "uptimeSeconds": round(time.time() - self.started, 3),
+                "roundTrips": self.round_trips,
+                "bytesSent": self.bytes_sent,
+                "bytesReceived": self.bytes_received,
+                "coalesced": self.coalesced,
+                "roundTripsSaved": self.round_trips_saved,
+                "tools": {name: series.to_dict() for name, series in sorted(self.tools.items())},
+                "requests": {name: series.to_dict() for name, series in sorted(self.requests.items())},
+                "queues": queues,
+            }
+
+    def prometheus(self, prefix: str = "grasshopper_mcp") -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for kind, label in (("tool", "tool"), ("request", "method")):
+                series_by_name = self.tools if kind == "tool" else self.requests
+                name = f"{prefix}_{kind}_duration_seconds"
+                lines.append(f"# HELP {name} Latency of bridge {kind}s.")
+                lines.append(f"# TYPE {name} histogram")
+                for key, series in sorted(series_by_name.items()):
+                    labels = f'{label}="{_label(key)}"'
+                    for le, count in series.latency.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                    lines.append(f"{name}_sum{{{labels}}} {series.latency.sum:.6f}")
+                    lines.append(f"{name}_count{{{labels}}} {series.latency.count}")
+                for counter, attribute, description in (
+                    ("errors", "errors", "failed"),
+                    ("timeouts", "timeouts", "timed out"),
+                    ("round_trips", "round_trips", "listener round trips of"),
+                    ("sent_bytes", "bytes_sent", "bytes sent by"),
+                    ("received_bytes", "bytes_received", "bytes received by"),
+                ):
+                    name = f"{prefix}_{kind}_{counter}_total"
+                    lines.append(f"# HELP {name} Total {description} bridge {kind}s.")
+                    lines.append(f"# TYPE {name} counter")
+                    for key, series in sorted(series_by_name.items()):
+                        lines.append(f'{name}{{{label}="{_label(key)}"}} {getattr(series, attribute)}')
+            queues = sorted(self.queues.items())
+            name = f"{prefix}_queue_wait_seconds"
+            lines.append(f"# HELP {name} Time requests waited for their turn in the scheduler.")
+            lines.append(f"# TYPE {name} histogram")
+            for (listener, priority), series in queues:
+                labels = f'listener="{_label(listener)}",class="{_label(priority)}"'
+                for le, count in series.wait.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {series.wait.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {series.wait.count}")
+            for metric, kind, attribute, description in (
+                ("queue_depth", "gauge", "queued", "Requests waiting in the scheduler."),
+                ("queue_in_flight", "gauge", "in_flight", "Requests admitted by the scheduler and not answered yet."),
+                ("queue_admitted_total", "counter", "admitted", "Requests admitted by the scheduler."),
+            ):
+                name = f"{prefix}_{metric}"
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (listener, priority), series in queues:
+                    lines.append(f'{name}{{listener="{_label(listener)}",class="{_label(priority)}"}} {getattr(series, attribute)}')
+            for counter, value in (
+                ("round_trips", self.round_trips),
+                ("sent_bytes", self.bytes_sent),
+                ("received_bytes", self.bytes_received),
+                ("coalesced_requests", self.coalesced),
+                ("saved_round_trips", self.round_trips_saved),
+            ):
+                name = f"{prefix}_transport_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
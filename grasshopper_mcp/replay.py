@@ -0,0 +1,377 @@
+"""
+Replay of recorded traces against a listener, to plan capacity.
+
+A trace recorded by the bridge (``GRASSHOPPER_MCP_TRACE``, see
+``grasshopper_mcp.trace``) is sent again by N concurrent virtual sessions, each
+with its own connection like separate bridges of separate agents. A session
+sends an exchange once the exchanges that had replied when it was recorded
+replied again, after the pause recorded since the last of them (the agent
+thinking) divided by ``speed``: 1 is real time, 10 ten times faster and 0
+without pauses. Like an agent, a session waits for the replies it depends on,
+and requests that were concurrent stay concurrent. With ``open_loop`` every
+exchange is sent at its recorded time divided by ``speed`` instead, whether or
+not earlier replies arrived, so the load does not drop when the listener slows
+down.
+
+Ids of components the trace created are mapped, per session, to the ids
+returned when the session creates them again; a request using such an id waits
+until it is known. This needs a trace with responses. Components that existed
+before the recording are expected on the listener: with ``--fake`` they are
+staged on a fresh stand-in listener that runs commands one at a time like the
+Rhino UI thread (``--latency-from-trace`` makes every command take its median
+recorded time). Sessions share the document, so commands that edit it (delete,
+clear...) affect the other sessions, as they would with real agents.
+
+The report gives, per method, the recorded latency and the replayed latency
+percentiles, the exchanges that failed although they succeeded when recorded,
+and the throughput. With several session counts (``--sessions 1,2,4,8``) one
+line per count shows how latency grows with the load, and ``--slo`` reports the
+most sessions whose p95 latency stays within a budget.
+
+Usage:
+    python -m grasshopper_mcp.replay TRACE [--sessions 1,2,4,8] [--speed X] [--open-loop]
+        [--host HOST --port PORT | --fake [--latency-from-trace]] [--slo MS] [--json PATH]
+"""
+
+import argparse
+import asyncio
+import heapq
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import is_success
+from .fake_listener import FakeCanvas, FakeGrasshopperListener
+from .serialization import JSON
+from .trace import read_trace
+from .transport import AsyncTransport
+
+# Request parameters holding the id of a component
+ID_PARAMS = ("id", "componentId", "sourceId", "targetId")
+# Output items given to staged components that the trace reads geometry from
+STAGED_GEOMETRY_ITEMS = 100
+
+
+def _method(record: Dict[str, Any]) -> str:
+    """Name of the exchange in the report: the method, or the methods of a batch."""
+    methods = sorted({method for method, _ in record["requests"]})
+    return f"batch {'+'.join(methods)}" if record.get("batch") else methods[0]
+
+
+def _data(response: Any) -> Any:
+    return response.get("result") if isinstance(response, dict) else None
+
+
+def created_ids(records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Ids of the components created by the trace, with the index of the exchange creating each."""
+    created = {}
+    for index, record in enumerate(records):
+        for (method, _), response in zip(record["requests"], record.get("responses") or ()):
+            data = _data(response)
+            if method == "add_component" and isinstance(data, dict) and isinstance(data.get("id"), str):
+                created.setdefault(data["id"], index)
+    return created
+
+
+def _walk(value: Any):
+    yield value
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _walk(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _walk(item)
+
+
+def stage_canvas(canvas: FakeCanvas, records: List[Dict[str, Any]]) -> int:
+    """Add the components the trace uses but did not create to ``canvas``; returns how many.
+
+    Component types come from the recorded responses (e.g. of
+    get_all_components), Number Slider when unknown. Components whose geometry
+    is read get STAGED_GEOMETRY_ITEMS output items.
+    """
+    created = created_ids(records)
+    types: Dict[str, str] = {}
+    for record in records:
+        for value in _walk(record.get("responses") or []):
+            if isinstance(value, dict) and isinstance(value.get("id"), str) and isinstance(value.get("type"), str):
+                types.setdefault(value["id"], value["type"])
+    staged = 0
+    for record in records:
+        for method, params in record["requests"]:
+            for name in ID_PARAMS:
+                component_id = params.get(name)
+                if not isinstance(component_id, str) or component_id in created or component_id in canvas.components:
+                    continue
+                canvas.stage_component(component_id, types.get(component_id, "Number Slider"))
+                staged += 1
+                if method == "get_geometry":
+                    canvas.fill_geometry(component_id, STAGED_GEOMETRY_ITEMS)
+    return staged
+
+
+def recorded_latency(records: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Median recorded seconds per method; the time of a batch is split evenly among its requests."""
+    latencies: Dict[str, List[float]] = {}
+    for record in records:
+        for method, _ in record["requests"]:
+            latencies.setdefault(method, []).append(record["ms"] / 1000 / len(record["requests"]))
+    return {method: statistics.median(values) for method, values in latencies.items()}
+
+
+class _Session:
+    """One virtual session replaying the trace over its own connection."""
+
+    def __init__(self, transport: AsyncTransport, records: List[Dict[str, Any]], created: Dict[str, int], timeout: float):
+        self.transport = transport
+        self.records = records
+        self.created = created
+        self.timeout = timeout
+        # Recorded id -> id of the component this session created in its place
+        self._ids: Dict[str, asyncio.Future] = {}
+        self.results: List[Tuple[str, float, bool, bool]] = []
+        # time.perf_counter() when each exchange replied
+        self._replied: Dict[int, float] = {}
+
+    def _future(self, recorded_id: str) -> asyncio.Future:
+        future = self._ids.get(recorded_id)
+        if future is None:
+            future = self._ids[recorded_id] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def _map(self, value: Any, index: int) -> Any:
+        """Replace the recorded ids in ``value`` of exchanges before ``index`` by this session's ids."""
+        if isinstance(value, str):
+            return await self._future(value) if self.created.get(value, index) < index else value
+        if isinstance(value, dict):
+            return {key: await self._map(item, index) for key, item in value.items()}
+        if isinstance(value, list):
+            return [await self._map(item, index) for item in value]
+        return value
+
+    def _learn(self, index: int, responses: List[Any]) -> None:
+        """Map the ids created by exchange ``index`` to the ones created now, or to themselves on failure."""
+        recorded_responses = self.records[index].get("responses") or ()
+        responses = list(responses) + [None] * len(recorded_responses)
+        for recorded, response in zip(recorded_responses, responses):
+            recorded_data, data = _data(recorded), _data(response)
+            recorded_id = recorded_data.get("id") if isinstance(recorded_data, dict) else None
+            if recorded_id is None or self.created.get(recorded_id) != index:
+                continue
+            future = self._future(recorded_id)
+            if not future.done():
+                future.set_result(data.get("id", recorded_id) if isinstance(data, dict) else recorded_id)
+
+    async def exchange(self, index: int) -> None:
+        record = self.records[index]
+        responses: List[Any] = []
+        try:
+            requests = [
+                {"jsonrpc": "2.0", "id": str(uuid.uuid4()), "method": method, "params": await self._map(params, index)}
+                for method, params in record["requests"]
+            ]
+            start = time.perf_counter()
+            try:
+                if record.get("batch"):
+                    replies = await self.transport.request_batch(requests, timeout=self.timeout)
+                else:
+                    replies = [await self.transport.request(requests[0], timeout=self.timeout)]
+                responses = [reply.get("result", {"success": False, "error": reply.get("error")}) for reply in replies]
+                ok = all(is_success(response) for response in responses)
+            except Exception as e:
+                responses, ok = [{"success": False, "error": str(e)}], False
+            self.results.append((_method(record), time.perf_counter() - start, ok, record.get("ok", True)))
+        finally:
+            # Also when cancelled, so that no request waits for the ids forever
+            self._learn(index, responses)
+            self._replied[index] = time.perf_counter()
+
+    async def run(self, speed: float, open_loop: bool = False) -> None:
+        """Send every exchange of the trace and wait for the replies.
+
+        By default an exchange is sent once the exchanges that had replied when
+        it was recorded replied again, after the recorded pause since the last
+        of them divided by ``speed`` (no pause when ``speed`` is 0). With
+        ``open_loop`` it is sent at its recorded time divided by ``speed``.
+        """
+        try:
+            tasks: List[asyncio.Future] = []
+            # (recorded reply time, index) of the exchanges sent and not waited for
+            replies: List[Tuple[float, int]] = []
+            start = time.perf_counter()
+            last_reply, resumed = (self.records[0]["t"], start) if self.records else (0.0, start)
+            for index, record in enumerate(self.records):
+                if open_loop:
+                    at = start + record["t"] / speed
+                else:
+                    while replies and replies[0][0] <= record["t"]:
+                        replied, earlier = heapq.heappop(replies)
+                        await tasks[earlier]
+                        if replied >= last_reply:
+                            last_reply, resumed = replied, self._replied[earlier]
+                    at = resumed + (record["t"] - last_reply) / speed if speed > 0 else 0.0
+                delay = at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(self.exchange(index)))
+                heapq.heappush(replies, (record["t"] + record["ms"] / 1000, index))
+            await asyncio.gather(*tasks)
+        finally:
+            await self.transport.close()
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _latency(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50": _ms(_percentile(values, 0.5)),
+        "p95": _ms(_percentile(values, 0.95)),
+        "p99": _ms(_percentile(values, 0.99)),
+        "max": _ms(max(values) if values else None),
+    }
+
+
+async def replay(
+    records: List[Dict[str, Any]],
+    host: str,
+    port: int,
+    sessions: int = 1,
+    speed: float = 1.0,
+    timeout: float = 30.0,
+    open_loop: bool = False,
+    **transport_options: Any,
+) -> Dict[str, Any]:
+    """Replay ``records`` with ``sessions`` concurrent sessions and summarize the latencies.
+
+    ``transport_options`` are passed to every session's AsyncTransport (framing,
+    compression, serialization).
+    """
+    if open_loop and speed <= 0:
+        raise ValueError("An open-loop replay needs a speed above 0")
+    created = created_ids(records)
+    runs = [
+        _Session(AsyncTransport(host, port, timeout=timeout, **transport_options), records, created, timeout)
+        for _ in range(sessions)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*(session.run(speed, open_loop) for session in runs))
+    elapsed = time.perf_counter() - start
+
+    recorded: Dict[str, List[float]] = {}
+    for record in records:
+        recorded.setdefault(_method(record), []).append(record["ms"] / 1000)
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for session in runs:
+        for method, seconds, ok, recorded_ok in session.results:
+            latencies.setdefault(method, []).append(seconds)
+            errors[method] = errors.get(method, 0) + (recorded_ok and not ok)
+    every = [seconds for values in latencies.values() for seconds in values]
+    return {
+        "sessions": sessions,
+        "speed": speed,
+        "openLoop": open_loop,
+        "seconds": round(elapsed, 3),
+        "exchanges": len(every),
+        "perSecond": round(len(every) / elapsed, 1) if elapsed else None,
+        "errors": sum(errors.values()),
+        "latencyMs": _latency(every),
+        "methods": {
+            method: {
+                "count": len(values),
+                "errors": errors[method],
+                "recordedMs": _latency(recorded[method]),
+                "latencyMs": _latency(values),
+            }
+            for method, values in sorted(latencies.items())
+        },
+    }
+
+
+def _print_methods(report: Dict[str, Any]) -> None:
+    print(f"{'method':>32} {'count':>6} {'errors':>6} {'recorded p50':>12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for method, series in report["methods"].items():
+        latency = series["latencyMs"]
+        print(
+            f"{method:>32} {series['count']:6d} {series['errors']:6d} {series['recordedMs']['p50']:12.1f} "
+            f"{latency['p50']:8.1f} {latency['p95']:8.1f} {latency['p99']:8.1f} {latency['max']:8.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded trace with concurrent sessions",
+        epilog="See the module documentation of grasshopper_mcp.replay.",
+    )
+    parser.add_argument("trace", help="trace file recorded with GRASSHOPPER_MCP_TRACE")
+    parser.add_argument("--sessions", default="1", help="concurrent sessions, or a comma-separated list of counts to try")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 1 is real time, 0 without pauses")
+    parser.add_argument("--open-loop", action="store_true", help="send at the recorded times without waiting for replies")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fake", action="store_true", help="replay against a fresh stand-in listener for every count")
+    parser.add_argument("--latency-from-trace", action="store_true", help="stand-in commands take their median recorded time")
+    parser.add_argument("--framing", default="auto")
+    parser.add_argument("--compression", default="none")
+    parser.add_argument("--serialization", default="json")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds per exchange")
+    parser.add_argument("--slo", type=float, help="p95 latency budget in ms")
+    parser.add_argument("--json", dest="json_path", help="write the reports to this file")
+    args = parser.parse_args(argv)
+
+    counts = [int(count) for count in args.sessions.split(",")]
+    if args.open_loop and args.speed <= 0:
+        parser.error("--open-loop needs a --speed above 0")
+    header, records = read_trace(args.trace)
+    if not records:
+        print(f"{args.trace}: no exchanges recorded", file=sys.stderr)
+        return 1
+    print(
+        f"{args.trace}: {len(records)} exchanges over {records[-1]['t']:.1f} s"
+        f"{'' if header.get('responses', True) else ' (without responses, created ids are not mapped)'}"
+    )
+    options = {"framing": args.framing, "compression": args.compression, "serialization": args.serialization}
+    latency = recorded_latency(records) if args.latency_from_trace else {}
+    reports = []
+    for count in counts:
+        if args.fake:
+            canvas = FakeCanvas()
+            stage_canvas(canvas, records)
+            with FakeGrasshopperListener(ui_thread=True, method_latency=latency, canvas=canvas) as listener:
+                host, port = listener.address
+                report = asyncio.run(replay(records, host, port, count, args.speed, args.timeout, args.open_loop, **options))
+        else:
+            report = asyncio.run(replay(records, args.host, args.port, count, args.speed, args.timeout, args.open_loop, **options))
+        reports.append(report)
+        if len(counts) == 1:
+            _print_methods(report)
+
+    print(f"{'sessions':>8} {'exchanges':>9} {'per s':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for report in reports:
+        latency_ms = report["latencyMs"]
+        print(
+            f"{report['sessions']:8d} {report['exchanges']:9d} {report['perSecond']:8.1f} {report['errors']:6d} "
+            f"{latency_ms['p50']:8.1f} {latency_ms['p95']:8.1f} {latency_ms['p99']:8.1f} {latency_ms['max']:8.1f}"
+        )
+    if args.slo is not None:
+        within = [report["sessions"] for report in reports if report["latencyMs"]["p95"] <= args.slo and not report["errors"]]
+        print(f"sessions within p95 <= {args.slo:g} ms: {max(within) if within else 'none'}")
+    if args.json_path:
+        with open(args.json_path, "wb") as f:
+            f.write(JSON.dumps({"trace": args.trace, "reports": reports}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Fuzzy component-name resolution over the knowledge base.
+
+Candidate names come from the component library (``name``, ``fullName``,
+``nickname``, ``aliases``), the flat ``components`` list and the
+``componentAliases`` section, which maps canonical component types to the
+alternative names users commonly type::
+
+    "componentAliases": {"Number Slider": ["slider", "numeric slider"], ...}
+
+Names are indexed by character trigrams. A query only scores the names that
+share a trigram with it, and only the best few of those are compared by edit
+distance, so lookups stay fast for libraries with tens of thousands of types.
+"""
+
+import heapq
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .knowledge import ComponentIndex, normalize_name
+
+# Candidates re-scored by edit distance after the trigram pass
+_RERANK = 12
+# Score of a component found through its category rather than its name
+_CATEGORY_SCORE = 0.7
+
+
+def trigrams(key: str) -> Set[str]:
+    """Character trigrams of a normalized name, padded so short names have some."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Edit distance counting a swap of adjacent characters as one edit.
+
+    Bit-parallel optimal string alignment distance (Hyyrö, 2003): one column of
+    the dynamic-programming matrix is kept in the bits of a few integers.
+    """
+    if not a:
+        return len(b)
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(a):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    positive, negative, diagonal, previous_match = full, 0, 0, 0
+    distance = len(a)
+    for char in b:
+        match = masks.get(char, 0)
+        transposed = ((~diagonal & match) << 1) & previous_match
+        diagonal = ((((match & positive) + positive) ^ positive) | match | negative | transposed) & full
+        horizontal_positive = (negative | ~(diagonal | positive)) & full
+        horizontal_negative = diagonal & positive
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = (horizontal_negative | ~(diagonal | horizontal_positive)) & full
+        negative = diagonal & horizontal_positive
+        previous_match = match
+    return distance
+
+
+def similarity(query: str, key: str) -> float:
+    """Score in [0, 1] of how well a normalized name matches a normalized query."""
+    if query == key:
+        return 1.0
+    if not query or not key:
+        return 0.0
+    score = 1.0 - _edit_distance(query, key) / max(len(query), len(key))
+    if key.startswith(query):
+        # A typed prefix of the name ("numsl" for "numberslider")
+        score = max(score, 0.6 + 0.35 * len(query) / len(key))
+    elif query in key:
+        score = max(score, 0.5 + 0.35 * len(query) / len(key))
+    return score
+
+
+class ComponentResolver:
+    """Trigram index over every name a component type is known by.
+
+    Args:
+        knowledge_base: The parsed knowledge base JSON
+        index: Component library index of the same knowledge base
+    """
+
+    def __init__(self, knowledge_base: Dict[str, Any], index: Optional[ComponentIndex] = None):
+        index = index if index is not None else ComponentIndex(knowledge_base.get("componentLibrary", {}))
+        # Parallel lists describing each distinct normalized key
+        self._keys: List[str] = []
+        self._targets: List[str] = []
+        self._matched: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._categories: Dict[str, List[str]] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+        for component in index.components:
+            name = component.get("name")
+            if not isinstance(name, str) or not name.strip():
+                continue
+            self._add_record(name, component, index.category_of(component))
+            names = [name, component.get("fullName"), component.get("nickname")]
+            self._add_names(name, names + list(component.get("aliases") or []))
+        for component in knowledge_base.get("components") or []:
+            name = component.get("name") if isinstance(component, dict) else None
+            if isinstance(name, str) and name.strip():
+                self._add_record(name, component, component.get("category"))
+                self._add_names(name, [name])
+        for name, aliases in (knowledge_base.get("componentAliases") or {}).items():
+            self._add_record(name, {}, None)
+            self._add_names(name, [name] + list(aliases or []))
+
+    def _add_record(self, name: str, component: Dict[str, Any], category: Optional[str]) -> None:
+        record = self._records.setdefault(name, {"name": name})
+        for field in ("fullName", "nickname", "description"):
+            if component.get(field) and field not in record:
+                record[field] = component[field]
+        if category and "category" not in record:
+            record["category"] = category
+            self._categories.setdefault(normalize_name(category), []).append(name)
+
+    def _add_names(self, target: str, names: Iterable[Any]) -> None:
+        for name in names:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            key = normalize_name(name)
+            if not key or key in self._key_ids:
+                # The first component to claim a name keeps it, like ComponentIndex
+                continue
+            key_id = len(self._keys)
+            self._key_ids[key] = key_id
+            self._keys.append(key)
+            self._targets.append(target)
+            self._matched.append(name)
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, []).append(key_id)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _candidates(self, query: str) -> List[Tuple[float, int]]:
+        """Keys sharing trigrams with ``query``, best Dice coefficient first."""
+        grams = trigrams(query)
+        postings = self._postings
+        shared = Counter(chain.from_iterable(postings[gram] for gram in grams if gram in postings))
+        keys = self._keys
+        size = len(grams) + 1
+        # Dice only reorders keys that share many trigrams, so pre-select by count
+        return heapq.nlargest(
+            _RERANK,
+            ((2.0 * count / (size + len(keys[key_id])), key_id) for key_id, count in shared.most_common(4 * _RERANK)),
+        )
+
+    def rank(self, name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Ranked component types for a (possibly misspelled) name."""
+        query = normalize_name(name or "")
+        if not query:
+            return []
+        exact = self._key_ids.get(query)
+        if exact is not None and limit == 1:
+            return [dict(self._records[self._targets[exact]], score=1.0, matched=self._matched[exact])]
+        key_ids = {key_id for _, key_id in self._candidates(query)}
+        if exact is not None:
+            key_ids.add(exact)
+        best: Dict[str, Tuple[float, str]] = {}
+        for key_id in key_ids:
+            score = similarity(query, self._keys[key_id])
+            target = self._targets[key_id]
+            if target not in best or score > best[target][0]:
+                best[target] = (score, self._matched[key_id])
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [dict(self._records[target], score=round(score, 3), matched=matched) for target, (score, matched) in ranked]
+
+    def resolve(self, name: str, min_score: float = 0.8) -> Optional[Dict[str, Any]]:
+        """Best match for ``name`` if it scores at least ``min_score``."""
+        ranked = self.rank(name, limit=1)
+        if ranked and ranked[0]["score"] >= min_score:
+            return ranked[0]
+        return None
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.4) -> List[Dict[str, Any]]:
+        """Components matching a name or a category, best first."""
+        results = {item["name"]: item for item in self.rank(query, limit) if item["score"] >= min_score}
+        for name in self._categories.get(normalize_name(query or ""), []):
+            if name not in results or results[name]["score"] < _CATEGORY_SCORE:
+                record = self._records[name]
+                results[name] = dict(record, score=_CATEGORY_SCORE, matched=record.get("category"))
+        return sorted(results.values(), key=lambda item: (-item["score"], item["name"]))[:limit]
@@ -0,0 +1,179 @@
+"""
+Priority scheduling of requests to a Grasshopper listener.
+
+The listener runs every command on the Rhino UI thread, one after the other, so
+a request waits for everything sent before it. ``Scheduler`` decides when the
+bridge may send a request:
+
+* priority classes: requests are "interactive" by default; long jobs (sweeps,
+  reading every page of a geometry, scripts, batch evaluation) run their
+  requests as "bulk" with ``priority(BULK, flow)``. When a slot frees, waiting
+  classes are served in priority order.
+* per-class limits: at most ``limits[class]`` requests of a class are in
+  flight. With one bulk request in flight, an interactive request reaches the
+  listener behind at most one bulk slice, however much bulk work is queued.
+* fair queuing: waiting requests of a class are grouped by flow (a sweep, a
+  component being read...) and the flows take turns, so a long job does not
+  hold back a short one started after it.
+
+Depth, requests in flight and wait time of every class are reported to an
+observer (``Metrics.record_queue``).
+"""
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import time
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Classes in priority order, with their default limits of requests in flight (None: no limit)
+DEFAULT_LIMITS: Dict[str, Optional[int]] = {INTERACTIVE: 16, BULK: 1}
+
+# (listener, class, queued, in flight, seconds waited by an admitted request or None)
+QueueObserver = Callable[[str, str, int, int, Optional[float]], None]
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("grasshopper_mcp_priority", default=(INTERACTIVE, None))
+
+
+@contextlib.contextmanager
+def priority(name: str, flow: Any = None) -> Iterator[None]:
+    """Send the requests made in this context with priority class ``name`` as part of ``flow``."""
+    token = _current_priority.set((name, flow))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Tuple[str, Any]:
+    return _current_priority.get()
+
+
+class _Class:
+    __slots__ = ("name", "limit", "active", "queued", "flows")
+
+    def __init__(self, name: str, limit: Optional[int]):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.queued = 0
+        # Waiting requests per flow; the first flow is served next
+        self.flows: "collections.OrderedDict[Any, Deque[asyncio.Future]]" = collections.OrderedDict()
+
+
+class Scheduler:
+    """Admission of requests to one listener by priority class and flow.
+
+    Args:
+        limits: Requests in flight allowed per class (None: no limit), in
+            priority order
+        total: Requests in flight allowed over all classes (None: no limit)
+        name: Listener reported to the observer, e.g. "localhost:8080"
+        observer: Called whenever the depth or the requests in flight of a
+            class change
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Optional[int]]] = None,
+        total: Optional[int] = None,
+        name: str = "",
+        observer: Optional[QueueObserver] = None,
+    ):
+        self._classes = {key: _Class(key, limit) for key, limit in (limits or DEFAULT_LIMITS).items()}
+        self.total = total
+        self.name = name
+        self.observer = observer
+        self._active = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, name: Optional[str] = None, flow: Any = None) -> AsyncIterator[None]:
+        """Wait for a slot of class ``name`` (default: the class of the current context) and hold it."""
+        if name is None:
+            name, flow = current_priority()
+        cls = self._classes.get(name)
+        if cls is None:
+            raise ValueError(f"Unknown priority class {name!r}, expected one of {list(self._classes)}")
+        start = time.perf_counter()
+        if not cls.queued and self._eligible(cls):
+            self._admit(cls)
+        else:
+            await self._wait(cls, flow)
+        self._report(cls, time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    def _eligible(self, cls: _Class) -> bool:
+        return (cls.limit is None or cls.active < cls.limit) and (self.total is None or self._active < self.total)
+
+    def _admit(self, cls: _Class) -> None:
+        cls.active += 1
+        self._active += 1
+
+    async def _wait(self, cls: _Class, flow: Any) -> None:
+        future = asyncio.get_running_loop().create_future()
+        cls.flows.setdefault(flow, collections.deque()).append(future)
+        cls.queued += 1
+        self._report(cls)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before being cancelled: hand the slot on
+                self._release(cls)
+            else:
+                self._discard(cls, flow, future)
+            raise
+
+    def _discard(self, cls: _Class, flow: Any, future: asyncio.Future) -> None:
+        waiters = cls.flows.get(flow)
+        if waiters is None or future not in waiters:
+            return
+        waiters.remove(future)
+        cls.queued -= 1
+        if not waiters:
+            del cls.flows[flow]
+        self._report(cls)
+
+    def _next(self, cls: _Class) -> asyncio.Future:
+        """Take the first waiter of the next flow and move the flow to the back of the line."""
+        flow, waiters = next(iter(cls.flows.items()))
+        future = waiters.popleft()
+        cls.queued -= 1
+        del cls.flows[flow]
+        if waiters:
+            cls.flows[flow] = waiters
+        return future
+
+    def _release(self, cls: _Class) -> None:
+        cls.active -= 1
+        self._active -= 1
+        self._report(cls)
+        for waiting in self._classes.values():
+            admitted = False
+            while waiting.queued and self._eligible(waiting):
+                future = self._next(waiting)
+                # Skip requests cancelled while waiting, or left over by a closed event loop
+                if future.done() or future.get_loop().is_closed():
+                    continue
+                self._admit(waiting)
+                future.set_result(None)
+                admitted = True
+            if admitted:
+                self._report(waiting)
+
+    def _report(self, cls: _Class, waited: Optional[float] = None) -> None:
+        if self.observer is not None:
+            self.observer(self.name, cls.name, cls.queued, cls.active, waited)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            cls.name: {"limit": cls.limit, "inFlight": cls.active, "queued": cls.queued, "flows": len(cls.flows)}
+            for cls in self._classes.values()
+        }
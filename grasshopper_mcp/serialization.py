@@ -0,0 +1,104 @@
+"""
+Serialization of the messages exchanged with the listener.
+
+Messages are JSON. When the orjson package is installed, it encodes them to
+and decodes them from bytes directly, several times faster than the json
+module. Without orjson the json module is used. Both read the UTF-8 byte
+order mark that some listeners put in front of a message.
+
+Framed connections can also negotiate MessagePack: ``hello`` lists the formats
+the bridge accepts and a listener that answers ``{"format": "msgpack"}`` sends
+and receives MessagePack frames from then on. This needs the msgpack package,
+and listeners that do not know the ``format`` parameter keep using JSON.
+The values are the same in both formats, so callers do not see the difference.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Union
+
+try:
+    import orjson
+except ImportError:  # the json module is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when msgpack is installed
+    msgpack = None
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+# "auto" offers MessagePack when msgpack is installed
+FORMAT_MODES = ("auto", FORMAT_JSON, FORMAT_MSGPACK)
+
+_BOM = b"\xef\xbb\xbf"
+
+
+class Serializer:
+    """A message format: ``dumps`` returns bytes, ``loads`` takes any bytes-like object."""
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], loads: Callable[[Buffer], Any], backend: str):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+        # Library doing the work, e.g. "orjson" or "json"
+        self.backend = backend
+
+
+def _strip_bom(data: Buffer) -> Buffer:
+    return data[len(_BOM):] if data[:len(_BOM)] == _BOM else data
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _stdlib_loads(data: Buffer) -> Any:
+    return json.loads(str(data, "utf-8-sig"))
+
+
+# JSON through the json module, used when orjson is not installed
+STDLIB_JSON = Serializer(FORMAT_JSON, _stdlib_dumps, _stdlib_loads, "json")
+
+if orjson is not None:
+    def _orjson_dumps(value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def _orjson_loads(data: Buffer) -> Any:
+        return orjson.loads(_strip_bom(data))
+
+    def canonical(value: Any) -> bytes:
+        """Compact JSON with sorted keys, equal for equal values."""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+
+    JSON = Serializer(FORMAT_JSON, _orjson_dumps, _orjson_loads, "orjson")
+else:
+    def canonical(value: Any) -> bytes:
+        """Compact JSON with sorted keys, equal for equal values."""
+        return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    JSON = STDLIB_JSON
+
+SERIALIZERS: Dict[str, Serializer] = {FORMAT_JSON: JSON}
+if msgpack is not None:
+    SERIALIZERS[FORMAT_MSGPACK] = Serializer(
+        FORMAT_MSGPACK,
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+        "msgpack",
+    )
+
+
+def offered_formats(mode: str) -> List[str]:
+    """Formats other than JSON to offer in ``hello`` for a serialization mode."""
+    if mode not in FORMAT_MODES:
+        raise ValueError(f"Unknown serialization: {mode}")
+    if mode == FORMAT_JSON:
+        return []
+    if mode == "auto":
+        return [name for name in SERIALIZERS if name != FORMAT_JSON]
+    if mode not in SERIALIZERS:
+        raise ValueError(f"{mode} serialization needs the {mode} package")
+    return [mode]
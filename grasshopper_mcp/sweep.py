@@ -0,0 +1,525 @@
+"""
+Parametric sweeps over Number Sliders.
+
+A sweep sets a group of sliders to every sample of a design space and records a
+summary of the geometry of some output components for each sample::
+
+    {
+        "sliders": [
+            {"id": "...", "min": 0, "max": 10, "steps": 5},
+            {"id": "...", "values": [1, 2, 4, 8]}
+        ],
+        "outputs": ["...", "..."],
+        "mode": "grid"
+    }
+
+``mode`` is "grid" (every combination of the slider values: ``values``, or
+``steps`` evenly spaced values from ``min`` to ``max``), "random" (``samples``
+uniform draws) or "lhs" (a Latin hypercube of ``samples`` points). Sliders with
+``values`` pick among them in the random modes.
+
+Samples are sent as JSON-RPC batches that set the sliders, run the preview and
+fetch the outputs as binary geometry, several samples per batch. The listener
+executes a batch in order, and a few batches are kept in flight so that the
+listener never waits for the bridge to summarize the previous replies.
+Since the listener runs nothing else while it works on a batch, a sweep can
+bound the time a batch takes (``slice_seconds``): it starts with one sample per
+batch and sizes the next ones from the time samples took so far.
+
+A sweep can be sharded over several listeners with the same definition loaded:
+each one takes the next batch as soon as its pipeline has room, and the batches
+of a listener that fails are handed to the others. Results are stored by sample,
+so they are in sample order whichever listener computed them.
+
+Results are written to an ``.npz`` file with one array per column:
+
+* ``slider_ids`` (k), ``output_ids`` (m) and ``spec`` (the sweep as JSON)
+* ``inputs`` (n, k): the slider values of every sample
+* ``done`` and ``failed`` (n): samples completed, and completed with an error
+* ``item_count``, ``vertex_count``, ``face_count`` and ``truncated`` (n, m)
+* ``bbox_min``, ``bbox_max`` and ``centroid`` (n, m, 3), NaN without vertices
+
+The file is rewritten atomically at checkpoints while the sweep runs, from a
+copy of the columns on a worker thread, so it can be read at any time; a sweep
+started again with ``resume`` on the same file continues with the samples that
+are not done.
+
+Given a memo of results and the solution state of the document, the geometry
+of every sample is remembered under the key of the document with the sweep's
+slider values, and samples whose outputs are all remembered are not sent.
+Other requests can edit the document between two batches, after which that key
+no longer holds: the sweep checks for such changes before every batch it sends
+and every reply it remembers, and stops using the memo once there were any.
+"""
+
+import asyncio
+import collections
+import copy
+import itertools
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+from .cache import SolutionState
+from .geometry import np, summarize_reply
+from .memo import SolutionCache, result_key
+
+SWEEP_MODES = ("grid", "random", "lhs")
+
+# Columns of SweepResults filled while the sweep runs
+_COLUMNS = ("done", "failed", "item_count", "vertex_count", "face_count", "truncated", "bbox_min", "bbox_max", "centroid")
+
+SendBatch = Callable[[List[Tuple[str, Dict[str, Any]]]], Awaitable[List[Dict[str, Any]]]]
+
+
+def _slider_values(slider: Dict[str, Any]) -> List[float]:
+    if slider.get("values"):
+        return [float(v) for v in slider["values"]]
+    steps = int(slider.get("steps", 2))
+    low, high = float(slider["min"]), float(slider["max"])
+    if steps < 2:
+        return [low]
+    return [low + (high - low) * i / (steps - 1) for i in range(steps)]
+
+
+def _scale(slider: Dict[str, Any], u: float) -> float:
+    """Map ``u`` in [0, 1) onto the range or the value list of a slider."""
+    if slider.get("values"):
+        values = slider["values"]
+        return float(values[min(int(u * len(values)), len(values) - 1)])
+    low, high = float(slider["min"]), float(slider["max"])
+    return low + (high - low) * u
+
+
+def sample_count(sliders: List[Dict[str, Any]], mode: str = "grid", samples: Optional[int] = None) -> int:
+    """Number of samples of a sweep, without planning them."""
+    if mode == "grid":
+        return math.prod(
+            len(slider["values"]) if slider.get("values") else max(1, int(slider.get("steps", 2)))
+            for slider in sliders
+        )
+    return samples or 0
+
+
+def _too_many_samples(count: int, mode: str, max_samples: Optional[int]) -> Optional[str]:
+    if max_samples is None or count <= max_samples:
+        return None
+    advice = "use fewer steps or values, or mode 'random' or 'lhs'" if mode == "grid" else "use fewer samples"
+    return f"The sweep has {count} samples, more than the maximum of {max_samples}: {advice}"
+
+
+def validate_sliders(
+    sliders: List[Dict[str, Any]], mode: str, samples: Optional[int], max_samples: Optional[int] = None
+) -> List[str]:
+    """Return the problems of a sweep spec (empty when it can run), with at most ``max_samples`` samples."""
+    errors = []
+    if mode not in SWEEP_MODES:
+        errors.append(f"Unknown mode '{mode}', expected one of {list(SWEEP_MODES)}")
+    if not sliders:
+        errors.append("At least one slider is required")
+    for position, slider in enumerate(sliders):
+        if not isinstance(slider, dict) or not slider.get("id"):
+            errors.append(f"sliders[{position}]: an id is required")
+        elif not slider.get("values") and ("min" not in slider or "max" not in slider):
+            errors.append(f"sliders[{position}]: give either values or min and max")
+    if mode in ("random", "lhs") and not (isinstance(samples, int) and samples > 0):
+        errors.append(f"mode '{mode}' needs a positive number of samples")
+    if not errors:
+        too_many = _too_many_samples(sample_count(sliders, mode, samples), mode, max_samples)
+        if too_many is not None:
+            errors.append(too_many)
+    return errors
+
+
+def plan_samples(
+    sliders: List[Dict[str, Any]],
+    mode: str = "grid",
+    samples: Optional[int] = None,
+    seed: int = 0,
+    max_samples: Optional[int] = None,
+) -> List[List[float]]:
+    """Slider values of every sample, one row per sample in slider order.
+
+    Raises ValueError when there would be more than ``max_samples`` samples.
+    """
+    too_many = _too_many_samples(sample_count(sliders, mode, samples), mode, max_samples)
+    if too_many is not None:
+        raise ValueError(too_many)
+    if mode == "grid":
+        return [list(row) for row in itertools.product(*[_slider_values(s) for s in sliders])]
+    rng = random.Random(seed)
+    if mode == "random":
+        return [[_scale(s, rng.random()) for s in sliders] for _ in range(samples)]
+    # Latin hypercube: every slider visits each of the `samples` strata exactly once
+    columns = []
+    for slider in sliders:
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        columns.append([_scale(slider, (stratum + rng.random()) / samples) for stratum in strata])
+    return [list(row) for row in zip(*columns)]
+
+
+class SweepResults:
+    """Column arrays of a sweep and their ``.npz`` file."""
+
+    def __init__(self, spec: Dict[str, Any], inputs: List[List[float]]):
+        n, m = len(inputs), len(spec["outputs"])
+        self.spec = spec
+        self.slider_ids = [s["id"] for s in spec["sliders"]]
+        self.output_ids = list(spec["outputs"])
+        self.inputs = np.asarray(inputs, dtype=np.float64).reshape(n, len(self.slider_ids))
+        self.done = np.zeros(n, dtype=bool)
+        self.failed = np.zeros(n, dtype=bool)
+        self.item_count = np.zeros((n, m), dtype=np.int64)
+        self.vertex_count = np.zeros((n, m), dtype=np.int64)
+        self.face_count = np.zeros((n, m), dtype=np.int64)
+        self.truncated = np.zeros((n, m), dtype=bool)
+        self.bbox_min = np.full((n, m, 3), np.nan)
+        self.bbox_max = np.full((n, m, 3), np.nan)
+        self.centroid = np.full((n, m, 3), np.nan)
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def record(self, sample: int, output: int, summary: Dict[str, Any], truncated: bool) -> None:
+        self.item_count[sample, output] = summary["itemCount"]
+        self.vertex_count[sample, output] = summary["vertexCount"]
+        self.face_count[sample, output] = summary["faceCount"]
+        self.truncated[sample, output] = truncated
+        if summary["boundingBox"] is not None:
+            self.bbox_min[sample, output] = summary["boundingBox"]["min"]
+            self.bbox_max[sample, output] = summary["boundingBox"]["max"]
+            self.centroid[sample, output] = summary["centroid"]
+
+    def copy(self) -> "SweepResults":
+        """A copy of the columns, to be saved while these are filled further."""
+        copied = copy.copy(self)
+        for name in _COLUMNS:
+            setattr(copied, name, getattr(self, name).copy())
+        return copied
+
+    def save(self, path: str) -> None:
+        """Write every column to ``path``, replacing the previous file atomically."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                spec=np.array(json.dumps(self.spec)),
+                slider_ids=np.array(self.slider_ids),
+                output_ids=np.array(self.output_ids),
+                inputs=self.inputs,
+                done=self.done,
+                failed=self.failed,
+                item_count=self.item_count,
+                vertex_count=self.vertex_count,
+                face_count=self.face_count,
+                truncated=self.truncated,
+                bbox_min=self.bbox_min,
+                bbox_max=self.bbox_max,
+                centroid=self.centroid,
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SweepResults":
+        with np.load(path) as data:
+            results = cls(json.loads(str(data["spec"])), data["inputs"])
+            for name in _COLUMNS:
+                setattr(results, name, data[name].copy())
+        return results
+
+
+class SweepJob:
+    """A sweep running in the background.
+
+    Args:
+        job_id: Identifier reported to the client
+        results: Columns to fill (possibly partly done, when resuming)
+        path: The ``.npz`` file the results are saved to
+        send_batch: Coroutine sending (method, params) calls as one batch, or
+            one such coroutine per listener to shard the sweep over; a
+            coroutine that raises is dropped and its batches are retried on
+            the others
+        samples_per_batch: Samples sent in each batch (at most, with slice_seconds)
+        pipeline_depth: Batches kept in flight at the same time
+        max_items: Geometry items fetched per output and sample; outputs with
+            more items are summarized from the first ``max_items`` (truncated)
+        preview: Send execute_preview after setting the sliders
+        checkpoint_interval: Minimum seconds between two saves of the file
+        memo: Remembered results to serve samples from and to fill
+        solution: State of the document the sweep runs on, required with memo
+        changed: Returns whether the document changed since ``solution`` in
+            more than the values of the swept sliders (see
+            ``CanvasCache.watch``); without it the document is assumed to stay
+            as it was
+        slice_seconds: Time a batch should take on the listener, None to always
+            send samples_per_batch samples
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        results: SweepResults,
+        path: str,
+        send_batch: Union[SendBatch, Sequence[SendBatch]],
+        samples_per_batch: int = 8,
+        pipeline_depth: int = 2,
+        max_items: int = 100000,
+        preview: bool = True,
+        checkpoint_interval: float = 1.0,
+        memo: Optional[SolutionCache] = None,
+        solution: Optional[SolutionState] = None,
+        changed: Optional[Callable[[], bool]] = None,
+        slice_seconds: Optional[float] = None,
+    ):
+        self.id = job_id
+        self.results = results
+        self.path = path
+        self.senders = list(send_batch) if isinstance(send_batch, (list, tuple)) else [send_batch]
+        self.samples_per_batch = max(1, samples_per_batch)
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.max_items = max_items
+        self.preview = preview
+        self.checkpoint_interval = checkpoint_interval
+        self.memo = memo if solution is not None else None
+        self.solution = solution
+        self.changed = changed
+        self.slice_seconds = slice_seconds
+        # Estimated listener time per sample, from the batches received so far
+        self.sample_seconds: Optional[float] = None
+        self.recalled = 0
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.resumed_from = int(results.done.sum())
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._saved = 0.0
+        self._saving: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _geometry_params(self, output_id: str) -> Dict[str, Any]:
+        return {"id": output_id, "offset": 0, "limit": self.max_items, "encoding": "binary"}
+
+    def _calls(self, sample: int) -> List[Tuple[str, Dict[str, Any]]]:
+        values = self.results.inputs[sample]
+        calls = [
+            ("set_component_value", {"id": slider_id, "value": str(float(value))})
+            for slider_id, value in zip(self.results.slider_ids, values)
+        ]
+        if self.preview:
+            calls.append(("execute_preview", {}))
+        calls.extend(("get_geometry", self._geometry_params(output_id)) for output_id in self.results.output_ids)
+        return calls
+
+    def _memo_keys(self, sample: int) -> List[str]:
+        overrides = dict(zip(self.results.slider_ids, self.results.inputs[sample].tolist()))
+        graph, inputs = self.solution.key(overrides)
+        return [
+            result_key(graph, inputs, "get_geometry", self._geometry_params(output_id))
+            for output_id in self.results.output_ids
+        ]
+
+    def _memo_holds(self) -> bool:
+        """Whether the memo is in use, dropping it once the document changed under the sweep."""
+        if self.memo is not None and self.changed is not None and self.changed():
+            self.memo = None
+        return self.memo is not None
+
+    def _recall(self, samples: List[int]) -> List[int]:
+        """Record the samples whose outputs are all remembered and return the others."""
+        if not self._memo_holds():
+            return samples
+        pending = []
+        for sample in samples:
+            replies = []
+            for key in self._memo_keys(sample):
+                reply = self.memo.get(key)
+                if reply is None:
+                    break
+                replies.append(reply)
+            if len(replies) == len(self.results.output_ids):
+                self._record(sample, replies)
+                self.recalled += 1
+            else:
+                pending.append(sample)
+        return pending
+
+    def _remember(self, sample: int, responses: List[Dict[str, Any]]) -> None:
+        if self.memo is None or any(r.get("success") is False for r in responses):
+            # A slider that was not set leaves the geometry of another state
+            return
+        outputs = len(self.results.output_ids)
+        for key, response in zip(self._memo_keys(sample), responses[-outputs:]):
+            if response.get("success") is not False and isinstance(response.get("result"), dict):
+                self.memo.put(key, self.solution.graph, response)
+
+    def _record(self, sample: int, responses: List[Dict[str, Any]]) -> None:
+        outputs = len(self.results.output_ids)
+        failed = any(r.get("success") is False for r in responses)
+        for position, (output_id, response) in enumerate(zip(self.results.output_ids, responses[-outputs:])):
+            result = response.get("result") if response.get("success") is not False else None
+            if not isinstance(result, dict):
+                failed = True
+                continue
+            summary, truncated = summarize_reply(output_id, result, self.max_items)
+            self.results.record(sample, position, summary, truncated)
+        if failed and self.error is None:
+            errors = [r.get("error") for r in responses if r.get("success") is False]
+            self.error = f"Sample {sample}: {errors[0] if errors else 'invalid geometry reply'}"
+        self.results.failed[sample] = failed
+        self.results.done[sample] = True
+
+    async def _checkpoint(self, force: bool = False) -> None:
+        """Save the results on a worker thread; one save at a time, the last one awaited."""
+        if self._saving is not None:
+            if not self._saving.done() and not force:
+                return
+            saving, self._saving = self._saving, None
+            # Raises the error of the previous save
+            await saving
+        now = time.monotonic()
+        if force or now - self._saved >= self.checkpoint_interval:
+            self._saved = now
+            self._saving = asyncio.get_running_loop().run_in_executor(None, self.results.copy().save, self.path)
+            if force:
+                saving, self._saving = self._saving, None
+                await saving
+
+    def _batch_calls(self, samples: List[int]) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[int]]:
+        calls, sizes = [], []
+        for sample in samples:
+            sample_calls = self._calls(sample)
+            calls.extend(sample_calls)
+            sizes.append(len(sample_calls))
+        return calls, sizes
+
+    def _slice_size(self) -> int:
+        if self.slice_seconds is None:
+            return self.samples_per_batch
+        if self.sample_seconds is None:
+            return 1
+        return max(1, min(self.samples_per_batch, int(self.slice_seconds / self.sample_seconds)))
+
+    def _next_batch(self, queue: Deque[List[int]]) -> List[int]:
+        """Take the next batch from ``queue``, leaving the samples beyond the slice size at its front."""
+        samples = queue.popleft()
+        size = self._slice_size()
+        if size < len(samples):
+            queue.appendleft(samples[size:])
+            samples = samples[:size]
+        return samples
+
+    def _time_batch(self, samples: List[int], started: float) -> None:
+        # A batch sent behind another one only starts when the previous reply arrives
+        per_sample = (time.monotonic() - started) / len(samples)
+        self.sample_seconds = per_sample if self.sample_seconds is None else (self.sample_seconds + per_sample) / 2
+
+    async def _worker(self, send_batch: SendBatch, queue: Deque[List[int]]) -> None:
+        """Send batches from ``queue`` until it is empty, a few in flight at a time."""
+        in_flight: List[Tuple[List[int], List[int], float, asyncio.Future]] = []
+        received = 0.0
+        try:
+            while queue or in_flight:
+                while queue and len(in_flight) < self.pipeline_depth:
+                    samples = self._recall(self._next_batch(queue))
+                    if samples:
+                        calls, sizes = self._batch_calls(samples)
+                        in_flight.append((samples, sizes, time.monotonic(), asyncio.ensure_future(send_batch(calls))))
+                if not in_flight:
+                    await self._checkpoint()
+                    continue
+                # Summarize the oldest batch while the newer ones are in flight
+                samples, sizes, sent, future = in_flight[0]
+                responses = await future
+                self._time_batch(samples, max(sent, received))
+                received = time.monotonic()
+                # Replies computed after another request edited the document are not remembered
+                self._memo_holds()
+                start = 0
+                for sample, size in zip(samples, sizes):
+                    self._record(sample, responses[start:start + size])
+                    self._remember(sample, responses[start:start + size])
+                    start += size
+                in_flight.pop(0)
+                await self._checkpoint()
+        except Exception:
+            # Give the batches of this sender back for the others to run
+            queue.extendleft(reversed([batch for batch, _, _, _ in in_flight]))
+            raise
+        finally:
+            for _, _, _, future in in_flight:
+                future.cancel()
+
+    async def run(self) -> None:
+        self.state = "running"
+        self.started = time.monotonic()
+        pending = [int(i) for i in np.flatnonzero(~self.results.done)]
+        queue = collections.deque(pending[i:i + self.samples_per_batch] for i in range(0, len(pending), self.samples_per_batch))
+        senders = list(self.senders)
+        try:
+            while queue:
+                outcomes = await asyncio.gather(*[self._worker(send, queue) for send in senders], return_exceptions=True)
+                errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+                senders = [send for send, outcome in zip(senders, outcomes) if not isinstance(outcome, Exception)]
+                if queue and not senders:
+                    raise errors[0]
+            self.state = "completed"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self.finished = time.monotonic()
+            await self._checkpoint(force=True)
+
+    def start(self) -> "SweepJob":
+        self.state = "running"
+        self._task = asyncio.ensure_future(self.run())
+        return self
+
+    def cancel(self) -> bool:
+        """Stop after the samples already received; completed samples are kept."""
+        if self._task is None or self._task.done():
+            return False
+        self._task.cancel()
+        return True
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        done = int(self.results.done.sum())
+        total = len(self.results)
+        elapsed = None
+        rate = None
+        if self.started is not None:
+            elapsed = (self.finished or time.monotonic()) - self.started
+            run = done - self.resumed_from
+            rate = run / elapsed if elapsed > 0 else None
+        return {
+            "id": self.id,
+            "state": self.state,
+            "path": self.path,
+            "completed": done,
+            "failed": int(self.results.failed.sum()),
+            "total": total,
+            "progress": round(done / total, 4) if total else 1.0,
+            "resumedFrom": self.resumed_from,
+            "recalled": self.recalled,
+            "elapsedSeconds": None if elapsed is None else round(elapsed, 3),
+            "samplesPerSecond": None if rate is None else round(rate, 2),
+            "samplesPerBatch": self._slice_size(),
+            "etaSeconds": round((total - done) / rate, 1) if rate and self.state == "running" else None,
+            "error": self.error,
+        }
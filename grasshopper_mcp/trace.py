@@ -0,0 +1,139 @@
+"""
+Recording of the requests the bridge sends to its listeners.
+
+A trace is a gzip-compressed JSON Lines file. The first line describes the
+recording::
+
+    {"trace": 1, "started": 1760000000.0, "responses": true}
+
+and every following line is one exchange with a listener::
+
+    {"t": 12.5031, "ms": 3.21, "listener": "localhost:8080",
+     "requests": [["get_component_info", {"componentId": "..."}]],
+     "responses": [{"success": true, "result": {...}}]}
+
+``t`` is the time the request was sent, in seconds since the recording
+started, and ``ms`` the time until its reply. A JSON-RPC batch has several
+``requests`` and ``"batch": true``, and an exchange with a failed request has
+``"ok": false``. Responses are left out with ``responses=False``, which keeps
+long recordings small.
+
+The file is flushed at most every ``flush_interval`` seconds, so a trace can be
+read while it is recorded, and after the bridge was killed, up to the last
+flush. ``grasshopper_mcp.replay`` sends a trace again.
+"""
+
+import gzip
+import io
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .serialization import JSON
+
+TRACE_VERSION = 1
+
+
+class TraceRecorder:
+    """Append exchanges to a trace file.
+
+    Args:
+        path: Trace file, created or appended to (a new gzip member per recording)
+        responses: Record the responses, not just their sizes
+        flush_interval: Maximum seconds between two flushes of the file
+    """
+
+    def __init__(self, path: str, responses: bool = True, flush_interval: float = 1.0):
+        self.path = path
+        self.responses = responses
+        self.flush_interval = flush_interval
+        self.records = 0
+        self._started = time.perf_counter()
+        self._flushed = time.monotonic()
+        # Sync requests may be sent from worker threads
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "ab", compresslevel=6)
+        self._write({"trace": TRACE_VERSION, "started": time.time(), "responses": responses})
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._file.write(JSON.dumps(entry) + b"\n")
+
+    def record(
+        self,
+        listener: str,
+        requests: List[Tuple[str, Optional[Dict[str, Any]]]],
+        responses: List[Any],
+        started: float,
+        elapsed: float,
+        batch: bool = False,
+        ok: bool = True,
+    ) -> None:
+        """Record one exchange sent at ``started`` (``time.perf_counter``) that took ``elapsed`` seconds."""
+        entry: Dict[str, Any] = {
+            "t": round(started - self._started, 6),
+            "ms": round(elapsed * 1000, 3),
+            "listener": listener,
+            "requests": [[method, params or {}] for method, params in requests],
+        }
+        if batch:
+            entry["batch"] = True
+        if not ok:
+            entry["ok"] = False
+        if self.responses:
+            entry["responses"] = responses
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write(entry)
+            self.records += 1
+            now = time.monotonic()
+            if now - self._flushed >= self.flush_interval:
+                self._file.flush()
+                self._flushed = now
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_trace(path: str, responses: bool = True) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """The header and the exchanges of a trace, in the order they were sent.
+
+    Recordings appended to the same file are joined, each shifted to start when
+    the previous one ended. A line cut off by an unfinished flush ends the
+    trace. Without ``responses`` the recorded responses are dropped as they are
+    read, to replay large traces.
+    """
+    header: Dict[str, Any] = {}
+    records: List[Dict[str, Any]] = []
+    offset = 0.0
+    for line in _lines(path):
+        try:
+            entry = JSON.loads(line)
+        except ValueError:
+            break
+        if "trace" in entry:
+            header = header or entry
+            offset = records[-1]["t"] + records[-1]["ms"] / 1000 if records else 0.0
+            continue
+        if not responses:
+            entry.pop("responses", None)
+        entry["t"] += offset
+        records.append(entry)
+    records.sort(key=lambda entry: entry["t"])
+    return header, records
+
+
+def _lines(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    stream = gzip.open(path, "rb") if compressed else open(path, "rb")
+    with stream:
+        try:
+            for line in io.BufferedReader(stream):
+                if line.strip():
+                    yield line
+        except (EOFError, OSError):
+            # Recorded by a bridge that did not close the file
+            return
@@ -0,0 +1,1257 @@
+"""
+Socket transports used by the bridge to talk to the GH_MCP listener.
+
+Three transports are available:
+
+* ``OneShotTransport`` opens a new TCP connection per request, sends one
+  newline-delimited JSON-RPC message and closes after the reply. This is the
+  original behaviour and works with any listener.
+* ``PooledTransport`` keeps a small pool of long-lived connections and sends
+  many newline-delimited requests over each of them, matching replies by their
+  JSON-RPC ``id``. Connections that the listener has closed are detected and
+  replaced transparently.
+* ``AsyncTransport`` multiplexes concurrent asyncio requests over a single
+  connection and resolves each caller's future when its reply arrives.
+
+Every ``request`` call accepts a per-request ``timeout`` in seconds; when it is
+omitted the transport default is used. ``request_batch`` sends several requests
+as one JSON-RPC 2.0 batch array and returns the replies in request order. When
+the listener does not understand batch arrays the requests are pipelined over
+the connection instead (or sent one by one in one-shot mode).
+
+Messages are newline-delimited JSON by default. The pooled and asyncio
+transports can negotiate length-prefixed framing when they connect: they send a
+``hello`` request listing the framings they support, and if the listener answers
+with ``{"framing": "length-prefixed"}`` every later message on that connection is
+a 4-byte big-endian length followed by that many bytes of UTF-8 JSON. Listeners
+that do not know ``hello`` answer with an error and the connection stays
+newline-delimited. Framed replies are read with ``recv_into`` into one reusable
+buffer per connection, so large payloads are received without repeated copying.
+
+Framed connections can also negotiate compression: ``hello`` lists the codecs
+the bridge accepts (``zlib``, and ``zstd`` when the zstandard package is
+installed) and the size from which messages are worth compressing. A listener
+that picks a codec answers with ``{"compression": "zlib"}``, and from then on
+each side compresses the messages it sends that reach the threshold. Compressed
+frames have the top bit of the length header set. They are decompressed chunk
+by chunk while they are received, so decompression overlaps the transfer.
+
+Messages are encoded and decoded by a ``Serializer`` (see
+``grasshopper_mcp.serialization``): JSON through orjson when it is installed,
+straight from the received bytes. Framed connections can negotiate MessagePack
+in the same ``hello``.
+
+Each transport takes an optional ``observer`` callable, which is called as
+``observer(bytes_sent, bytes_received)`` after every completed round trip, in
+the context of the caller that made the request.
+
+Read-only methods listed in ``coalesce`` go through a single-flight layer: an
+identical request (same method and params) issued while one is in flight shares
+its reply instead of making another round trip. See ``SingleFlight``.
+"""
+
+import asyncio
+import copy
+import select
+import socket
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is only offered when zstandard is installed
+    zstandard = None
+
+from .cache import MUTATING_METHODS
+from .serialization import FORMAT_JSON, JSON, SERIALIZERS, Serializer, canonical, offered_formats
+
+Observer = Callable[[int, int], None]
+
+FRAMING_NEWLINE = "newline"
+FRAMING_LENGTH_PREFIXED = "length-prefixed"
+# "auto" negotiates length-prefixed framing and falls back to newline-delimited
+FRAMING_MODES = ("auto", FRAMING_NEWLINE, FRAMING_LENGTH_PREFIXED)
+
+_FRAME_HEADER = struct.Struct(">I")
+# Receive buffers start at this size and grow to fit the largest frame...
+_INITIAL_BUFFER_SIZE = 64 * 1024
+# ...but buffers grown beyond this are released after the frame is decoded.
+_RETAINED_BUFFER_SIZE = 16 * 1024 * 1024
+
+COMPRESSION_NONE = "none"
+# "auto" offers every available codec, zstd first
+COMPRESSION_MODES = ("auto", COMPRESSION_NONE, "zlib", "zstd")
+# Messages below this many bytes are sent uncompressed
+COMPRESSION_THRESHOLD = 64 * 1024
+# Set in the length header of compressed frames; the length is in the other 31 bits
+_COMPRESSED_FLAG = 0x80000000
+# Compressed frames are received and decompressed in chunks of this size
+_DECOMPRESS_CHUNK = 256 * 1024
+
+
+class IncompleteResponseError(ConnectionError):
+    """Raised when the listener closes a connection in the middle of a reply."""
+
+
+class Codec:
+    """A compression format usable on framed connections."""
+
+    def __init__(self, name: str, compress: Callable[[bytes], bytes], decompressor: Callable[[], Any]):
+        self.name = name
+        self.compress = compress
+        # Returns an object with decompress(chunk) (and optionally flush()) for one frame
+        self.decompressor = decompressor
+
+    def decompress(self, chunks) -> bytes:
+        decompressor = self.decompressor()
+        parts = [decompressor.decompress(chunk) for chunk in chunks]
+        if hasattr(decompressor, "flush"):
+            parts.append(decompressor.flush())
+        return b"".join(parts)
+
+
+CODECS: Dict[str, Codec] = {}
+if zstandard is not None:
+    CODECS["zstd"] = Codec(
+        "zstd", lambda data: zstandard.ZstdCompressor(level=3).compress(data), lambda: zstandard.ZstdDecompressor().decompressobj()
+    )
+CODECS["zlib"] = Codec("zlib", lambda data: zlib.compress(data, 1), zlib.decompressobj)
+
+
+def offered_codecs(compression: str) -> List[str]:
+    """Codec names to offer in ``hello`` for a compression mode, in order of preference."""
+    if compression not in COMPRESSION_MODES:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == COMPRESSION_NONE:
+        return []
+    if compression == "auto":
+        return list(CODECS)
+    if compression not in CODECS:
+        raise ValueError(f"{compression} compression needs the zstandard package")
+    return [compression]
+
+
+def _encode_request(request: Any) -> bytes:
+    return JSON.dumps(request) + b"\n"
+
+
+def _hello_request(
+    codecs: List[str] = (), threshold: int = COMPRESSION_THRESHOLD, formats: List[str] = ()
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"framing": [FRAMING_LENGTH_PREFIXED, FRAMING_NEWLINE]}
+    if codecs:
+        params["compression"] = list(codecs)
+        params["compressionThreshold"] = threshold
+    if formats:
+        params["format"] = list(formats) + [FORMAT_JSON]
+    return {"jsonrpc": "2.0", "id": "hello", "method": "hello", "params": params}
+
+
+def _negotiated_framing(reply: Any) -> str:
+    """Framing the listener agreed to in its reply to ``hello``."""
+    result = reply.get("result") if isinstance(reply, dict) else None
+    if isinstance(result, dict) and result.get("framing") == FRAMING_LENGTH_PREFIXED:
+        return FRAMING_LENGTH_PREFIXED
+    return FRAMING_NEWLINE
+
+
+def _negotiated_codec(reply: Any, codecs: List[str]) -> Optional[Codec]:
+    """Codec the listener picked in its reply to ``hello`` (only with framing)."""
+    if _negotiated_framing(reply) != FRAMING_LENGTH_PREFIXED:
+        return None
+    name = reply["result"].get("compression")
+    return CODECS[name] if name in codecs else None
+
+
+def _negotiated_serializer(reply: Any, formats: List[str]) -> Serializer:
+    """Message format the listener picked in its reply to ``hello`` (only with framing)."""
+    if _negotiated_framing(reply) != FRAMING_LENGTH_PREFIXED:
+        return JSON
+    name = reply["result"].get("format")
+    return SERIALIZERS[name] if name in formats else JSON
+
+
+def _encode_frame(payload: bytes, codec: Optional[Codec], threshold: int) -> List[bytes]:
+    if codec is not None and len(payload) >= threshold:
+        payload = codec.compress(payload)
+        return [_FRAME_HEADER.pack(len(payload) | _COMPRESSED_FLAG), payload]
+    return [_FRAME_HEADER.pack(len(payload)), payload]
+
+
+def _encode_messages(
+    messages: List[Any],
+    framing: str,
+    codec: Optional[Codec] = None,
+    threshold: int = COMPRESSION_THRESHOLD,
+    serializer: Serializer = JSON,
+) -> bytes:
+    """Encode messages (requests or batch arrays) for one write."""
+    if framing != FRAMING_LENGTH_PREFIXED:
+        return b"".join(_encode_request(message) for message in messages)
+    parts = []
+    for message in messages:
+        parts.extend(_encode_frame(serializer.dumps(message), codec, threshold))
+    # One write per batch of frames avoids Nagle delays between header and payload
+    return b"".join(parts)
+
+
+def _frame_length(header: bytes, codec: Optional[Codec]) -> Tuple[int, bool]:
+    """Payload length and whether the payload is compressed, from a frame header."""
+    (length,) = _FRAME_HEADER.unpack(header)
+    compressed = bool(length & _COMPRESSED_FLAG)
+    if compressed and codec is None:
+        raise ConnectionError("Compressed frame received without negotiated compression")
+    return length & ~_COMPRESSED_FLAG, compressed
+
+
+class _Connection:
+    """A single socket to the listener.
+
+    Newline-delimited messages are read through a buffered line reader;
+    length-prefixed frames are read with ``recv_into`` into a reusable buffer.
+
+    Args:
+        framing: "newline", "length-prefixed" (fail if the listener refuses) or
+            "auto" (negotiate and fall back to newline-delimited)
+        codecs: Compression codecs to offer with framing, in order of preference
+        compression_threshold: Size from which messages are compressed
+        formats: Message formats other than JSON to offer with framing
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float,
+        connect_timeout: float,
+        framing: str = FRAMING_NEWLINE,
+        codecs: List[str] = (),
+        compression_threshold: int = COMPRESSION_THRESHOLD,
+        formats: List[str] = (),
+    ):
+        self.sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self.sock.settimeout(timeout)
+        self.reader = self.sock.makefile("rb")
+        self.last_used = time.monotonic()
+        self.requests_served = 0
+        self.closed = False
+        self.framing = FRAMING_NEWLINE
+        self.codec: Optional[Codec] = None
+        self.compression_threshold = compression_threshold
+        self.serializer = JSON
+        self.bytes_received = 0
+        self._buffer = bytearray()
+        if framing != FRAMING_NEWLINE:
+            try:
+                self._negotiate(framing == FRAMING_LENGTH_PREFIXED, list(codecs), list(formats))
+            except BaseException:
+                self.close()
+                raise
+
+    def _negotiate(self, required: bool, codecs: List[str], formats: List[str]) -> None:
+        # The listener sends nothing but the hello reply until the next request,
+        # so the line reader holds no bytes that the frame reader would miss.
+        self.send(_encode_request(_hello_request(codecs, self.compression_threshold, formats)))
+        try:
+            reply = self._read_line()
+        except ConnectionError:
+            if required:
+                raise
+            # Listeners that close after one reply are only usable newline-delimited
+            self.close()
+            return
+        self.framing = _negotiated_framing(reply)
+        self.codec = _negotiated_codec(reply, codecs)
+        self.serializer = _negotiated_serializer(reply, formats)
+        if required and self.framing != FRAMING_LENGTH_PREFIXED:
+            raise ConnectionError("Grasshopper listener does not support length-prefixed framing")
+
+    def set_timeout(self, timeout: float) -> None:
+        if self.sock.gettimeout() != timeout:
+            self.sock.settimeout(timeout)
+
+    def send(self, data: bytes) -> None:
+        self.sock.sendall(data)
+
+    def send_messages(self, messages: List[Any]) -> int:
+        """Send messages in one write and return the number of bytes sent."""
+        data = _encode_messages(messages, self.framing, self.codec, self.compression_threshold, self.serializer)
+        self.send(data)
+        return len(data)
+
+    def read_message(self) -> Any:
+        """Read and decode the next message."""
+        if self.framing == FRAMING_LENGTH_PREFIXED:
+            return self._read_frame()
+        return self._read_line()
+
+    def _recv_exact(self, size: int, started: bool) -> memoryview:
+        """Receive exactly ``size`` bytes into the connection buffer."""
+        if len(self._buffer) < size:
+            self._buffer = bytearray(max(size, _INITIAL_BUFFER_SIZE))
+        view = memoryview(self._buffer)[:size]
+        received = 0
+        while received < size:
+            count = self.sock.recv_into(view[received:], size - received)
+            if not count:
+                view.release()
+                if received or started:
+                    raise IncompleteResponseError("Incomplete response from Grasshopper")
+                raise ConnectionError("Connection closed before response received")
+            received += count
+        return view
+
+    def _read_frame(self) -> Any:
+        """Read and decode the next non-empty length-prefixed frame."""
+        while True:
+            with self._recv_exact(_FRAME_HEADER.size, started=False) as header:
+                length, compressed = _frame_length(header, self.codec)
+            if not length:
+                continue
+            if compressed:
+                message = self.serializer.loads(self.codec.decompress(self._recv_chunks(length)))
+            else:
+                # Decoded straight from the receive buffer, which the next frame reuses
+                with self._recv_exact(length, started=True) as payload:
+                    message = self.serializer.loads(payload)
+            self.bytes_received += _FRAME_HEADER.size + length
+            if len(self._buffer) > _RETAINED_BUFFER_SIZE:
+                self._buffer = bytearray()
+            self.last_used = time.monotonic()
+            return message
+
+    def _recv_chunks(self, size: int):
+        """Receive ``size`` bytes in chunks, each valid until the next is received."""
+        while size:
+            count = min(size, _DECOMPRESS_CHUNK)
+            with self._recv_exact(count, started=True) as chunk:
+                yield chunk
+            size -= count
+
+    def _read_line(self) -> Any:
+        """Read and decode the next non-empty newline-delimited message."""
+        while True:
+            line = self.reader.readline()
+            if not line:
+                raise ConnectionError("Connection closed before response received")
+            if not line.endswith(b"\n"):
+                raise IncompleteResponseError("Incomplete response from Grasshopper")
+            self.bytes_received += len(line)
+            if not line.isspace():
+                self.last_used = time.monotonic()
+                return JSON.loads(line)
+
+    def read_response(self, request_id: Any) -> Dict[str, Any]:
+        """Read messages until the reply to ``request_id``.
+
+        Replies carrying a different id (for example a late answer to a request
+        that previously timed out) are discarded.
+        """
+        while True:
+            response = self.read_message()
+            if isinstance(response, dict) and "id" in response and response["id"] != request_id:
+                continue
+            self.requests_served += 1
+            return response
+
+    def read_responses(self, request_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Read the replies to several pipelined requests, keyed by id."""
+        waiting = list(request_ids)
+        responses: Dict[Any, Dict[str, Any]] = {}
+        while waiting:
+            response = self.read_message()
+            if isinstance(response, dict) and response.get("id") in waiting:
+                request_id = response["id"]
+            elif isinstance(response, dict) and "id" not in response:
+                # No id in the reply: the listener answers in request order.
+                request_id = waiting[0]
+            else:
+                continue
+            waiting.remove(request_id)
+            responses[request_id] = response
+            self.requests_served += 1
+        return responses
+
+    def read_batch_response(self, request_ids: List[Any]) -> Optional[List[Any]]:
+        """Read the reply to a batch array.
+
+        Returns ``None`` when the listener answered with a single non-batch
+        error, which means it does not understand batch arrays.
+        """
+        while True:
+            response = self.read_message()
+            if isinstance(response, list):
+                self.requests_served += len(request_ids)
+                return response
+            if isinstance(response, dict) and response.get("id") is not None:
+                # Late reply to an earlier request.
+                continue
+            return None
+
+    def is_stale(self, idle_timeout: Optional[float]) -> bool:
+        """Check whether the listener has closed this connection while idle."""
+        if self.closed:
+            return True
+        if idle_timeout is not None and time.monotonic() - self.last_used > idle_timeout:
+            return True
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        if not readable:
+            return False
+        # A readable idle socket either has EOF pending or unsolicited data.
+        # Unsolicited replies are harmless (they are skipped by id), EOF is not.
+        timeout = self.sock.gettimeout()
+        try:
+            self.sock.setblocking(False)
+            try:
+                peek = self.sock.recv(1, socket.MSG_PEEK)
+            finally:
+                self.sock.settimeout(timeout)
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+        return peek == b""
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for closable in (self.reader, self.sock):
+            try:
+                closable.close()
+            except Exception:
+                pass
+
+
+def _order_batch(requests: List[Dict[str, Any]], responses: Any) -> List[Dict[str, Any]]:
+    """Arrange batch replies in request order, filling in missing entries."""
+    if isinstance(responses, list):
+        by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+    else:
+        by_id = responses
+    ordered = []
+    for request in requests:
+        response = by_id.get(request.get("id"))
+        if response is None:
+            response = {"jsonrpc": "2.0", "id": request.get("id"), "error": "No response for batch entry"}
+        ordered.append(response)
+    return ordered
+
+
+def _is_read_only(messages: List[Any]) -> bool:
+    """Whether sending ``messages`` again cannot change the document twice."""
+    for message in messages:
+        for request in message if isinstance(message, list) else [message]:
+            if request.get("method") in MUTATING_METHODS:
+                return False
+    return True
+
+
+def _flight_key(request: Dict[str, Any]) -> Tuple[Any, bytes]:
+    """Identity of a request for coalescing: its method and canonicalized params."""
+    return request.get("method"), canonical(request.get("params") or {})
+
+
+def _shared_reply(response: Any, request: Dict[str, Any]) -> Any:
+    """Copy of a reply for another caller, which may modify it, under its own id."""
+    response = copy.deepcopy(response)
+    if isinstance(response, dict) and "id" in response:
+        response["id"] = request.get("id")
+    return response
+
+
+class _Flight:
+    """A coalesced request in progress; other threads wait for its reply."""
+
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Any = None
+        self.error: Optional[BaseException] = None
+
+    def finish(self, response: Any = None, error: Optional[BaseException] = None) -> None:
+        self.response, self.error = response, error
+        self.done.set()
+
+    def wait(self, timeout: float) -> Any:
+        if not self.done.wait(timeout):
+            raise socket.timeout("timed out waiting for a coalesced request")
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class SingleFlight:
+    """Merge identical in-flight read requests into one request on the wire.
+
+    A request for one of ``methods`` whose method and params equal those of a
+    request still in flight is not sent: the caller waits for that request and
+    gets a copy of its reply. Any other method may change the document, so it
+    closes the open flights: requests issued after it are sent again instead of
+    sharing a reply that may predate it. ``coalesced`` counts the requests that
+    were answered from another one, ``round_trips_saved`` the exchanges avoided
+    (a batch still makes its round trip unless all of its entries were shared).
+
+    Args:
+        methods: Read-only methods that may be coalesced
+        on_coalesce: Called with ``round_trip_saved`` for every coalesced request
+    """
+
+    def __init__(self, methods: Collection[str] = (), on_coalesce: Optional[Callable[[bool], None]] = None):
+        self.methods = frozenset(methods)
+        self.on_coalesce = on_coalesce
+        self.coalesced = 0
+        self.round_trips_saved = 0
+        self._flights: Dict[Tuple[Any, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, requests: int, round_trip_saved: bool) -> None:
+        self.coalesced += requests
+        self.round_trips_saved += round_trip_saved
+        if self.on_coalesce is not None:
+            for position in range(requests):
+                self.on_coalesce(round_trip_saved and position == 0)
+
+    def _plan(self, requests: List[Dict[str, Any]], new_flight) -> Tuple[List[int], Dict[int, Any], Dict[int, Tuple[Any, Any]]]:
+        """Split ``requests`` into the positions to send and the ones joining a flight.
+
+        Returns the positions to send, the joined flight of every other
+        position, and the (key, flight) opened for each sent read. Must be
+        called with the lock held (or on the event loop thread).
+        """
+        send, joined, own = [], {}, {}
+        for position, request in enumerate(requests):
+            if request.get("method") not in self.methods:
+                self._flights.clear()
+                send.append(position)
+                continue
+            key = _flight_key(request)
+            flight = self._flights.get(key)
+            if flight is not None:
+                joined[position] = flight
+                continue
+            send.append(position)
+            own[position] = key, new_flight()
+            self._flights[key] = own[position][1]
+        return send, joined, own
+
+    def _land(self, own: Dict[int, Tuple[Any, Any]]) -> None:
+        for key, flight in own.values():
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def request(self, request: Dict[str, Any], timeout: float, send: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Send ``request`` through ``send`` unless an identical one is in flight."""
+        with self._lock:
+            _, joined, own = self._plan([request], _Flight)
+        if joined:
+            self._count(1, True)
+            return _shared_reply(joined[0].wait(timeout), request)
+        try:
+            response = send(request)
+        except BaseException as e:
+            for _, flight in own.values():
+                flight.finish(error=e)
+            raise
+        else:
+            for _, flight in own.values():
+                flight.finish(response)
+        finally:
+            with self._lock:
+                self._land(own)
+        return response
+
+    def request_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        timeout: float,
+        send: Callable[[List[Dict[str, Any]]], List[Any]],
+    ) -> List[Any]:
+        """Send the entries of a batch that are not in flight through ``send``."""
+        with self._lock:
+            positions, joined, own = self._plan(requests, _Flight)
+        if joined:
+            self._count(len(joined), not positions)
+        responses: List[Any] = [None] * len(requests)
+        try:
+            if positions:
+                for position, response in zip(positions, send([requests[p] for p in positions])):
+                    responses[position] = response
+        except BaseException as e:
+            for _, flight in own.values():
+                flight.finish(error=e)
+            raise
+        else:
+            for position, (_, flight) in own.items():
+                flight.finish(responses[position])
+        finally:
+            with self._lock:
+                self._land(own)
+        for position, flight in joined.items():
+            responses[position] = _shared_reply(flight.wait(timeout), requests[position])
+        return responses
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines sharing one event loop."""
+
+    def _new_flight(self) -> asyncio.Future:
+        return asyncio.get_running_loop().create_future()
+
+    @staticmethod
+    def _finish(flight: asyncio.Future, response: Any = None, error: Optional[BaseException] = None) -> None:
+        if flight.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            flight.cancel()
+        elif error is not None:
+            flight.set_exception(error)
+            # Nobody may be waiting; do not log the error as never retrieved
+            flight.exception()
+        else:
+            flight.set_result(response)
+
+    async def _wait(self, flight: asyncio.Future, request: Dict[str, Any], timeout: float, send) -> Any:
+        try:
+            response = await asyncio.wait_for(asyncio.shield(flight), timeout)
+        except asyncio.CancelledError:
+            if not flight.cancelled():
+                raise
+            # The request we joined was cancelled by its caller; send our own
+            return await send(request)
+        return _shared_reply(response, request)
+
+    async def request(self, request: Dict[str, Any], timeout: float, send) -> Any:
+        _, joined, own = self._plan([request], self._new_flight)
+        if joined:
+            self._count(1, True)
+            return await self._wait(joined[0], request, timeout, send)
+        try:
+            response = await send(request)
+        except BaseException as e:
+            for _, flight in own.values():
+                self._finish(flight, error=e)
+            raise
+        else:
+            for _, flight in own.values():
+                self._finish(flight, response)
+        finally:
+            self._land(own)
+        return response
+
+    async def request_batch(self, requests: List[Dict[str, Any]], timeout: float, send, send_one) -> List[Any]:
+        positions, joined, own = self._plan(requests, self._new_flight)
+        if joined:
+            self._count(len(joined), not positions)
+        responses: List[Any] = [None] * len(requests)
+        try:
+            if positions:
+                for position, response in zip(positions, await send([requests[p] for p in positions])):
+                    responses[position] = response
+        except BaseException as e:
+            for _, flight in own.values():
+                self._finish(flight, error=e)
+            raise
+        else:
+            for position, (_, flight) in own.items():
+                self._finish(flight, responses[position])
+        finally:
+            self._land(own)
+        for position, flight in joined.items():
+            responses[position] = await self._wait(flight, requests[position], timeout, send_one)
+        return responses
+
+
+class OneShotTransport:
+    """Open a fresh connection for every request (original behaviour).
+
+    Always newline-delimited: negotiating framing would double the round trips
+    of every request.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        observer: Optional[Observer] = None,
+        coalesce: Collection[str] = (),
+        on_coalesce: Optional[Callable[[bool], None]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.observer = observer
+        self.single_flight = SingleFlight(coalesce, on_coalesce)
+
+    def _exchange(self, message: Any, read, timeout: float):
+        conn = _Connection(self.host, self.port, timeout, min(timeout, self.connect_timeout))
+        try:
+            sent = conn.send_messages([message])
+            response = read(conn)
+        finally:
+            conn.close()
+        if self.observer is not None:
+            self.observer(sent, conn.bytes_received)
+        return response
+
+    def request(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        timeout = self.timeout if timeout is None else timeout
+        if self.single_flight.methods:
+            return self.single_flight.request(request, timeout, lambda r: self._request(r, timeout))
+        return self._request(request, timeout)
+
+    def _request(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        return self._exchange(request, lambda conn: conn.read_response(request.get("id")), timeout)
+
+    def request_batch(self, requests: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        if not requests:
+            return []
+        timeout = self.timeout if timeout is None else timeout
+        if self.single_flight.methods:
+            return self.single_flight.request_batch(requests, timeout, lambda r: self._request_batch(r, timeout))
+        return self._request_batch(requests, timeout)
+
+    def _request_batch(self, requests: List[Dict[str, Any]], timeout: float) -> List[Dict[str, Any]]:
+        request_ids = [r.get("id") for r in requests]
+        responses = self._exchange(requests, lambda conn: conn.read_batch_response(request_ids), timeout)
+        if responses is not None:
+            return _order_batch(requests, responses)
+        return [self._request(request, timeout) for request in requests]
+
+    def close(self) -> None:
+        pass
+
+
+class PooledTransport:
+    """Keep long-lived connections to the listener and reuse them.
+
+    Args:
+        host: Listener host
+        port: Listener port
+        max_connections: Maximum number of idle connections kept in the pool
+        timeout: Default receive timeout in seconds
+        connect_timeout: Timeout in seconds for establishing a connection
+        idle_timeout: Connections idle for longer than this are discarded
+        framing: "auto", "newline" or "length-prefixed"
+        compression: "none", "auto" (every available codec), "zlib" or "zstd";
+            only used on length-prefixed connections
+        compression_threshold: Size in bytes from which messages are compressed
+        serialization: "json", "auto" (MessagePack when available) or
+            "msgpack"; only used on length-prefixed connections
+        observer: Called with the bytes sent and received of every round trip
+        coalesce: Read-only methods whose identical concurrent requests are
+            merged into one (see SingleFlight)
+        on_coalesce: Called for every request answered from another one
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_connections: int = 4,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        idle_timeout: Optional[float] = 60.0,
+        framing: str = "auto",
+        observer: Optional[Observer] = None,
+        coalesce: Collection[str] = (),
+        on_coalesce: Optional[Callable[[bool], None]] = None,
+        compression: str = COMPRESSION_NONE,
+        compression_threshold: int = COMPRESSION_THRESHOLD,
+        serialization: str = FORMAT_JSON,
+    ):
+        if framing not in FRAMING_MODES:
+            raise ValueError(f"Unknown framing: {framing}")
+        self.codecs = offered_codecs(compression)
+        self.compression_threshold = compression_threshold
+        self.formats = offered_formats(serialization)
+        self.host = host
+        self.port = port
+        self.single_flight = SingleFlight(coalesce, on_coalesce)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self._idle: List[_Connection] = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.reconnects = 0
+        # None until the listener has shown whether it accepts batch arrays.
+        self.batch_supported: Optional[bool] = None
+        self.framing = framing
+        # Result of the first negotiation, reused for later connections.
+        self.negotiated_framing: Optional[str] = None if framing == "auto" else framing
+        self.observer = observer
+
+    def _connect(self) -> _Connection:
+        conn = _Connection(
+            self.host,
+            self.port,
+            self.timeout,
+            self.connect_timeout,
+            self.negotiated_framing or self.framing,
+            self.codecs,
+            self.compression_threshold,
+            self.formats,
+        )
+        self.connections_opened += 1
+        if self.negotiated_framing is None:
+            self.negotiated_framing = conn.framing
+            if conn.framing == FRAMING_NEWLINE:
+                # Older listeners may treat the rejected hello as the only request
+                # on this connection; start over on a plain one.
+                conn.close()
+                conn = _Connection(self.host, self.port, self.timeout, self.connect_timeout)
+                self.connections_opened += 1
+        return conn
+
+    def _acquire(self):
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if conn.is_stale(self.idle_timeout):
+                    conn.close()
+                    continue
+                return conn, True
+        return self._connect(), False
+
+    def _release(self, conn: _Connection) -> None:
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        if self.single_flight.methods:
+            wait = self.timeout if timeout is None else timeout
+            return self.single_flight.request(request, wait, lambda r: self._request(r, timeout))
+        return self._request(request, timeout)
+
+    def _request(self, request: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        request_id = request.get("id")
+        return self._exchange([request], lambda conn: conn.read_response(request_id), timeout)
+
+    def request_batch(self, requests: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        if not requests:
+            return []
+        if self.single_flight.methods:
+            wait = self.timeout if timeout is None else timeout
+            return self.single_flight.request_batch(requests, wait, lambda r: self._request_batch(r, timeout))
+        return self._request_batch(requests, timeout)
+
+    def _request_batch(self, requests: List[Dict[str, Any]], timeout: Optional[float]) -> List[Dict[str, Any]]:
+        request_ids = [r.get("id") for r in requests]
+        if self.batch_supported is not False:
+            responses = self._exchange([requests], lambda conn: conn.read_batch_response(request_ids), timeout)
+            if responses is not None:
+                self.batch_supported = True
+                return _order_batch(requests, responses)
+            self.batch_supported = False
+        responses = self._exchange(requests, lambda conn: conn.read_responses(request_ids), timeout)
+        return _order_batch(requests, responses)
+
+    def _exchange(self, messages: List[Any], read, timeout: Optional[float]):
+        """Send ``messages`` on a pooled connection and return ``read(conn)``."""
+        timeout = self.timeout if timeout is None else timeout
+        # A reused connection can still be closed by the listener between the
+        # staleness check and the send; retry exactly once on a new connection.
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            sent = None
+            try:
+                conn.set_timeout(timeout)
+                received = conn.bytes_received
+                sent = conn.send_messages(messages)
+                response = read(conn)
+            except socket.timeout:
+                conn.close()
+                raise
+            except IncompleteResponseError:
+                conn.close()
+                raise
+            except (ConnectionError, OSError):
+                conn.close()
+                # Once sent, a mutating command may have run before the listener
+                # went away; only reads that got no reply are safe to send again.
+                safe = sent is None or (conn.bytes_received == received and _is_read_only(messages))
+                if reused and attempt == 0 and safe:
+                    self.reconnects += 1
+                    continue
+                raise
+            self._release(conn)
+            if self.observer is not None:
+                self.observer(sent, conn.bytes_received - received)
+            return response
+        raise ConnectionError("Unable to reach Grasshopper")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# asyncio.StreamReader refuses lines longer than its limit; geometry replies
+# can be large, so allow lines up to 1 GiB.
+_ASYNC_LINE_LIMIT = 1 << 30
+
+
+class AsyncTransport:
+    """Multiplex concurrent requests over one asyncio connection.
+
+    Requests are written as soon as they are issued and a background reader
+    task routes each reply to the waiting caller by JSON-RPC ``id``. Listeners
+    that answer without an ``id`` are assumed to reply in request order.
+
+    Args:
+        host: Listener host
+        port: Listener port
+        timeout: Default per-request timeout in seconds
+        connect_timeout: Timeout in seconds for establishing the connection
+        framing: "auto", "newline" or "length-prefixed"
+        compression: "none", "auto" (every available codec), "zlib" or "zstd";
+            only used on length-prefixed connections
+        compression_threshold: Size in bytes from which messages are compressed
+        serialization: "json", "auto" (MessagePack when available) or
+            "msgpack"; only used on length-prefixed connections
+        observer: Called with the bytes sent and received of every round trip
+        coalesce: Read-only methods whose identical concurrent requests are
+            merged into one (see SingleFlight)
+        on_coalesce: Called for every request answered from another one
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        framing: str = "auto",
+        observer: Optional[Observer] = None,
+        coalesce: Collection[str] = (),
+        on_coalesce: Optional[Callable[[bool], None]] = None,
+        compression: str = COMPRESSION_NONE,
+        compression_threshold: int = COMPRESSION_THRESHOLD,
+        serialization: str = FORMAT_JSON,
+    ):
+        if framing not in FRAMING_MODES:
+            raise ValueError(f"Unknown framing: {framing}")
+        self.codecs = offered_codecs(compression)
+        self.compression_threshold = compression_threshold
+        self.formats = offered_formats(serialization)
+        self.host = host
+        self.port = port
+        self.single_flight = AsyncSingleFlight(coalesce, on_coalesce)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.observer = observer
+        self.connections_opened = 0
+        self._pending: Dict[Any, asyncio.Future] = {}
+        # Maps the id of every entry in an in-flight batch to the batch key.
+        self._batch_entries: Dict[Any, Any] = {}
+        self.batch_supported: Optional[bool] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        # None until the first reply tells us whether the listener echoes ids.
+        self._echoes_ids: Optional[bool] = None
+        self.framing = framing
+        self.negotiated_framing: Optional[str] = None if framing == "auto" else framing
+        self._framed = False
+        # Codec and message format negotiated on the current connection
+        self.codec: Optional[Codec] = None
+        self.serializer = JSON
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def _connected(self) -> bool:
+        return (
+            self._writer is not None
+            and not self._writer.is_closing()
+            and self._reader_task is not None
+            and not self._reader_task.done()
+        )
+
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Streams and locks are bound to the loop that created them.
+            self._drop_connection(ConnectionError("Event loop changed"))
+            self._loop = loop
+            self._connect_lock = asyncio.Lock()
+            self._write_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if not self._connected():
+                self._drop_connection(ConnectionError("Connection closed before response received"))
+                reader, writer = await self._open()
+                framing = self.negotiated_framing or self.framing
+                codec, serializer = None, JSON
+                if framing != FRAMING_NEWLINE:
+                    framing, codec, serializer = await self._negotiate(
+                        reader, writer, required=framing == FRAMING_LENGTH_PREFIXED
+                    )
+                    if self.negotiated_framing is None and framing == FRAMING_NEWLINE:
+                        # Older listeners may treat the rejected hello as the only
+                        # request on this connection; start over on a plain one.
+                        writer.close()
+                        reader, writer = await self._open()
+                self.negotiated_framing = framing
+                self._framed = framing == FRAMING_LENGTH_PREFIXED
+                self.codec = codec
+                self.serializer = serializer
+                self._reader, self._writer = reader, writer
+                self._reader_task = loop.create_task(self._read_loop(reader, self._framed, codec, serializer))
+        return self._writer
+
+    async def _open(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, limit=_ASYNC_LINE_LIMIT),
+            self.connect_timeout,
+        )
+        self.connections_opened += 1
+        return reader, writer
+
+    async def _negotiate(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, required: bool
+    ) -> Tuple[str, Optional[Codec], Serializer]:
+        writer.write(_encode_request(_hello_request(self.codecs, self.compression_threshold, self.formats)))
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), self.connect_timeout)
+        try:
+            reply = JSON.loads(line)
+        except ValueError:
+            reply = None
+        framing = _negotiated_framing(reply)
+        if required and framing != FRAMING_LENGTH_PREFIXED:
+            writer.close()
+            raise ConnectionError("Grasshopper listener does not support length-prefixed framing")
+        return framing, _negotiated_codec(reply, self.codecs), _negotiated_serializer(reply, self.formats)
+
+    async def _read_frame(self, reader: asyncio.StreamReader, codec: Optional[Codec]) -> Optional[Tuple[bytes, int]]:
+        """Read the next frame payload (decompressed) and its size on the wire, or None at EOF."""
+        try:
+            header = await reader.readexactly(_FRAME_HEADER.size)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise IncompleteResponseError("Incomplete response from Grasshopper")
+            return None
+        length, compressed = _frame_length(header, codec)
+        try:
+            if not compressed:
+                return await reader.readexactly(length), _FRAME_HEADER.size + length
+            decompressor = codec.decompressor()
+            parts = []
+            remaining = length
+            while remaining:
+                chunk = await reader.readexactly(min(remaining, _DECOMPRESS_CHUNK))
+                parts.append(decompressor.decompress(chunk))
+                remaining -= len(chunk)
+            if hasattr(decompressor, "flush"):
+                parts.append(decompressor.flush())
+            return b"".join(parts), _FRAME_HEADER.size + length
+        except asyncio.IncompleteReadError:
+            raise IncompleteResponseError("Incomplete response from Grasshopper")
+
+    async def _read_loop(
+        self, reader: asyncio.StreamReader, framed: bool, codec: Optional[Codec] = None, serializer: Serializer = JSON
+    ) -> None:
+        error: Exception = ConnectionError("Connection closed before response received")
+        try:
+            while framed:
+                frame = await self._read_frame(reader, codec)
+                if frame is None:
+                    break
+                payload, size = frame
+                if payload:
+                    self._resolve(serializer.loads(payload), size)
+            while not framed:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    error = IncompleteResponseError("Incomplete response from Grasshopper")
+                    break
+                if not line.isspace():
+                    self._resolve(JSON.loads(line), len(line))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            if self._reader is reader:
+                self._drop_connection(error)
+
+    def _resolve(self, response: Any, size: int) -> None:
+        if isinstance(response, list):
+            keys = {self._batch_entries.get(r.get("id")) for r in response if isinstance(r, dict)}
+            keys.discard(None)
+            future = self._pending.pop(keys.pop(), None) if keys else None
+        elif isinstance(response, dict) and response.get("id") is not None:
+            self._echoes_ids = True
+            future = self._pending.pop(response["id"], None)
+        elif self._pending:
+            batches = set(self._batch_entries.values())
+            pending_batch = next((key for key in self._pending if key in batches), None)
+            if self._echoes_ids is not False and pending_batch is not None:
+                # A listener that echoes ids rejects a batch with one id-less
+                # error; the oldest request may be another one still running.
+                key = pending_batch
+            else:
+                # No id in the reply: the listener answers in request order.
+                key = next(iter(self._pending))
+                if key not in batches:
+                    self._echoes_ids = False
+            future = self._pending.pop(key)
+        else:
+            future = None
+        if future is not None and not future.done():
+            # The size travels with the reply so the caller can report it
+            future.set_result((response, size))
+
+    def _drop_connection(self, error: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+        writer, task = self._writer, self._reader_task
+        self._reader = self._writer = self._reader_task = None
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            try:
+                task.cancel()
+            except RuntimeError:
+                # The task belongs to an event loop that is already closed.
+                pass
+
+    async def request(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        if self.single_flight.methods:
+            wait = self.timeout if timeout is None else timeout
+            return await self.single_flight.request(request, wait, lambda r: self._request(r, timeout))
+        return await self._request(request, timeout)
+
+    async def _request(self, request: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        return await self._exchange([request], request.get("id"), timeout)
+
+    async def request_batch(self, requests: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        if not requests:
+            return []
+        if self.single_flight.methods:
+            wait = self.timeout if timeout is None else timeout
+            return await self.single_flight.request_batch(
+                requests, wait, lambda r: self._request_batch(r, timeout), lambda r: self._request(r, timeout)
+            )
+        return await self._request_batch(requests, timeout)
+
+    async def _request_batch(self, requests: List[Dict[str, Any]], timeout: Optional[float]) -> List[Dict[str, Any]]:
+        if self.batch_supported is not False:
+            batch_key = ("batch", requests[0].get("id"))
+            for request in requests:
+                self._batch_entries[request.get("id")] = batch_key
+            try:
+                responses = await self._exchange([requests], batch_key, timeout)
+            finally:
+                for request in requests:
+                    self._batch_entries.pop(request.get("id"), None)
+            if isinstance(responses, list):
+                self.batch_supported = True
+                return _order_batch(requests, responses)
+            self.batch_supported = False
+        return list(await asyncio.gather(*[self._request(request, timeout) for request in requests]))
+
+    async def _exchange(self, messages: List[Any], request_id: Any, timeout: Optional[float]) -> Any:
+        """Write ``messages`` and wait for the reply routed to ``request_id``."""
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in range(2):
+            writer = await self._ensure_connected()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            data = _encode_messages(
+                messages,
+                FRAMING_LENGTH_PREFIXED if self._framed else FRAMING_NEWLINE,
+                self.codec,
+                self.compression_threshold,
+                self.serializer,
+            )
+            try:
+                async with self._write_lock:
+                    writer.write(data)
+                    await writer.drain()
+            except (ConnectionError, OSError):
+                self._pending.pop(request_id, None)
+                self._drop_connection(ConnectionError("Connection closed before response received"))
+                if attempt == 0:
+                    continue
+                raise
+            break
+        try:
+            response, received = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(request_id, None)
+            if not self._echoes_ids:
+                # Without ids a late reply would be handed to the next caller.
+                self._drop_connection(ConnectionError("Connection reset after timeout"))
+            raise
+        if self.observer is not None:
+            self.observer(len(data), received)
+        return response
+
+    async def close(self) -> None:
+        writer = self._writer
+        self._drop_connection(ConnectionError("Transport closed"))
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+def create_transport(
+    mode: str,
+    host: str,
+    port: int,
+    timeout: float = 30.0,
+    framing: str = "auto",
+    observer: Optional[Observer] = None,
+    coalesce: Collection[str] = (),
+    on_coalesce: Optional[Callable[[bool], None]] = None,
+    compression: str = COMPRESSION_NONE,
+    compression_threshold: int = COMPRESSION_THRESHOLD,
+    serialization: str = FORMAT_JSON,
+):
+    """Create a transport for ``mode`` ("pooled" or "oneshot")."""
+    if mode == "oneshot":
+        return OneShotTransport(host, port, timeout=timeout, observer=observer, coalesce=coalesce, on_coalesce=on_coalesce)
+    if mode == "pooled":
+        return PooledTransport(
+            host,
+            port,
+            timeout=timeout,
+            framing=framing,
+            observer=observer,
+            coalesce=coalesce,
+            on_coalesce=on_coalesce,
+            compression=compression,
+            compression_threshold=compression_threshold,
+            serialization=serialization,
+        )
+    raise ValueError(f"Unknown transport mode: {mode}")
@@ -11,10 +11,21 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
-        "mcp>=0.1.0",
+        # 需要 mcp.server.fastmcp；其餘依賴（pydantic、anyio、uvicorn 等）由 mcp 聲明，按平台安裝
+        "mcp>=1.2.0",
         "websockets>=10.0",
         "aiohttp>=3.8.0",
     ],
+    extras_require={
+        # 解碼二進制幾何數據和計算幾何摘要
+        "geometry": ["numpy>=1.20"],
+        # 更快的 JSON 編解碼和可協商的 MessagePack 消息格式
+        "speed": ["orjson>=3.6", "msgpack>=1.0"],
+        # 大消息的 zstd 壓縮（未安裝時只協商 zlib）
+        "zstd": ["zstandard>=0.15"],
+        # 針對模擬監聽器運行 tests/ 中的測試
+        "test": ["pytest>=7"],
+    },
     entry_points={
         "console_scripts": [
             "grasshopper-mcp=grasshopper_mcp.bridge:main",
@@ -0,0 +1,276 @@
+"""
+Batches and the instance pool against the in-process fake listener.
+"""
+
+import asyncio
+import collections
+import json
+import socket
+import threading
+
+import pytest
+
+from grasshopper_mcp import bridge
+from grasshopper_mcp.fake_listener import FakeGrasshopperListener
+from grasshopper_mcp.instances import InstancePool
+from grasshopper_mcp.transport import AsyncTransport, PooledTransport
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    """Point the bridge at a listener for the rest of the test."""
+    def connect(listener):
+        monkeypatch.setattr(bridge, "GRASSHOPPER_HOST", listener.address[0])
+        monkeypatch.setattr(bridge, "GRASSHOPPER_PORT", listener.address[1])
+        monkeypatch.setattr(bridge, "TRACE_PATH", None)
+        return listener
+    return connect
+
+
+def _calls(listener):
+    slider = listener.canvas.add_component({"type": "Number Slider"})["id"]
+    return [
+        ("echo", {"n": 1}),
+        ("set_component_value", {"id": slider, "value": "4"}),
+        ("get_component_info", {"componentId": "missing"}),
+        ("no_such_command", {}),
+        ("echo", {"n": 2}),
+    ]
+
+
+def _check_replies(results):
+    assert len(results) == 5
+    assert results[0] == {"success": True, "result": {"n": 1}}
+    assert results[1]["success"] is True and results[1]["result"]["value"] == 4
+    assert results[2]["success"] is False and "not found" in results[2]["error"]
+    assert results[3]["success"] is False and "no_such_command" in results[3]["error"]
+    assert results[4] == {"success": True, "result": {"n": 2}}
+
+
+@pytest.mark.parametrize("supports_batch", [True, False])
+def test_send_batch_keeps_order_and_entry_errors(connect, supports_batch):
+    with connect(FakeGrasshopperListener(supports_batch=supports_batch)) as listener:
+        calls = _calls(listener)
+        _check_replies(bridge.send_batch(calls))
+        # One message for the batch, or the rejected batch then one per call
+        assert listener.messages_received == (1 if supports_batch else 1 + len(calls))
+        assert bridge._get_transport().batch_supported is supports_batch
+
+
+@pytest.mark.parametrize("supports_batch", [True, False])
+def test_send_batch_async_keeps_order_and_entry_errors(connect, supports_batch):
+    async def run(listener):
+        calls = _calls(listener)
+        results = await bridge.send_batch_async(calls)
+        transport = bridge._get_async_transport()
+        supported = transport.batch_supported
+        await transport.close()
+        return results, supported
+
+    # Replies in completion order must still come back in request order
+    listener = FakeGrasshopperListener(supports_batch=supports_batch, concurrent=True, method_latency={"echo": 0.05})
+    with connect(listener):
+        results, supported = asyncio.run(run(listener))
+    _check_replies(results)
+    assert supported is supports_batch
+
+
+def test_rejected_batch_does_not_answer_a_concurrent_request():
+    async def run(listener):
+        transport = AsyncTransport(*listener.address, timeout=3.0)
+        try:
+            slow = asyncio.ensure_future(
+                transport.request({"jsonrpc": "2.0", "id": "slow", "method": "get_all_components", "params": {}})
+            )
+            await asyncio.sleep(0.05)
+            # The id-less rejection of the batch arrives while the slow read is pending
+            batch = await transport.request_batch([
+                {"jsonrpc": "2.0", "id": "a", "method": "echo", "params": {"n": 1}},
+                {"jsonrpc": "2.0", "id": "b", "method": "echo", "params": {"n": 2}},
+            ])
+            return batch, await slow, transport.batch_supported
+        finally:
+            await transport.close()
+
+    listener = FakeGrasshopperListener(concurrent=True, supports_batch=False, method_latency={"get_all_components": 0.5})
+    with listener:
+        batch, slow, supported = asyncio.run(run(listener))
+    assert [reply["result"]["result"] for reply in batch] == [{"n": 1}, {"n": 2}]
+    assert slow["id"] == "slow" and slow["result"]["success"] is True
+    assert supported is False
+
+
+def _hang_up_on_second_request(server, received):
+    """Answer the first request of every connection, run the second and hang up."""
+    while True:
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            return
+        with conn, conn.makefile("rb") as reader:
+            for answered in (True, False):
+                line = reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                received[request["method"]] += 1
+                if answered:
+                    conn.sendall(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": {}}).encode() + b"\n")
+
+
+def test_pooled_transport_resends_only_unanswered_reads():
+    received = collections.Counter()
+    server = socket.create_server(("127.0.0.1", 0))
+    threading.Thread(target=_hang_up_on_second_request, args=(server, received), daemon=True).start()
+    transport = PooledTransport(*server.getsockname(), framing="newline", timeout=2.0)
+
+    def request(method):
+        return transport.request({"jsonrpc": "2.0", "id": method, "method": method, "params": {}})
+
+    try:
+        request("echo")
+        # The command may have run before the connection went away
+        with pytest.raises(ConnectionError):
+            request("add_component")
+        request("echo")
+        assert request("get_all_components")["id"] == "get_all_components"
+    finally:
+        transport.close()
+        server.close()
+    assert received["add_component"] == 1
+    assert received["get_all_components"] == 2
+    assert transport.reconnects == 1
+
+
+def _pool(listeners, check_interval=60.0):
+    return InstancePool(
+        [listener.address for listener in listeners],
+        lambda host, port: AsyncTransport(host, port, timeout=2.0),
+        check_interval=check_interval,
+        check_timeout=1.0,
+    )
+
+
+def _echo(instance, item):
+    return bridge.send_batch_to_instance(instance, [("echo", {"n": item})])
+
+
+def test_pool_shards_work_in_item_order():
+    async def run(pool):
+        try:
+            return await pool.map(list(range(20)), _echo)
+        finally:
+            await pool.close()
+
+    with FakeGrasshopperListener(latency=0.01) as first, FakeGrasshopperListener(latency=0.01) as second:
+        pool = _pool([first, second])
+        results = asyncio.run(run(pool))
+        handled = [first.requests_handled, second.requests_handled]
+    assert [reply["result"]["n"] for (reply,) in results] == list(range(20))
+    # Every instance took part, each after its health check
+    assert all(count > 1 for count in handled)
+    assert sum(instance.completed for instance in pool.instances) == 20
+
+
+def test_pool_fails_over_from_an_unhealthy_listener():
+    async def run(pool, failing):
+        try:
+            assert len(await pool.healthy()) == 2
+            # Still trusted as healthy when it goes away
+            failing.stop()
+            results = await pool.map(list(range(10)), _echo)
+            return results, await pool.select()
+        finally:
+            await pool.close()
+
+    with FakeGrasshopperListener() as healthy:
+        failing = FakeGrasshopperListener().start()
+        pool = _pool([failing, healthy])
+        results, selected = asyncio.run(run(pool, failing))
+    assert [reply["result"]["n"] for (reply,) in results] == list(range(10))
+    lost, kept = pool.instances
+    assert lost.healthy is False and lost.failures == 1 and lost.error
+    assert kept.healthy is True and kept.completed == 10
+    assert selected == [kept]
+
+
+def test_pool_reports_items_no_instance_could_run():
+    async def run(pool):
+        try:
+            return await pool.map(["a", "b"], _echo)
+        finally:
+            await pool.close()
+
+    listener = FakeGrasshopperListener().start()
+    listener.stop()
+    pool = _pool([listener])
+    results = asyncio.run(run(pool))
+    assert all(result["success"] is False and "No healthy Grasshopper instance" in result["error"] for result in results)
+
+
+def _sweep_canvas(listener, items=10):
+    sliders = [listener.canvas.add_component({"type": "Number Slider"})["id"] for _ in range(2)]
+    output = listener.canvas.add_component({"type": "Circle"})["id"]
+    listener.canvas.fill_geometry(output, items)
+    return [{"id": slider, "min": 0, "max": 9, "steps": 10} for slider in sliders], [output]
+
+
+def test_sweep_fails_when_its_listener_goes_away_and_resumes(connect, tmp_path):
+    path = str(tmp_path / "sweep.npz")
+    first = connect(FakeGrasshopperListener(method_latency={"execute_preview": 0.01}).start())
+    sliders, outputs = _sweep_canvas(first)
+
+    async def sweep(resume, stop=None):
+        started = await bridge.run_sweep(sliders, outputs, path=path, resume=resume)
+        job = bridge._sweeps[started["result"]["id"]]
+        if stop is not None:
+            while job.results.done.sum() < 10:
+                await asyncio.sleep(0.01)
+            stop.stop()
+        await job.wait()
+        status = job.status()
+        await bridge._get_async_transport().close()
+        return status
+
+    status = asyncio.run(sweep(False, stop=first))
+    assert status["state"] == "failed" and status["error"]
+    # Samples lost with the connection are neither done nor failed
+    assert 10 <= status["completed"] < 100 and status["failed"] == 0
+
+    with connect(FakeGrasshopperListener(canvas=first.canvas)):
+        status = asyncio.run(sweep(True))
+    assert status["state"] == "completed"
+    assert status["completed"] == 100 and status["failed"] == 0
+    assert status["resumedFrom"] >= 10
+
+
+def test_sharded_sweep_moves_the_batches_of_a_failing_instance(connect, monkeypatch, tmp_path):
+    kept = FakeGrasshopperListener(method_latency={"execute_preview": 0.005}).start()
+    lost = FakeGrasshopperListener(method_latency={"execute_preview": 0.005}, canvas=kept.canvas).start()
+    connect(kept)
+    instances = ",".join("%s:%d" % listener.address for listener in (lost, kept))
+    monkeypatch.setattr(bridge, "GRASSHOPPER_INSTANCES", instances)
+    sliders, outputs = _sweep_canvas(kept)
+
+    async def sweep():
+        pool = bridge._get_instance_pool()
+        try:
+            started = await bridge.run_sweep(sliders, outputs, path=str(tmp_path / "sweep.npz"), instances=2)
+            assert len(started["result"]["instances"]) == 2
+            job = bridge._sweeps[started["result"]["id"]]
+            # Goes away with batches of the sweep in flight
+            while lost.requests_handled < 10:
+                await asyncio.sleep(0.01)
+            lost.stop()
+            await job.wait()
+            return job.status(), pool.find(*lost.address)
+        finally:
+            await pool.close()
+
+    try:
+        status, instance = asyncio.run(sweep())
+    finally:
+        kept.stop()
+    assert status["state"] == "completed"
+    assert status["completed"] == 100 and status["failed"] == 0
+    assert instance.healthy is False and instance.failures == 1